@@ -0,0 +1,464 @@
+"""
+Lockstep engine that simulates many R-Day replications at once.
+
+Instead of stepping events, BatchedRDaySimulation computes every station's
+schedule directly. Each cadet follows the fixed route of its class, so a
+multi-server FIFO station is fully described by the times its visitors
+arrive: sorting the arrivals and running the Kiefer-Wolfowitz recursion
+(start = max(arrival, earliest free server), finish = start + service)
+gives every start and finish. All state is held as (replications, cadets)
+arrays, so one recursion step advances every replication together.
+
+Stations are swept in route order. Arrivals at a station are the finish
+times at each visitor's previous station, or the release times of the bus
+and oath batches, which follow RDaySimulation's rule (release when the batch
+is full, or when every cadet has started at the feeding stations). Because
+cadet classes visit the oath and LRC 687 stations in opposite orders, sweeps
+repeat until no arrival time changes; each sweep settles a longer prefix of
+the day, so stations with unchanged arrivals are skipped and the others
+resume their recursion from a saved state just before the first change.
+
+Service times are the k-th draws of each station's stream for its k-th
+arrival, and simultaneous events are ordered as SimPy processes them, so
+seeded replications reproduce the SimPy engine's KPIs exactly.
+
+The engine returns the per-replication KPIs of replications.run_replication
+(completion time, mean cycle time and peak queue per station), not event
+logs.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config import STATION_DIC, BUS_BATCH_SIZE, OATH_BATCH_SIZE
+from cadets import generate_cadet_table
+from random_streams import RandomStreams
+from routing import compile_station_table, CLASS_CT, BUS_BATCH, OATH_BATCH
+
+# Predecessor codes in the per-class predecessor table
+_FIRST = -1     # station is the first on the route (cadet arrival)
+_SKIPPED = -2   # class never visits the station
+
+# Upper bound on station sweeps before giving up on convergence
+MAX_SWEEPS = 50
+
+# Recursion steps between saved server states; a station whose arrivals
+# changed late in the day is re-run from the last state before the change
+CHECKPOINT_STEPS = 64
+
+
+class BatchedRDaySimulation:
+    """
+    R replications of one scenario, advanced together with NumPy.
+
+    Attributes:
+        n_reps: Number of replications
+        stations: Compiled station and routing table
+        start: (stations, R, cadets + 1) service start times (inf if not visited)
+        finish: (stations, R, cadets + 1) service finish times
+        rank: (stations, R, cadets + 1) position of each cadet in the
+            station's service order
+        wave: (stations, R, cadets + 1) processing wave of each service
+            start among events with the same time stamp (see _recursion)
+        peak_queue: (R, stations) peak queue length seen at service starts
+        sweeps: Station sweeps needed to converge
+    """
+
+    def __init__(self, seeds: List, mod_path: str = 'std', usmaps_path: str = 'rand',
+                 staffing: Dict[str, int] = None):
+        """
+        Generate the cohorts and service-time draws of every replication.
+
+        Args:
+            seeds: One seed or SeedSequence per replication (the same seeds
+                give the same cohorts and draws as RDaySimulation)
+            mod_path: Modification path ('mod' or 'std')
+            usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+            staffing: Station name -> server count overrides
+        """
+        self.mod_path = mod_path
+        self.usmaps_path = usmaps_path
+        self.stations = compile_station_table(STATION_DIC, staffing)
+        self.station_list = list(self.stations.names)
+        self.n_reps = len(seeds)
+
+        station_ct = len(self.stations)
+        cls, usmaps, female, arrival, draws = [], [], [], [], []
+        for seed in seeds:
+            cadets = generate_cadet_table(RandomStreams(seed), mod_path, usmaps_path)
+            cadet_ct = len(cadets)
+            # A second stream set for service times, drawn in one batch per
+            # station (values do not depend on the batch size)
+            streams = RandomStreams(seed, batch_size=cadet_ct)
+            cls.append(cadets.cls)
+            usmaps.append(cadets.usmaps.astype(bool))
+            female.append(cadets.sex == 0)
+            arrival.append(cadets.arrival_time)
+            draws.append([streams.service_times(s, cadet_ct) for s in range(station_ct)])
+
+        self.cadet_ct = cadet_ct
+        self.cls = np.array(cls)
+        self.usmaps = np.array(usmaps)
+        self.female = np.array(female)
+        self.arrival = np.array(arrival)
+        self.arrival[:, 0] = np.inf  # row 0 is not a cadet
+        # (stations, R, cadets): k-th draw of a station goes to its k-th arrival
+        self.draws = np.array(draws).transpose(1, 0, 2)
+
+        # Predecessor of every station on each class's route
+        self.prev = np.full((CLASS_CT, station_ct), _SKIPPED, dtype=np.int64)
+        for c, route in enumerate(self.stations.routes):
+            self.prev[c, route[0]] = _FIRST
+            for src, dst in zip(route, route[1:]):
+                self.prev[c, dst] = src
+
+        # Sweep order: the first class's route, with stations only other
+        # classes visit inserted right after their predecessor
+        self.order = []
+        for route in self.stations.routes:
+            for pos, stn in enumerate(route):
+                if stn not in self.order:
+                    at = self.order.index(route[pos - 1]) + 1 if pos else 0
+                    self.order.insert(at, stn)
+        # Per station: arrival inputs, and sorted arrivals, service times,
+        # starts and saved server states of the last time it was served
+        self._inputs = {}
+        self._schedules = {}
+
+        shape = (station_ct, self.n_reps, cadet_ct + 1)
+        self.start = np.full(shape, np.inf)
+        self.finish = np.full(shape, np.inf)
+        self.rank = np.full(shape, cadet_ct + 1, dtype=np.int32)
+        self.wave = np.zeros(shape, dtype=np.int32)
+        self.peak_queue = np.zeros((self.n_reps, station_ct), dtype=np.int64)
+        self.sweeps = 0
+
+    def _arrivals(self, stn: int):
+        """
+        Arrival times and tie-break keys of every cadet at a station.
+
+        Simultaneous arrivals are ordered as SimPy processes them: by wave,
+        then batch members in the order they joined the batch, and cadets
+        finishing together at one station in the order they started there.
+
+        Returns:
+            (arrival, ready, prev_rank, wave) arrays of shape (R, cadets + 1):
+            arrival time (inf for cadets that do not visit the station or
+            whose arrival is not known yet), time the cadet was ready to
+            move on, its rank in the previous station's service order, and
+            the processing wave of the arrival
+        """
+        prev = self.prev[self.cls, stn]
+        cols = np.arange(self.cadet_ct + 1)[None, :]
+        visits = prev != _SKIPPED
+        visits[:, 0] = False
+        prev_idx = np.maximum(prev, 0)
+        first = prev == _FIRST
+
+        # Flat positions of each cadet's entry at its previous station
+        flat = (prev_idx * self.n_reps + np.arange(self.n_reps)[:, None]) * (self.cadet_ct + 1) + cols
+        prev_start = self.start.ravel()[flat]
+        prev_finish = self.finish.ravel()[flat]
+        ready = np.where(visits, np.where(first, self.arrival, prev_finish), np.inf)
+        prev_rank = np.where(first, cols, self.rank.ravel()[flat])
+        # A zero-length service ends one wave after it starts
+        zero = ~first & np.isfinite(prev_finish) & (prev_start == prev_finish)
+        wave = np.where(zero, self.wave.ravel()[flat] + 1, 0)
+        if self.stations.batch_row[stn] == BUS_BATCH:
+            return self._batch_release(ready, prev_rank, wave, visits, prev_start, BUS_BATCH_SIZE)
+        if self.stations.batch_row[stn] == OATH_BATCH:
+            return self._batch_release(ready, prev_rank, wave, visits, prev_start, OATH_BATCH_SIZE)
+        return ready, ready, prev_rank, wave
+
+    def _batch_release(self, ready, prev_rank, wave, visits, feeder_start, batch_size):
+        """
+        Release times of a batch station, following RDaySimulation's rule.
+
+        Cadets join the batch queue when they finish at a feeding station.
+        Every (batch_size + 1)-th join releases the queue; once every cadet
+        bound for the station has started at its feeder, each later join
+        releases the queue immediately. Released cadets arrive in the wave
+        of the join that released them.
+        """
+        feeder_start = np.where(visits, feeder_start, -np.inf)
+        all_started = feeder_start.max(axis=1)
+        if not visits[:, 1:].all():
+            # Some cadets never reach the feeders, so the count never completes
+            all_started = np.full(self.n_reps, np.inf)
+
+        order = np.lexsort((prev_rank, wave, ready), axis=1)
+        joins = np.take_along_axis(ready, order, axis=1)
+        join_waves = np.take_along_axis(wave, order, axis=1)
+        join_ct = np.isfinite(joins).sum(axis=1)
+        trigger = (joins <= all_started[:, None]).sum(axis=1)
+
+        k = np.arange(joins.shape[1])[None, :]
+        group_last = (k // (batch_size + 1) + 1) * (batch_size + 1) - 1
+        release_idx = np.where(k >= trigger[:, None], k,
+                               np.minimum(group_last, trigger[:, None]))
+        released = release_idx < join_ct[:, None]
+        release_idx = np.minimum(release_idx, joins.shape[1] - 1)
+        release = np.where(released, np.take_along_axis(joins, release_idx, axis=1), np.inf)
+
+        out = np.empty_like(release)
+        out_wave = np.empty_like(wave)
+        np.put_along_axis(out, order, release, axis=1)
+        np.put_along_axis(out_wave, order,
+                          np.take_along_axis(join_waves, release_idx, axis=1), axis=1)
+        return out, ready, prev_rank, out_wave
+
+    def _serve(self, stn: int, arrival: np.ndarray, ready: np.ndarray,
+               prev_rank: np.ndarray, wave: np.ndarray):
+        """
+        Run the multi-server FIFO recursion of one station for every replication.
+
+        Returns:
+            (cadet, start, finish, wave) arrays of shape (R, visitors), in
+            service order
+        """
+        order = np.lexsort((prev_rank, ready, wave, arrival), axis=1)
+        arr = np.take_along_axis(arrival, order, axis=1)
+        visitors = np.isfinite(arr).sum(axis=1)
+        n = int(visitors.max()) if len(visitors) else 0
+
+        # k-th arrival gets the station's k-th draw, adjusted for the cadet
+        svc = self.draws[stn][:, :n].copy()
+        cadet = order[:, :n]
+        usmaps = np.take_along_axis(self.usmaps, cadet, axis=1)
+        svc = np.where(usmaps, svc * self.stations.usmaps_frac_row[stn], svc)
+        if self.stations.female_skip_row[stn]:
+            svc = np.where(np.take_along_axis(self.female, cadet, axis=1), 0, svc)
+
+        arr = arr[:, :n]
+        arr_wave = np.take_along_axis(wave, cadet, axis=1)
+        start, start_wave = self._recursion(stn, arr, arr_wave, svc)
+        return cadet, start, start + svc, start_wave
+
+    def _recursion(self, stn: int, arr: np.ndarray, arr_wave: np.ndarray,
+                   svc: np.ndarray):
+        """
+        Service start times of sorted arrivals at a multi-server FIFO station.
+
+        SimPy processes events with equal time stamps in waves: a
+        zero-length service releases its server (and sends its cadet on)
+        only after every grant already scheduled for that instant. A start
+        belongs to the wave of the later of its arrival and the release of
+        its server, which decides the queue length logged with it.
+
+        Steps before the first arrival or service time that differs from the
+        previous sweep are reused, restarting from the last saved server state.
+
+        Args:
+            stn: Station index
+            arr: (R, visitors) arrival times in service order
+            arr_wave: (R, visitors) arrival waves
+            svc: (R, visitors) service times in service order
+
+        Returns:
+            (start, wave) arrays of shape (R, visitors)
+        """
+        n = arr.shape[1]
+        servers = int(self.stations.server_ct[stn])
+        if servers >= n:
+            return arr.copy(), arr_wave
+
+        start = np.empty_like(arr)
+        first = servers
+        saved = []
+        previous = self._schedules.get(stn)
+        if previous is not None:
+            old_arr, old_arr_wave, old_svc, old_result, old_saved = previous
+            m = min(n, old_arr.shape[1])
+            changed = ((arr[:, :m] != old_arr[:, :m]) | (svc[:, :m] != old_svc[:, :m])
+                       | (arr_wave[:, :m] != old_arr_wave[:, :m])).any(axis=0)
+            diff = int(changed.argmax()) if changed.any() else m
+            if diff == n == old_arr.shape[1]:
+                return old_result
+            if diff >= servers:
+                keep = min((diff - servers) // CHECKPOINT_STEPS, len(old_saved) - 1)
+                first = servers + keep * CHECKPOINT_STEPS
+                saved = old_saved[:keep + 1]
+                start[:, :first] = old_result[0][:, :first]
+
+        if not saved:
+            start[:, :servers] = arr[:, :servers]
+            saved = [(arr[:, :servers] + svc[:, :servers],
+                      np.where(svc[:, :servers] == 0, arr_wave[:, :servers] + 1, 0))]
+        free, free_wave = (state.copy() for state in saved[-1])
+        track_waves = bool((svc == 0).any())
+        rows = np.arange(self.n_reps)
+        wave = np.zeros_like(arr_wave)
+        if previous is not None and first > servers:
+            wave[:, :first] = old_result[1][:, :first]
+        else:
+            wave[:, :servers] = arr_wave[:, :servers]
+
+        for k in range(first, n):
+            if k > first and (k - servers) % CHECKPOINT_STEPS == 0:
+                saved.append((free.copy(), free_wave.copy()))
+            if track_waves:
+                # Among servers freed at the same time, the earliest wave
+                # releases first
+                earliest = free.min(axis=1)
+                server = np.where(free == earliest[:, None], free_wave,
+                                  np.iinfo(free_wave.dtype).max).argmin(axis=1)
+            else:
+                server = free.argmin(axis=1)
+            released = free[rows, server]
+            begin = np.maximum(arr[:, k], released)
+            start[:, k] = begin
+            free[rows, server] = begin + svc[:, k]
+            if track_waves:
+                wave[:, k] = np.maximum(np.where(begin == arr[:, k], arr_wave[:, k], 0),
+                                        np.where(begin == released, free_wave[rows, server], 0))
+                free_wave[rows, server] = np.where(svc[:, k] == 0, wave[:, k] + 1, 0)
+        if not track_waves:
+            wave = np.where(start == arr, arr_wave, 0)
+        self._schedules[stn] = (arr, arr_wave, svc, (start, wave), saved)
+        return start, wave
+
+    def run(self, verbose: bool = False):
+        """
+        Sweep the stations until every start and finish time is settled.
+
+        Args:
+            verbose: Whether to print progress messages
+        """
+        for self.sweeps in range(1, MAX_SWEEPS + 1):
+            changed = False
+            for stn in self.order:
+                inputs = self._arrivals(stn)
+                previous = self._inputs.get(stn)
+                if previous is not None and all(map(np.array_equal, inputs, previous)):
+                    continue
+                self._inputs[stn] = inputs
+                changed = True
+                cadet, start, finish, wave = self._serve(stn, *inputs)
+                ranks = np.broadcast_to(np.arange(cadet.shape[1]), cadet.shape)
+                for table, values, fill in ((self.start, start, np.inf),
+                                            (self.finish, finish, np.inf),
+                                            (self.rank, ranks, self.cadet_ct + 1),
+                                            (self.wave, wave, 0)):
+                    table[stn] = fill
+                    np.put_along_axis(table[stn], cadet, values, axis=1)
+            if not changed:
+                break
+        else:
+            raise RuntimeError(f"Station schedules did not settle in {MAX_SWEEPS} sweeps")
+
+        self._measure_queues()
+        if verbose:
+            print(f"Batched simulation of {self.n_reps} replications settled "
+                  f"in {self.sweeps} sweeps")
+
+    def _measure_queues(self):
+        """
+        Peak queue length per station, as logged at each service start: the
+        cadets that have arrived minus those that have started by then.
+        Events are compared by (time, wave), encoded as complex numbers,
+        which NumPy orders lexicographically.
+        """
+        for stn in self.order:
+            arrival, _, _, arrival_wave = self._arrivals(stn)
+            arrival = np.sort(arrival + 1j * arrival_wave, axis=1)
+            start = np.sort(self.start[stn] + 1j * self.wave[stn], axis=1)
+            for r in range(self.n_reps):
+                starts = start[r][np.isfinite(start[r].real)]
+                if len(starts) == 0:
+                    continue
+                waiting = (np.searchsorted(arrival[r], starts, side='right')
+                           - np.searchsorted(starts, starts, side='right'))
+                self.peak_queue[r, stn] = waiting.max()
+
+    def completion_times(self) -> np.ndarray:
+        """
+        Completion time of each replication: the finish time of the last
+        service to start, as in RDaySimulation.summary().
+
+        Returns:
+            (R,) completion times in hours after SIMULATION_START_TIME
+        """
+        start = np.where(np.isfinite(self.start), self.start, -np.inf)
+        last_start = start.max(axis=(0, 2))
+        finish = np.where(start == last_start[None, :, None], self.finish, -np.inf)
+        return finish.max(axis=(0, 2))
+
+    def mean_cycle_times(self) -> np.ndarray:
+        """
+        Mean cadet cycle time (arrival to completion) of each replication.
+
+        Returns:
+            (R,) mean cycle times in hours
+        """
+        last = np.array([route[-1] for route in self.stations.routes])[self.cls[:, 1:]]
+        rows = np.arange(self.n_reps)[:, None]
+        cols = np.arange(1, self.cadet_ct + 1)[None, :]
+        cycle = self.finish[last, rows, cols] - self.arrival[:, 1:]
+        return cycle.mean(axis=1)
+
+    def summary_frame(self, first_rep: int = 0) -> pd.DataFrame:
+        """
+        Per-replication KPIs in the layout of replications.run_replication.
+
+        Args:
+            first_rep: Replication index of the first replication
+
+        Returns:
+            DataFrame with one row per replication
+        """
+        df = pd.DataFrame({"replication": np.arange(first_rep, first_rep + self.n_reps),
+                           "completion_time": self.completion_times(),
+                           "mean_cycle_time": self.mean_cycle_times()})
+        peaks = pd.DataFrame(self.peak_queue,
+                             columns=[f"peak_q_{s}" for s in self.station_list])
+        return pd.concat([df, peaks], axis=1)
+
+
+def run_batch(task) -> pd.DataFrame:
+    """
+    Run one block of replications in lockstep.
+
+    Args:
+        task: Tuple of (index of the first replication, seeds, mod_path,
+            usmaps_path, staffing overrides or None)
+
+    Returns:
+        Per-replication KPIs of the block
+    """
+    first_rep, seeds, mod_path, usmaps_path, staffing = task
+    sim = BatchedRDaySimulation(seeds, mod_path, usmaps_path, staffing)
+    sim.run()
+    return sim.summary_frame(first_rep)
+
+
+def run_batched_replications(seeds: List, mod_path: str = 'std',
+                             usmaps_path: str = 'rand', staffing: Dict[str, int] = None,
+                             workers: int = 1, block_size: int = 250) -> pd.DataFrame:
+    """
+    Run replications with the lockstep engine, in blocks spread over workers.
+
+    Args:
+        seeds: One seed or SeedSequence per replication
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        staffing: Station name -> server count overrides
+        workers: Number of worker processes
+        block_size: Maximum replications advanced together (bounds memory)
+
+    Returns:
+        DataFrame with one row per replication
+    """
+    block_ct = max(workers, -(-len(seeds) // block_size))
+    block_size = -(-len(seeds) // block_ct)
+    tasks = [(i, seeds[i:i + block_size], mod_path, usmaps_path, staffing)
+             for i in range(0, len(seeds), block_size)]
+
+    if workers <= 1:
+        frames = [run_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(run_batch, tasks))
+    return pd.concat(frames, ignore_index=True)
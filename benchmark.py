@@ -0,0 +1,469 @@
+"""
+Benchmark suite for the simulate -> save -> render -> stitch pipeline.
+
+Each workload is a seeded scenario of fixed size (cohort and frame count),
+run through the four stages a deployment exercises:
+
+    simulate  RDaySimulation.run (or --engine fast)
+    save      save_results (csv event log, flow matrix, cadet and station tables)
+    render    build_images frame states and frame loop (PNG per frame)
+    stitch    stitch_images.pngs_to_video_opencv
+
+For every stage the suite reports its work count (logged visits for simulate
+and save, frames for render and stitch), the best wall time over --repeat
+runs, the throughput (work per second) and the peak Python heap measured
+with tracemalloc in one extra run. Tracing slows Python down, so memory is
+never measured in a timed run. Results are written to
+output/benchmark_results.json; with --save-baseline they become the stored
+baseline (benchmark_baseline.json, committed with the code and recorded with
+the default settings), and otherwise they are compared with it. The script
+exits non-zero when a stage is slower or uses more memory than the baseline
+by more than the tolerance, or when its seeded workload no longer matches
+the baseline. Wall times only compare on the machine and interpreter the
+baseline was recorded with; anywhere else they are reported but not gated,
+and only the workloads and peak memory are checked.
+
+Usage:
+    python benchmark.py --save-baseline          # on the reference version
+    python benchmark.py                          # on a candidate version
+    python benchmark.py --sizes small medium large --repeat 3
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time as timer
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from cadets import Cohort
+from simulation import create_simulation, ENGINES
+
+# Seeded, fixed-size workloads: cohort (cadets per day, days, block size)
+# and the number of frames rendered and stitched
+WORKLOADS = {
+    "small": {"cadets": 1249, "days": 1, "block_size": 250, "frames": 4},
+    "medium": {"cadets": 5000, "days": 1, "block_size": 1000, "frames": 12},
+    "large": {"cadets": 10000, "days": 2, "block_size": 2000, "frames": 30},
+}
+DEFAULT_SIZES = ["small", "medium"]
+
+# Scenario and seed shared by every workload
+BENCH_MOD = 'std'
+BENCH_USMAPS = 'rand'
+BENCH_SEED = 2024
+
+# Simulated minutes between the frame states the rendered frames are drawn from
+BENCH_MINS_PER_FRAME = 5
+
+# Pipeline stages, in order
+STAGES = ["simulate", "save", "render", "stitch"]
+
+# Allowed fractional growth of wall time and peak memory over the baseline
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.25
+
+# Environment fields that must match the baseline's for wall times to compare
+TIMING_ENVIRONMENT = ("python", "platform", "machine", "cpus")
+
+# Layout version of the results file
+RESULTS_FORMAT = 1
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(_PACKAGE_DIR, "benchmark_baseline.json")
+
+
+def measure(fn: Callable, repeat: int = 1, memory: bool = True) -> Tuple:
+    """
+    Time a stage and, separately, measure its peak memory.
+
+    Args:
+        fn: Stage to run; returns (result, work count)
+        repeat: Timed runs; the fastest is reported
+        memory: Run once more under tracemalloc for the peak Python heap
+
+    Returns:
+        (result, work count, best wall seconds, peak bytes or None), with
+        the result of the last timed run
+    """
+    walls = []
+    for _ in range(repeat):
+        gc.collect()
+        tic = timer.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, work = fn()
+        walls.append(timer.perf_counter() - tic)
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, work, min(walls), peak
+
+
+def select_frames(states: Dict, frame_ct: int) -> Dict:
+    """
+    Evenly spaced subset of a per-frame state table.
+
+    Args:
+        states: Per-frame state table from build_images.compute_frame_states
+        frame_ct: Number of frames to keep
+
+    Returns:
+        State table with frame_ct frames spanning the whole run
+    """
+    total = len(states["time"])
+    keep = np.unique(np.linspace(0, total - 1, min(frame_ct, total)).round().astype(int))
+    return {name: values[keep] for name, values in states.items()}
+
+
+def run_workload(size: str, engine: str = 'simpy', repeat: int = 1,
+                 memory: bool = True) -> Dict[str, Dict]:
+    """
+    Run every stage of one workload in a scratch directory.
+
+    Args:
+        size: Workload name (see WORKLOADS)
+        engine: Simulation engine ('simpy' or 'fast')
+        repeat: Timed runs per stage
+        memory: Measure peak memory per stage
+
+    Returns:
+        Stage name -> dictionary with 'work', 'wall', 'rate' and 'peak_mb'
+    """
+    # Heavy plotting and video imports stay out of the module import
+    from build_images import compute_frame_states, render_frames
+    from stitch_images import pngs_to_video_opencv
+
+    workload = WORKLOADS[size]
+    cohort = Cohort(workload["cadets"], workload["days"],
+                    block_size=workload["block_size"])
+    path_descr = f"{BENCH_MOD} {BENCH_USMAPS}"
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix=f"bench-{size}-") as scratch:
+        frame_dir = os.path.join(scratch, "frames")
+        os.makedirs(frame_dir)
+
+        def simulate():
+            sim = create_simulation(engine, mod_path=BENCH_MOD, usmaps_path=BENCH_USMAPS,
+                                    output_dir=scratch, seed=BENCH_SEED, cohort=cohort)
+            sim.run(verbose=False)
+            return sim, len(sim.time_stamp)
+
+        sim, work, wall, peak = measure(simulate, repeat, memory)
+        results["simulate"] = (work, wall, peak)
+
+        def save():
+            sim.save_results(fmt='csv')
+            return None, len(sim.time_stamp)
+
+        _, work, wall, peak = measure(save, repeat, memory)
+        results["save"] = (work, wall, peak)
+
+        events = sim.event_frame()
+        del sim
+
+        def render():
+            states = select_frames(compute_frame_states(events, BENCH_MINS_PER_FRAME),
+                                   workload["frames"])
+            files = render_frames(states, path_descr, frame_dir, workers=1)
+            return None, len(files)
+
+        _, work, wall, peak = measure(render, repeat, memory)
+        results["render"] = (work, wall, peak)
+
+        video_file = os.path.join(scratch, "bench.mp4")
+
+        def stitch():
+            pngs_to_video_opencv(frame_dir, video_file, fps=workload["frames"])
+            return None, len([f for f in os.listdir(frame_dir) if f.endswith("Rday.png")])
+
+        _, work, wall, peak = measure(stitch, repeat, memory)
+        results["stitch"] = (work, wall, peak)
+
+    return {stage: {"work": int(work), "wall": wall,
+                    "rate": work / wall if wall > 0 else float("nan"),
+                    "peak_mb": None if peak is None else peak / 1e6}
+            for stage, (work, wall, peak) in results.items()}
+
+
+def environment() -> Dict:
+    """
+    Description of the machine and interpreter the benchmark ran on.
+
+    Returns:
+        JSON-serializable dictionary
+    """
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "machine": platform.machine(),
+            "cpus": os.cpu_count()}
+
+
+def environment_mismatch(current: Dict, baseline: Dict) -> List[str]:
+    """
+    Differences between two environments that make wall times incomparable.
+
+    Args:
+        current: Environment of this run (see environment)
+        baseline: Environment stored with the baseline
+
+    Returns:
+        One 'field current vs baseline' description per differing field
+    """
+    return [f"{field} {current.get(field)} vs {baseline.get(field)}"
+            for field in TIMING_ENVIRONMENT
+            if current.get(field) != baseline.get(field)]
+
+
+def max_rss_mb() -> float:
+    """
+    Peak resident set size of this process (None where unsupported).
+
+    Returns:
+        Megabytes
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE,
+            memory_tolerance: float = DEFAULT_MEMORY_TOLERANCE,
+            wall: bool = True) -> Tuple[List[str], Dict]:
+    """
+    Compare benchmark results with a baseline.
+
+    Args:
+        current: Results of this run (see run_benchmarks)
+        baseline: Stored baseline results
+        tolerance: Allowed fractional growth of wall time
+        memory_tolerance: Allowed fractional growth of peak memory
+        wall: Compare wall times (off when the baseline is from another
+            machine; workloads and peak memory are still compared)
+
+    Returns:
+        (failures, ratios): failure messages, and (size, stage) ->
+        wall-time ratio current / baseline (empty when wall is off)
+    """
+    failures = []
+    ratios = {}
+    if current["engine"] != baseline.get("engine"):
+        failures.append(f"engine '{current['engine']}' differs from the baseline's "
+                        f"'{baseline.get('engine')}'")
+        return failures, ratios
+
+    for size, stages in current["results"].items():
+        base_stages = baseline.get("results", {}).get(size)
+        if base_stages is None:
+            continue
+        for stage, now in stages.items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            label = f"{size}/{stage}"
+            if now["work"] != base["work"]:
+                failures.append(f"{label}: workload changed ({now['work']} vs "
+                                f"{base['work']} in the baseline); re-save the baseline")
+                continue
+            if wall:
+                ratios[(size, stage)] = now["wall"] / base["wall"]
+            if wall and now["wall"] > base["wall"] * (1 + tolerance):
+                failures.append(f"{label}: {now['wall']:.3f}s vs {base['wall']:.3f}s "
+                                f"(+{ratios[(size, stage)] - 1:.0%}, "
+                                f"tolerance {tolerance:.0%})")
+            if (now["peak_mb"] is not None and base.get("peak_mb") is not None
+                    and now["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance)):
+                failures.append(f"{label}: peak {now['peak_mb']:.1f} MB vs "
+                                f"{base['peak_mb']:.1f} MB (tolerance "
+                                f"{memory_tolerance:.0%})")
+    return failures, ratios
+
+
+def run_benchmarks(sizes: List[str], engine: str = 'simpy', repeat: int = 1,
+                   memory: bool = True) -> Dict:
+    """
+    Run the requested workloads.
+
+    Args:
+        sizes: Workload names (see WORKLOADS)
+        engine: Simulation engine ('simpy' or 'fast')
+        repeat: Timed runs per stage
+        memory: Measure peak memory per stage
+
+    Returns:
+        JSON-serializable results: format, engine, repeat, environment,
+        workloads, per-size stage results and the process's max RSS
+    """
+    results = {}
+    for size in sizes:
+        print(f"Running {size} workload ...", flush=True)
+        results[size] = run_workload(size, engine, repeat, memory)
+    return {"format": RESULTS_FORMAT, "engine": engine, "repeat": repeat,
+            "environment": environment(),
+            "workloads": {size: WORKLOADS[size] for size in sizes},
+            "results": results, "max_rss_mb": max_rss_mb()}
+
+
+def print_results(current: Dict, ratios: Dict = None):
+    """
+    Print a table of stage results, with the wall-time ratio to the baseline.
+
+    Args:
+        current: Results from run_benchmarks
+        ratios: (size, stage) -> current / baseline wall time
+    """
+    ratios = ratios or {}
+    print(f"{'workload':8s} {'stage':8s} {'work':>9s} {'wall s':>9s} "
+          f"{'per s':>11s} {'peak MB':>9s} {'vs base':>8s}")
+    for size, stages in current["results"].items():
+        for stage in STAGES:
+            r = stages[stage]
+            peak = "-" if r["peak_mb"] is None else f"{r['peak_mb']:.1f}"
+            ratio = ratios.get((size, stage))
+            versus = "-" if ratio is None else f"{ratio - 1:+.0%}"
+            print(f"{size:8s} {stage:8s} {r['work']:9d} {r['wall']:9.3f} "
+                  f"{r['rate']:11.1f} {peak:>9s} {versus:>8s}")
+
+
+def parse_arguments():
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='R-Day Simulation - benchmark simulate, save, render and stitch',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmark.py --save-baseline
+  python benchmark.py
+  python benchmark.py --sizes small medium large --repeat 3 --engine fast
+  python benchmark.py --baseline release_baseline.json --tolerance 0.1
+        """
+    )
+
+    parser.add_argument(
+        '--sizes',
+        nargs='+',
+        choices=list(WORKLOADS),
+        default=DEFAULT_SIZES,
+        help='Workloads to run (default: small medium)'
+    )
+
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        default='simpy',
+        help='Simulation engine (default: simpy)'
+    )
+
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Timed runs per stage; the fastest is reported (default: 3)'
+    )
+
+    parser.add_argument(
+        '--no-memory',
+        action='store_true',
+        help='Skip the tracemalloc run that measures peak memory'
+    )
+
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        default=DEFAULT_BASELINE,
+        help='Baseline results file (default: benchmark_baseline.json)'
+    )
+
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help='Store this run as the baseline instead of comparing with it'
+    )
+
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help='Allowed fractional wall-time growth per stage (default: 0.25)'
+    )
+
+    parser.add_argument(
+        '--memory-tolerance',
+        type=float,
+        default=DEFAULT_MEMORY_TOLERANCE,
+        help='Allowed fractional peak-memory growth per stage (default: 0.25)'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_arguments()
+    output_dir = os.path.join(_PACKAGE_DIR, "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    current = run_benchmarks(args.sizes, args.engine, args.repeat,
+                             memory=not args.no_memory)
+    results_file = os.path.join(output_dir, "benchmark_results.json")
+    with open(results_file, "w") as f:
+        json.dump(current, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print_results(current)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.isfile(args.baseline):
+        print_results(current)
+        print(f"No baseline at {args.baseline}; store one with --save-baseline")
+        print(f"Results saved to {results_file}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    mismatch = environment_mismatch(current["environment"],
+                                    baseline.get("environment", {}))
+    failures, ratios = compare(current, baseline, args.tolerance,
+                               args.memory_tolerance, wall=not mismatch)
+    print_results(current, ratios)
+    print(f"Results saved to {results_file}")
+    if mismatch:
+        print(f"Wall times not compared: the baseline was recorded on another "
+              f"machine ({'; '.join(mismatch)}). Re-record it here with "
+              f"--save-baseline to gate on wall time.")
+    if failures:
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        sys.exit(1)
+    print("PASSED")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,19 +5,98 @@ Created on Wed Oct 22 12:33:03 2025
 @author: paul.evangelista
 """
 
-import matplotlib.pyplot as plt
 import os
 import pandas as pd
-import sys
 import numpy as np
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+from typing import Dict
 
 from config import (
-    dir_setup
+    dir_setup, SIMULATION_START_TIME
 )
+from results_io import FORMATS, find_time_stamp, read_time_stamp
+from observers import SimulationObserver
+from routing import arc_column
+
+# 1. Queues shown on the dashboard (Label, station index)
+QUEUE_LAYOUT = [
+    ('Smart Card Issue', 0), #0
+    ('Ike 1 - Scan In', 1), #1
+    ('Ike 2 - Scan Out', 2), #2
+    ('Bus Movement', 3), #3
+    ('TH 2 Finance', 4), #4
+    ('TH 3 LRC Issue Point 1', 5), #5
+    ('TH 5 Med Screening 1', 6), #6
+    ('TH 6 Oath', 7), #7
+    ('TH 7a Med Screening 2', 8), #8
+    ('TH 8 S1 (DD93/SGLI)', 9), #9
+    ('TH 9 Company Holding', 10), #10
+    ('BH4f Female Issue Point 0', 14), #14
+    ('CA 2 Barber Shop', 13), #13
+    ('CA 1 Issue Point 2 (WB4)', 11), #11
+    ('LRC Issue Pt 6 (687)', 12), #12
+    ('CA 3 Red Sash', 15) #15
+]
+
+#Queue	Normalized Position [left, bottom, width, height]
+CUSTOM_POSITIONS = [
+    [0.01, 0.9, 0.15, 0.025],
+    [0.01, 0.75, 0.15, 0.025],
+    [0.01, 0.6, 0.15, 0.025],
+    [0.01, 0.45, 0.15, 0.025],
+    [0.3, 0.9, 0.15, 0.025],
+    [0.3, 0.75, 0.15, 0.025],
+    [0.3, 0.6, 0.15, 0.025],
+    [0.3, 0.45, 0.15, 0.025],
+    [0.3, 0.3, 0.15, 0.025],
+    [0.3, 0.15, 0.15, 0.025],
+    [0.3, 0, 0.15, 0.025],
+    [0.6, 0.9, 0.15, 0.025],
+    [0.9, 0.9, 0.15, 0.025],
+    [0.9, 0.75, 0.15, 0.025],
+    [0.9, 0.6, 0.15, 0.025],
+    [0.9, 0.45, 0.15, 0.025]
+]
+
+# Arrows [x, y, dx, dy, color, [label x, label y, (from station, to station)]]
+ARROW_POS = [
+    [0.09,0.89,0,-0.07,'green',[0.1, 0.85, (0, 1)]], #smart-card to Ike1
+    [0.09,0.74,0,-0.07,'green',[0.1, 0.7, (1, 2)]], #Ike1 to Ike2
+    [0.09,0.59,0,-0.07,'green',[0.1, 0.55, (2, 3)]], #Ike2 to bus
+    [0.38,0.89,0,-0.07,'green',[0.39, 0.85, (4, 5)]], #fin to LRC1
+    [0.38,0.74,0,-0.07,'green',[0.39, 0.7, (5, 6)]], #LRC1 to med
+    [0.38,0.59,0,-0.07,'green',[0.39, 0.55, (6, 7)]], #med to oath
+    [0.38,0.44,0,-0.07,'green',[0.39, 0.40, (7, 8)]], #oath to immun
+    [0.38,0.29,0,-0.07,'green',[0.39, 0.25, (8, 9)]], #immun to s1
+    [0.38,0.14,0,-0.07,'green',[0.39, 0.1, (9, 10)]], #s1 to company
+    [0.98,0.89,0,-0.07,'maroon',[0.99, 0.85, (13, 11)]], #barber to wb4
+    [0.98,0.74,0,-0.07,'green',[0.99, 0.7, (11, 12)]], #wb4 to 687
+    [0.98,0.59,0,-0.07,'maroon',[0.99, 0.55, (12, 15)]], #687 to red sash
+    [0.5,0.76,0.09,0.14,'blue',[0.50, 0.82, (5, 14)]], #LRC1 to preg
+    [0.83,0.89,0.04,-0.13,'blue',[0.82, 0.9, (14, 11)]], #preg to wb4
+    [0.86,0.61,-0.35,0,'blue',[0.66, 0.62, (12, 6)]], #687 to med
+    [0.5,0.05,0.37,0.85,'green',[0.62, 0.45, (10, 13)]], #company to barber
+    [0.88,0.89,0,-0.37,'blue',[0.89, 0.55, (13, 15)]], #barber to red sash
+    [0.22,0.49,0.09,0.4,'green',[0.21, 0.65, (3, 4)]], #bus to finance
+    [0.22,0.49,0.09,0.11,'red',[0.30, 0.56, (3, 6)]], #bus to med screening (USMAPS)
+    [0.46,0.625,0.4,0.275,'red',[0.53,0.65, (6, 13)]], #med to barber (USMAPS)
+    [0.86,0.61,-0.35,-0.15,'red',[0.63, 0.54, (12, 7)]], #687 to oath
+    [0.46,0.625,0.17,0.27,'red',[0.52,0.7,(6, 14)]], #med to preg
+    [0.27,0.15,0,0.77,'red',[0.23, 0.4, (9, 4)]], #s1 to finance
+    [0.29,0.77,0,-0.75,'red',[0.3, 0.4, (5, 10)]], #LRC1 to company holding
+    [0.5,0.05,0.37,0.45,'red',[0.6, 0.15, (10, 15)]] #company to red sash (USMAPS)
+]
+
+# Arrow whose presence switches on the USMAPS (red) legend entry
+USMAPS_ARC = (3, 6)
+
+# zlib level for frame PNGs (1 favours speed over file size)
+PNG_COMPRESS_LEVEL = 1
 
-OUTPUT_DIR_STR = dir_setup()
-os.chdir(OUTPUT_DIR_STR)
 
 def parse_arguments():
     parser = argparse.ArgumentParser(
@@ -25,20 +104,46 @@ def parse_arguments():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
-  python stitch_images.py --mins 6
+  python build_images.py --mins 6
+  python build_images.py --mins 1 --video
         """
-    )    
+    )
     parser.add_argument(
         '--mins',
         type=int,
         default=60,
         help='R-Day minutes between each frame in 30-second video'
     )
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=['auto'] + FORMATS,
+        default='auto',
+        help='File format of df_time_stamp (default: auto-detect latest)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes rendering frames in parallel (default: 1)'
+    )
+    parser.add_argument(
+        '--video',
+        action='store_true',
+        help='Stream frames straight into the mp4 instead of writing PNGs'
+    )
+    parser.add_argument(
+        '--png',
+        action='store_true',
+        help='With --video, also write each frame as <HHMM>Rday.png'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always render, bypassing the cache of frames for unchanged event logs'
+    )
     return parser.parse_args()
 
-args = parse_arguments()
-R_Day_mins_per_frame = args.mins
-
 # Color function based on fullness percentage
 def get_color(in_q):
     if(in_q == None):
@@ -50,143 +155,134 @@ def get_color(in_q):
     else:
         return '#4CAF50'  # Green for below 25
 
-with open("recent_run.txt", "r") as file:
-    path_descr = file.read()
-
-df_time_stamp = pd.read_csv("df_time_stamp.csv")
-
-queue_dic = {}
-svc_dic = {}
-cap_dic = {}
-arc_ct = {}
-svc_ct = {}
-
-last_time = 0
-for i in range(0,df_time_stamp.shape[0]):
-    stn_idx = df_time_stamp['stn_idx'].iloc[i]
-    next_stn = df_time_stamp['next_stn'].iloc[i]
-    t = df_time_stamp['time'].iloc[i]
-    queue_dic[stn_idx] = df_time_stamp['q_length'].iloc[i]
-    svc_dic[stn_idx] = df_time_stamp['svc_count_after'].iloc[i]
-    cap_dic[stn_idx] = df_time_stamp['svc_capacity'].iloc[i]
-    arc_key = str(stn_idx) + "," + str(next_stn)
-    if(arc_ct.get(arc_key) == None):
-        arc_ct[arc_key] = 1
-    else:
-        arc_ct[arc_key] = arc_ct[arc_key] + 1
-    if(svc_ct.get(stn_idx) == None):
-        svc_ct[stn_idx] = 1
+def compute_frame_states(df_time_stamp: pd.DataFrame, mins_per_frame: float) -> Dict:
+    """
+    Station state at every frame boundary, computed without a row loop.
+
+    Frames are taken every mins_per_frame simulated minutes of service-start
+    time, plus a final frame once every visit has been logged. A frame
+    includes every visit that started at or before the frame time.
+
+    Args:
+        df_time_stamp: Event log (df_time_stamp schema)
+        mins_per_frame: Simulated minutes between frames
+
+    Returns:
+        Dictionary of per-frame arrays: 'time' (F,) clock time in hours
+        after SIMULATION_START_TIME; 'queue', 'in_svc', 'cap' and 'done'
+        (F, stations) with the last logged queue length, busy servers,
+        capacity and cumulative visits per station; 'arc'
+        (F, stations, stations + 1) cumulative arc counts (last column: exit)
+    """
+    stn_idx = df_time_stamp['stn_idx'].to_numpy()
+    next_stn = df_time_stamp['next_stn'].to_numpy()
+    finish = df_time_stamp['time'].to_numpy()
+    if 'start_time' in df_time_stamp.columns:
+        start = df_time_stamp['start_time'].to_numpy()
     else:
-        svc_ct[stn_idx] = svc_ct[stn_idx] + 1
-    time_value = df_time_stamp['time'].iloc[i]
-    time_diff = time_value - last_time
-    if(time_diff > R_Day_mins_per_frame/60 or i == (df_time_stamp.shape[0]-1)):
-        #sys.exit()
-        last_time = time_value
-
-        # 1. Define data for multiple queues (Label, queue, in_svc)
-        queue_data = [
-            ('Smart Card Issue', queue_dic.get(0), svc_dic.get(0), cap_dic.get(0),0), #0
-            ('Ike 1 - Scan In', queue_dic.get(1), svc_dic.get(1), cap_dic.get(1),1), #1
-            ('Ike 2 - Scan Out', queue_dic.get(2), svc_dic.get(2), cap_dic.get(2),2), #2
-            ('Bus Movement', queue_dic.get(3), svc_dic.get(3), cap_dic.get(3),3), #3
-            ('TH 2 Finance', queue_dic.get(4), svc_dic.get(4), cap_dic.get(4),4), #4
-            ('TH 3 LRC Issue Point 1', queue_dic.get(5), svc_dic.get(5), cap_dic.get(5),5), #5
-            ('TH 5 Med Screening 1', queue_dic.get(6), svc_dic.get(6), cap_dic.get(6),6), #6
-            ('TH 6 Oath', queue_dic.get(7), svc_dic.get(7), cap_dic.get(7),7), #7
-            ('TH 7a Med Screening 2', queue_dic.get(8), svc_dic.get(8), cap_dic.get(8),8), #8
-            ('TH 8 S1 (DD93/SGLI)', queue_dic.get(9), svc_dic.get(9), cap_dic.get(9),9), #9
-            ('TH 9 Company Holding', queue_dic.get(10), svc_dic.get(10), cap_dic.get(10),10), #10
-            ('BH4f Female Issue Point 0', queue_dic.get(14), svc_dic.get(14), cap_dic.get(14),14), #14
-            ('CA 2 Barber Shop', queue_dic.get(13), svc_dic.get(13), cap_dic.get(13),13), #13
-            ('CA 1 Issue Point 2 (WB4)', queue_dic.get(11), svc_dic.get(11), cap_dic.get(11),11), #11
-            ('LRC Issue Pt 6 (687)', queue_dic.get(12), svc_dic.get(12), cap_dic.get(12),12), #12
-            ('CA 3 Red Sash', queue_dic.get(15), svc_dic.get(15), cap_dic.get(15),15) #15
-        ]
-        
-        #Queue	Normalized Position [left, bottom, width, height]
-        
-        custom_positions = [
-        [0.01, 0.9, 0.15, 0.025],
-        [0.01, 0.75, 0.15, 0.025],
-        [0.01, 0.6, 0.15, 0.025],
-        [0.01, 0.45, 0.15, 0.025],
-        [0.3, 0.9, 0.15, 0.025],
-        [0.3, 0.75, 0.15, 0.025],
-        [0.3, 0.6, 0.15, 0.025],
-        [0.3, 0.45, 0.15, 0.025],
-        [0.3, 0.3, 0.15, 0.025],
-        [0.3, 0.15, 0.15, 0.025],
-        [0.3, 0, 0.15, 0.025],
-        [0.6, 0.9, 0.15, 0.025],
-        [0.9, 0.9, 0.15, 0.025],
-        [0.9, 0.75, 0.15, 0.025],
-        [0.9, 0.6, 0.15, 0.025],
-        [0.9, 0.45, 0.15, 0.025]
-            ]
-        
-        arrow_pos = [
-        [0.09,0.89,0,-0.07,'green',[0.1, 0.85, arc_ct.get("0,1")]], #smart-card to Ike1
-        [0.09,0.74,0,-0.07,'green',[0.1, 0.7, arc_ct.get("1,2")]], #Ike1 to Ike2
-        [0.09,0.59,0,-0.07,'green',[0.1, 0.55, arc_ct.get("2,3")]], #Ike2 to bus
-        [0.38,0.89,0,-0.07,'green',[0.39, 0.85, arc_ct.get("4,5")]], #fin to LRC1
-        [0.38,0.74,0,-0.07,'green',[0.39, 0.7, arc_ct.get("5,6")]], #LRC1 to med
-        [0.38,0.59,0,-0.07,'green',[0.39, 0.55, arc_ct.get("6,7")]], #med to oath
-        [0.38,0.44,0,-0.07,'green',[0.39, 0.40, arc_ct.get("7,8")]], #oath to immun
-        [0.38,0.29,0,-0.07,'green',[0.39, 0.25, arc_ct.get("8,9")]], #immun to s1
-        [0.38,0.14,0,-0.07,'green',[0.39, 0.1, arc_ct.get("9,10")]], #s1 to company
-        [0.98,0.89,0,-0.07,'maroon',[0.99, 0.85, arc_ct.get("13,11")]], #barber to wb4
-        [0.98,0.74,0,-0.07,'green',[0.99, 0.7, arc_ct.get("11,12")]], #wb4 to 687
-        [0.98,0.59,0,-0.07,'maroon',[0.99, 0.55, arc_ct.get("12,15")]], #687 to red sash
-        [0.5,0.76,0.09,0.14,'blue',[0.50, 0.82, arc_ct.get("5,14")]], #LRC1 to preg
-        [0.83,0.89,0.04,-0.13,'blue',[0.82, 0.9, arc_ct.get("14,11")]], #preg to wb4
-        [0.86,0.61,-0.35,0,'blue',[0.66, 0.62, arc_ct.get("12,6")]], #687 to med
-        [0.5,0.05,0.37,0.85,'green',[0.62, 0.45, arc_ct.get("10,13")]], #company to barber
-        [0.88,0.89,0,-0.37,'blue',[0.89, 0.55, arc_ct.get("13,15")]], #barber to red sash
-        [0.22,0.49,0.09,0.4,'green',[0.21, 0.65, arc_ct.get("3,4")]], #bus to finance
-        [0.22,0.49,0.09,0.11,'red',[0.30, 0.56, arc_ct.get("3,6")]], #bus to med screening (USMAPS)
-        [0.46,0.625,0.4,0.275,'red',[0.53,0.65, arc_ct.get("6,13")]], #med to barber (USMAPS)
-        [0.86,0.61,-0.35,-0.15,'red',[0.63, 0.54, arc_ct.get("12,7")]], #687 to oath
-        [0.46,0.625,0.17,0.27,'red',[0.52,0.7,arc_ct.get("6,14")]], #med to preg
-        [0.27,0.15,0,0.77,'red',[0.23, 0.4, arc_ct.get("9,4")]], #s1 to finance
-        [0.29,0.77,0,-0.75,'red',[0.3, 0.4, arc_ct.get("5,10")]], #LRC1 to company holding
-        [0.5,0.05,0.37,0.45,'red',[0.6, 0.15, arc_ct.get("10,15")]] #company to red sash (USMAPS)
-        ]
-        
-        awidth=0.0025           # Thickness of the arrow shaft
-        ahead_width=0.01        # Width of the arrow head
-        ahead_length=0.01        # Length of the arrow head
-        acolor='blue'
-        alength_includes_head=True
-        
-        fig = plt.figure(figsize=(10,8))
-        
+        # Logs written before start_time was recorded: the running maximum
+        # of finish times is the closest monotone clock available
+        start = np.maximum.accumulate(finish)
+    row_ct = len(stn_idx)
+    station_ct = int(stn_idx.max()) + 1 if row_ct else 0
+
+    # Frame times on a fixed grid, plus a final frame holding every visit
+    step = mins_per_frame / 60
+    last_start = start[-1] if row_ct else 0.0
+    frame_time = np.arange(step, last_start, step)
+    row_end = np.searchsorted(start, frame_time, side='right')
+    frame_time = np.append(frame_time, finish[-1] if row_ct else 0.0)
+    row_end = np.append(row_end, row_ct)
+    frame_ct = len(frame_time)
+
+    # Group rows by station (row order kept within each station)
+    q_length = df_time_stamp['q_length'].to_numpy()
+    svc_after = df_time_stamp['svc_count_after'].to_numpy()
+    svc_capacity = df_time_stamp['svc_capacity'].to_numpy()
+    order = np.argsort(stn_idx, kind='stable')
+    bounds = np.searchsorted(stn_idx[order], np.arange(station_ct + 1))
+
+    queue = np.zeros((frame_ct, station_ct), dtype=np.int64)
+    in_svc = np.zeros((frame_ct, station_ct), dtype=np.int64)
+    cap = np.zeros((frame_ct, station_ct), dtype=np.int64)
+    done = np.zeros((frame_ct, station_ct), dtype=np.int64)
+    for s in range(station_ct):
+        rows = order[bounds[s]:bounds[s + 1]]
+        if len(rows) == 0:
+            continue
+        count = np.searchsorted(rows, row_end, side='left')
+        seen = count > 0
+        last_row = rows[np.maximum(count - 1, 0)]
+        done[:, s] = count
+        queue[:, s] = np.where(seen, q_length[last_row], 0)
+        in_svc[:, s] = np.where(seen, svc_after[last_row], 0)
+        cap[:, s] = svc_capacity[rows[0]]
+
+    # Cumulative arc counts, grouped the same way by flat arc matrix code
+    arc_code = stn_idx.astype(np.int64) * (station_ct + 1) + arc_column(
+        next_stn, station_ct)
+    arc_order = np.argsort(arc_code, kind='stable')
+    arc_codes, arc_first = np.unique(arc_code[arc_order], return_index=True)
+    arc_bounds = np.append(arc_first, row_ct)
+    arc = np.zeros((frame_ct, station_ct * (station_ct + 1)), dtype=np.int64)
+    for k, code in enumerate(arc_codes):
+        rows = arc_order[arc_bounds[k]:arc_bounds[k + 1]]
+        arc[:, code] = np.searchsorted(rows, row_end, side='left')
+    arc = arc.reshape(frame_ct, station_ct, station_ct + 1)
+
+    return {"time": frame_time, "queue": queue, "in_svc": in_svc,
+            "cap": cap, "done": done, "arc": arc}
+
+def format_clock(time_value):
+    """Return (hour, minute) strings of a simulated time given in hours after 05:30."""
+    time_value = time_value + SIMULATION_START_TIME
+    time_value_min = str(int(round((time_value - np.trunc(time_value))*60,0)))
+    if(time_value_min == "60"):
+        time_value_min = "00"
+        time_value = time_value + 1
+    time_value_hr = str(int(np.trunc(time_value)))
+    if(len(time_value_min) == 1):
+        time_value_min = "0" + time_value_min
+    if(len(time_value_hr) == 1):
+        time_value_hr = "0" + time_value_hr
+    return time_value_hr, time_value_min
+
+class FrameRenderer:
+    """
+    Dashboard figure whose static layout is built once and reused per frame.
+
+    Axes, labels, arrows, legend and disclaimer text are drawn a single time
+    into a cached background. Each frame only restores that background,
+    updates the bars, counts, arrows and clock through set_* calls and
+    blits them onto the same Agg canvas, so render time stays low and memory
+    stays flat for long videos.
+    """
+
+    def __init__(self, path_descr, dpi=300):
+        self.dpi = dpi
+        self.fig = Figure(figsize=(10,8), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        fig = self.fig
+
         # Set a main title for the figure
-        fig_title = 'Simulating New Cadet In-processing on R-Day 2026 (' + path_descr + ')'  
-        fig.suptitle(fig_title, fontsize=16, y=1.02)
-        
-        # 3. Loop through data and axes to create each chart
-        # Loop through data and custom positions
-        for (label, in_q, in_svc, cap, idx), rect in zip(queue_data, custom_positions):
-            # 'rect' is a list like [0.1, 0.7, 0.4, 0.15]
-            if(in_q == None):
-                in_q = 0
-            if(in_svc == None):
-                in_svc = 0
-            ax = fig.add_axes(rect) 
-            # ... plotting code goes here
-            color = get_color(in_q)
-        
-            # Plot the "full" part
-            ax.barh(y=[0.5], width=[in_q], height=0.6, color=color, align='center')
-        
-            # Plot the "empty" part on top for visual clarity of the boundary
-            empty_size = 100 - in_q
-            ax.barh(y=[0.5], width=[empty_size], left=[in_q], height=0.6, color='#E0E0E0', align='center')
-        
+        fig_title = 'Simulating New Cadet In-processing on R-Day 2026 (' + path_descr + ')'
+        self.suptitle = fig.suptitle(fig_title, fontsize=16, y=1.02)
+
+        # One bar chart per queue, at its custom position
+        self.bar_axes = []
+        self.full_bars = []
+        self.empty_bars = []
+        self.titles = []
+        self.bar_texts = []
+        for (label, idx), rect in zip(QUEUE_LAYOUT, CUSTOM_POSITIONS):
+            ax = fig.add_axes(rect)
+            # Plot the "full" part, then the "empty" part on top for visual clarity of the boundary
+            full = ax.barh(y=[0.5], width=[0], height=0.6, color=get_color(0), align='center')[0]
+            empty = ax.barh(y=[0.5], width=[100], left=[0], height=0.6, color='#E0E0E0', align='center')[0]
+
             # Set the x-axis limit from 0 to the total capacity
             ax.set_xlim(0, 100)
-        
+
             # Clean up the chart (remove axis lines/ticks)
             ax.set_yticks([])
             ax.spines['left'].set_visible(False)
@@ -194,59 +290,50 @@ for i in range(0,df_time_stamp.shape[0]):
             ax.spines['top'].set_visible(False)
             ax.spines['bottom'].set_visible(False)
             ax.set_xticks([])
-        
-            # Add the queue label (title)
-            lab2 = label + "\n" + str(svc_ct.get(idx)) + " done"
-            ax.set_title(lab2, fontsize=12, loc='left', pad=3)
-        
-            # Add a text label showing the percentage/value on the right
-            #bar_text = "\nq: " + str(in_q) + "\n" + "s: " + str(in_svc) + "\n" + "c: " + str(cap)
-            bar_text = "\nq: " + str(in_q) + "\n" + "s: " + str(in_svc) + "/" + str(cap)
-            ax.text(100 * 1.05, 0.5, bar_text,
-                    va='center', ha='left', fontsize=11, color='black')
-        
-        # Adjust layout to prevent overlap and accommodate external text
-        ax = fig.add_axes([0,0,1,1]) 
-        
-        time_value = time_value + 5.5
-        time_value_min = str(int(round((time_value - np.trunc(time_value))*60,0)))
-        if(time_value_min == "60"):
-            time_value_min = "00"
-            time_value = time_value + 1
-        time_value_hr = str(int(np.trunc(time_value)))
-        if(len(time_value_min) == 1):
-            time_value_min = "0" + time_value_min
-        if(len(time_value_hr) == 1):
-            time_value_hr = "0" + time_value_hr
-        
-        time_text = "Time: " + time_value_hr + ":" + time_value_min
-        ax.text(0.7, 0.05, time_text, fontsize = 14)
-        
+
+            # Queue label (title) and the value text on the right; widest
+            # expected content is used while the layout is measured
+            title = ax.set_title(label + "\n0000 done", fontsize=12, loc='left', pad=3)
+            bar_text = ax.text(100 * 1.05, 0.5, "\nq: 0000\ns: 0000/0000",
+                               va='center', ha='left', fontsize=11, color='black')
+
+            self.bar_axes.append(ax)
+            self.full_bars.append(full)
+            self.empty_bars.append(empty)
+            self.titles.append((title, label))
+            self.bar_texts.append(bar_text)
+
+        # Full-figure overlay for the clock, legend, notes and arrows
+        ax = fig.add_axes([0,0,1,1])
+        self.overlay = ax
+        self.clock = ax.text(0.7, 0.05, "Time: 00:00", fontsize = 14)
+
         note_text = "Green "
         ax.text(0.7, 0.4, note_text, fontsize = 14, color = 'green', verticalalignment='top')
         note_text = "           text represents movement of all New        \nCadets." #11 spaces
         ax.text(0.7, 0.4, note_text, fontsize = 14, color = 'black', verticalalignment='top')
-        
+
         note_text = "Blue "
         ax.text(0.7, 0.33, note_text, fontsize = 14, color = 'blue', verticalalignment='top')
         note_text = "        text represents movement of female only\nNew Cadets." #11 spaces
         ax.text(0.7, 0.33, note_text, fontsize = 14, color = 'black', verticalalignment='top')
-        
+
         note_text = "Maroon "
         ax.text(0.7, 0.26, note_text, fontsize = 14, color = 'maroon', verticalalignment='top')
         note_text = "             text represents movement of male only\nNew Cadets." #11 spaces
         ax.text(0.7, 0.26, note_text, fontsize = 14, color = 'black', verticalalignment='top')
-        
-        if(arrow_pos[18][5][2] != None):
-            note_text = "Red "
-            ax.text(0.7, 0.19, note_text, fontsize = 14, color = 'red', verticalalignment='top')
-            note_text = "       text represents movement of USMAPS\nNew Cadets." #11 spaces
-            ax.text(0.7, 0.19, note_text, fontsize = 14, color = 'black', verticalalignment='top')
-        
+
+        # USMAPS legend entry, only shown once USMAPS cadets are moving
+        note_text = "Red "
+        usmaps_label = ax.text(0.7, 0.19, note_text, fontsize = 14, color = 'red', verticalalignment='top')
+        note_text = "       text represents movement of USMAPS\nNew Cadets." #11 spaces
+        usmaps_text = ax.text(0.7, 0.19, note_text, fontsize = 14, color = 'black', verticalalignment='top')
+        self.usmaps_legend = [usmaps_label, usmaps_text]
+
         note_text = "This is a simulated representation\nof a hypothetical R-Day for West Point\nin 2026. The process depicted in this\nsimulation does not represent official\npolicies or plans."
         note_text2 = " This simulation is\nintended solely for academic purposes."
         ax.text(0.001, 0.35, (note_text + note_text2), fontsize = 10, color = 'black', verticalalignment='top')
-        
+
         note_text = \
         "Each bar reflects the length of the\
         \nqueue as a color, from a min of\
@@ -256,28 +343,242 @@ for i in range(0,df_time_stamp.shape[0]):
         \nThe number of entities with the\
         \nserver and the capacity of the server\
         \nare shown after \"s:\", respectively."
-        
+
         ax.text(0.001, 0.2, (note_text), fontsize = 10, color = 'black', verticalalignment='top')
-        
+
         ax.set_axis_off()
-        #plt.tight_layout(rect=[0, 0, 1, 0.98])
-        #plt.arrow(0.2,0.8,0,0.1)
-        # [0.46,0.625,0.4,0.275,'red',[0.53,0.65, arc_ct.get("6,13"), 'red']], #med to barber (USMAPS)
-        for a in arrow_pos:
-            if(a[5][2] != None):
-                plt.arrow(a[0],a[1],a[2],a[3],width=awidth,
-                          head_width = ahead_width,
-                          head_length = ahead_length,
-                          color = a[4],length_includes_head = alength_includes_head)
-                ax.text(a[5][0], a[5][1], a[5][2], fontsize=12, color = a[4])
-        plt.xlim(0, 1)
-        plt.ylim(0, 1)
-        #plt.savefig('multiple_capacity_charts.png')
-        fname = time_value_hr + time_value_min + "Rday.png"
-        #plt.tight_layout()
-        plt.savefig(fname, dpi=300, bbox_inches='tight')
-        #fig.set_size_inches(16, 12)
-        #plt.savefig(fname, dpi=300)
-        #plt.show()
-        
-        
+        awidth=0.0025           # Thickness of the arrow shaft
+        ahead_width=0.01        # Width of the arrow head
+        ahead_length=0.01        # Length of the arrow head
+        alength_includes_head=True
+        self.arrows = []
+        for a in ARROW_POS:
+            arrow = ax.arrow(a[0],a[1],a[2],a[3],width=awidth,
+                             head_width = ahead_width,
+                             head_length = ahead_length,
+                             color = a[4],length_includes_head = alength_includes_head)
+            arrow_text = ax.text(a[5][0], a[5][1], "0000", fontsize=12, color = a[4])
+            self.arrows.append((a[5][2], arrow, arrow_text))
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+
+        self._fit_to_content()
+
+        # Everything that changes per frame is excluded from the background
+        self.dynamic_artists = []
+        for ax, full, empty, (title, _), bar_text in zip(
+                self.bar_axes, self.full_bars, self.empty_bars, self.titles, self.bar_texts):
+            self.dynamic_artists += [(ax, full), (ax, empty), (ax, title), (ax, bar_text)]
+        self.dynamic_artists += [(self.overlay, self.clock)]
+        self.dynamic_artists += [(self.overlay, a) for a in self.usmaps_legend]
+        for _, arrow, arrow_text in self.arrows:
+            self.dynamic_artists += [(self.overlay, arrow), (self.overlay, arrow_text)]
+        for _, artist in self.dynamic_artists:
+            artist.set_animated(True)
+
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _fit_to_content(self, pad_inches=0.1):
+        """Resize the figure to its tight bounding box, like savefig(bbox_inches='tight') once."""
+        self.canvas.draw()
+        bbox = self.fig.get_tightbbox(self.canvas.get_renderer()).padded(pad_inches)
+        width, height = self.fig.get_size_inches()
+        new_width, new_height = bbox.width, bbox.height
+
+        for ax in self.fig.axes:
+            left, bottom, w, h = ax.get_position().bounds
+            ax.set_position([(left * width - bbox.x0) / new_width,
+                             (bottom * height - bbox.y0) / new_height,
+                             w * width / new_width,
+                             h * height / new_height])
+        x, y = self.suptitle.get_position()
+        self.suptitle.set_position(((x * width - bbox.x0) / new_width,
+                                    (y * height - bbox.y0) / new_height))
+        self.fig.set_size_inches(new_width, new_height)
+
+    def render(self, states, k):
+        """
+        Blit frame k of the per-frame state table onto the canvas.
+
+        Returns:
+            (RGBA pixel buffer of the canvas, HHMM file stem of the frame)
+        """
+        for i, (label, idx) in enumerate(QUEUE_LAYOUT):
+            in_q = int(states["queue"][k, idx])
+            in_svc = int(states["in_svc"][k, idx])
+            cap = int(states["cap"][k, idx])
+            self.full_bars[i].set_width(in_q)
+            self.full_bars[i].set_color(get_color(in_q))
+            self.empty_bars[i].set_x(in_q)
+            self.empty_bars[i].set_width(100 - in_q)
+            title, label = self.titles[i]
+            title.set_text(label + "\n" + str(int(states["done"][k, idx])) + " done")
+            self.bar_texts[i].set_text("\nq: " + str(in_q) + "\n" + "s: " + str(in_svc) + "/" + str(cap))
+
+        time_value_hr, time_value_min = format_clock(states["time"][k])
+        self.clock.set_text("Time: " + time_value_hr + ":" + time_value_min)
+
+        arc = states["arc"][k]
+        usmaps_visible = bool(arc[USMAPS_ARC] > 0)
+        for artist in self.usmaps_legend:
+            artist.set_visible(usmaps_visible)
+
+        for arc_key, arrow, arrow_text in self.arrows:
+            count = int(arc[arc_key])
+            visible = count > 0
+            arrow.set_visible(visible)
+            arrow_text.set_visible(visible)
+            if visible:
+                arrow_text.set_text(str(count))
+
+        self.canvas.restore_region(self.background)
+        for ax, artist in self.dynamic_artists:
+            ax.draw_artist(artist)
+        return np.asarray(self.canvas.buffer_rgba()), time_value_hr + time_value_min
+
+    def write_png(self, buf, stem, output_dir='.'):
+        """Write a rendered canvas buffer as <stem>Rday.png in output_dir."""
+        fname = os.path.join(output_dir, stem + "Rday.png")
+        Image.fromarray(buf[:, :, :3]).save(fname, dpi=(self.dpi, self.dpi),
+                                            compress_level=PNG_COMPRESS_LEVEL)
+        return fname
+
+    def save_frame(self, states, k, output_dir='.'):
+        """Render frame k and save it as <HHMM>Rday.png in output_dir."""
+        buf, stem = self.render(states, k)
+        return self.write_png(buf, stem, output_dir)
+
+class FrameRenderObserver(SimulationObserver):
+    """
+    Renders a dashboard frame at every state sample while the simulation runs,
+    so frames can be produced without keeping the event log, e.g.
+    sim.add_observer(FrameRenderObserver('std rand', out_dir), interval=1/60).
+    """
+
+    def __init__(self, path_descr, output_dir='.'):
+        self.renderer = FrameRenderer(path_descr)
+        self.output_dir = output_dir
+        self.files = []
+
+    def on_sample(self, sim, time, queue, in_service, throughput):
+        states = {
+            "time": np.array([time]),
+            "queue": np.array([queue]),
+            "in_svc": np.array([in_service]),
+            "cap": np.array([[r.capacity for r in sim.resource_list]]),
+            "done": np.array([throughput]),
+            "arc": sim.arc_ct[np.newaxis],
+        }
+        self.files.append(self.renderer.save_frame(states, 0, self.output_dir))
+
+def iter_video_frames(states, path_descr, output_dir='.', save_pngs=False):
+    """
+    Yield every frame as an RGB array straight from the canvas buffer.
+
+    Args:
+        states: Per-frame state table from compute_frame_states
+        path_descr: Run description shown in the title
+        output_dir: Directory for the optional PNG side output
+        save_pngs: Also write each frame as <HHMM>Rday.png
+    """
+    renderer = FrameRenderer(path_descr)
+    for k in range(len(states["time"])):
+        buf, stem = renderer.render(states, k)
+        if save_pngs:
+            renderer.write_png(buf, stem, output_dir)
+        # The canvas buffer is overwritten by the next frame, so hand out a copy
+        yield np.array(buf[:, :, :3])
+
+def render_frame_range(task):
+    """
+    Worker entry point: render a contiguous range of frames with its own figure.
+
+    Args:
+        task: Tuple of (states, first frame, end frame, path_descr, output_dir)
+
+    Returns:
+        List of written file names, in frame order
+    """
+    states, first, end, path_descr, output_dir = task
+    renderer = FrameRenderer(path_descr)
+    return [renderer.save_frame(states, k, output_dir) for k in range(first, end)]
+
+def render_frames(states, path_descr, output_dir='.', workers=1):
+    """
+    Render every frame, partitioned into contiguous ranges across a process pool.
+
+    Frame names are derived from the frame clock, so the files (and the
+    order stitch_images.py puts them in) do not depend on the worker count.
+
+    Returns:
+        List of written file names, in frame order
+    """
+    frame_ct = len(states["time"])
+    workers = max(1, min(workers, frame_ct))
+    if workers == 1:
+        return render_frame_range((states, 0, frame_ct, path_descr, output_dir))
+
+    bounds = np.linspace(0, frame_ct, workers + 1).astype(int)
+    tasks = [(states, bounds[w], bounds[w + 1], path_descr, output_dir)
+             for w in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [fname for names in executor.map(render_frame_range, tasks)
+                for fname in names]
+
+def frame_file_names(states, output_dir='.'):
+    """
+    File names render_frames writes for a per-frame state table, in frame order.
+
+    Frames that fall on the same clock minute share a file, so each name is
+    listed once.
+    """
+    stems = ("".join(format_clock(t)) for t in states["time"])
+    return list(dict.fromkeys(os.path.join(output_dir, stem + "Rday.png")
+                              for stem in stems))
+
+def main():
+    args = parse_arguments()
+
+    OUTPUT_DIR_STR = dir_setup()
+    os.chdir(OUTPUT_DIR_STR)
+
+    with open("recent_run.txt", "r") as file:
+        path_descr = file.read()
+
+    # Frames of an unchanged event log come from the cache
+    log_file = find_time_stamp(OUTPUT_DIR_STR, args.format)
+    cache = None
+    if not args.no_cache:
+        from result_cache import ResultCache, FRAME_SOURCES, file_digest
+        cache = ResultCache()
+        cache_key = cache.key("frames", {"log": file_digest(log_file), "mins": args.mins,
+                                         "path_descr": path_descr, "video": args.video,
+                                         "png": args.png}, sources=FRAME_SOURCES)
+        entry = cache.lookup(cache_key)
+        if entry is not None:
+            files = cache.restore(entry, OUTPUT_DIR_STR)
+            print(f"Restored {len(files)} file(s) from cache")
+            return
+
+    df_time_stamp = read_time_stamp(log_file)
+    states = compute_frame_states(df_time_stamp, args.mins)
+
+    if args.video:
+        from stitch_images import VIDEO_SECONDS, frames_to_video_opencv, video_file_path
+        frames = iter_video_frames(states, path_descr, OUTPUT_DIR_STR, save_pngs=args.png)
+        fps_rate = len(states["time"])/VIDEO_SECONDS
+        video_file = video_file_path(OUTPUT_DIR_STR, path_descr)
+        frames_to_video_opencv(frames, video_file, fps=fps_rate)
+        files = [video_file] + (frame_file_names(states, OUTPUT_DIR_STR) if args.png else [])
+    else:
+        render_frames(states, path_descr, OUTPUT_DIR_STR, workers=args.workers)
+        files = frame_file_names(states, OUTPUT_DIR_STR)
+
+    if cache is not None:
+        cache.store(cache_key, files, {"kind": "frames",
+                                       "label": f"{path_descr} every {args.mins} min"
+                                                f"{' video' if args.video else ''}"})
+
+if __name__ == "__main__":
+    main()
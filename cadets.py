@@ -0,0 +1,238 @@
+"""
+Struct-of-arrays cadet table for the R-Day simulation.
+
+Cadet ids are dense (1..cadet count), so every per-cadet attribute is one
+NumPy column indexed directly by cadet id (row 0 is unused). The whole
+cohort - sex, USMAPS flag, routing class and arrival schedule - is generated
+in bulk before the run; the simulation only fills in the current station and
+completion time as cadets move through R-Day, which makes per-cadet cycle
+times available without joining the event log. A Cohort sets the intake
+size and composition, including multi-day runs where each day's cadets
+start arriving DAY_LENGTH hours after the previous day's.
+"""
+
+import numpy as np
+from typing import TYPE_CHECKING
+
+from config import (
+    TOTAL_CUSTOMERS, USMAPS_COUNT_MAX, USMAPS_PROBABILITY,
+    FEMALE_COUNT_MAX, CUSTOMER_BATCH_SIZE, DAY_LENGTH
+)
+from routing import cadet_class, CLASS_NAMES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Current-station value of cadets that have not arrived yet
+NOT_ARRIVED = -1
+
+
+class Cohort:
+    """
+    Size and composition of the intake.
+
+    The defaults reproduce config.py: one day of TOTAL_CUSTOMERS - 1 cadets
+    in blocks of CUSTOMER_BATCH_SIZE. Every day repeats the same rules, and
+    the bus and oath release their last partial batch of a day once all of
+    that day's cadets have reached them.
+
+    Attributes:
+        cadets_per_day: Cadets arriving each day
+        days: Number of consecutive days
+        block_size: Cadets per arrival block (CUSTOMER_BATCH_SIZE)
+        female_max: Female cadets per block at most (FEMALE_COUNT_MAX,
+            scaled with block_size when not given)
+        usmaps_max: USMAPS cadets per day at most (USMAPS_COUNT_MAX, scaled
+            with cadets_per_day when not given)
+    """
+
+    def __init__(self, cadets_per_day: int = TOTAL_CUSTOMERS - 1, days: int = 1,
+                 block_size: int = CUSTOMER_BATCH_SIZE,
+                 female_max: int = None, usmaps_max: int = None):
+        if cadets_per_day < 1 or days < 1 or block_size < 1:
+            raise ValueError("cadets_per_day, days and block_size must be positive")
+        if female_max is None:
+            female_max = round(FEMALE_COUNT_MAX * block_size / CUSTOMER_BATCH_SIZE)
+        if usmaps_max is None:
+            usmaps_max = round(USMAPS_COUNT_MAX * cadets_per_day / (TOTAL_CUSTOMERS - 1))
+        self.cadets_per_day = cadets_per_day
+        self.days = days
+        self.block_size = block_size
+        self.female_max = female_max
+        self.usmaps_max = usmaps_max
+
+    @property
+    def cadet_ct(self) -> int:
+        """Total number of cadets over all days."""
+        return self.cadets_per_day * self.days
+
+    def release_count(self, cadet_id: int) -> int:
+        """
+        Cadets arriving up to the end of a cadet's day (the arc count at
+        which the bus and oath release their last partial batch that day).
+
+        Args:
+            cadet_id: Cadet identifier
+
+        Returns:
+            Cumulative cadet count
+        """
+        return ((cadet_id - 1) // self.cadets_per_day + 1) * self.cadets_per_day
+
+    def __repr__(self) -> str:
+        return (f"Cohort(cadets_per_day={self.cadets_per_day}, days={self.days}, "
+                f"block_size={self.block_size}, female_max={self.female_max}, "
+                f"usmaps_max={self.usmaps_max})")
+
+
+class CadetTable:
+    """
+    Per-cadet attributes stored as NumPy columns indexed by cadet id.
+
+    Attributes:
+        sex: 1 for male, 0 for female cadets
+        usmaps: 1 for USMAPS cadets, else 0
+        cls: Routing class code (see routing.cadet_class)
+        interarrival: Delay before each cadet arrives, in hours
+        block_wait: Hold after each cadet before the next one arrives
+            (non-zero only at the end of an arrival block)
+        arrival_time: Arrival time (hours after SIMULATION_START_TIME)
+        station: Current station index (NOT_ARRIVED before arrival,
+            EXIT_STN after completion)
+        completion_time: Time the cadet left the last station (NaN until then)
+        request_time: Time the cadet joined its current station's queue
+            (NaN before arrival)
+    """
+
+    def __init__(self, sex, usmaps, cls, interarrival, block_wait, arrival_time):
+        self.sex = sex
+        self.usmaps = usmaps
+        self.cls = cls
+        self.interarrival = interarrival
+        self.block_wait = block_wait
+        self.arrival_time = arrival_time
+        self.station = np.full(len(sex), NOT_ARRIVED, dtype=np.int16)
+        self.completion_time = np.full(len(sex), np.nan)
+        self.request_time = np.full(len(sex), np.nan)
+
+    def __len__(self) -> int:
+        """Number of cadets (row 0 is not a cadet)."""
+        return len(self.sex) - 1
+
+    def cycle_time(self) -> np.ndarray:
+        """
+        Time from arrival to completion per cadet (NaN if not complete).
+
+        Returns:
+            Array indexed by cadet id
+        """
+        return self.completion_time - self.arrival_time
+
+    def to_frame(self) -> "pd.DataFrame":
+        """
+        Per-cadet table, one row per cadet.
+
+        Returns:
+            DataFrame with cadet id, sex, USMAPS flag, routing class,
+            arrival, completion and cycle times
+        """
+        import pandas as pd
+
+        rows = slice(1, None)
+        return pd.DataFrame({
+            "cadet_id": np.arange(1, len(self.sex)),
+            "sex": self.sex[rows],
+            "usmaps": self.usmaps[rows],
+            "cadet_class": pd.Categorical.from_codes(self.cls[rows], CLASS_NAMES),
+            "arrival_time": self.arrival_time[rows],
+            "completion_time": self.completion_time[rows],
+            "cycle_time": self.cycle_time()[rows],
+        })
+
+
+def generate_cadet_table(streams, mod_path: str = 'std', usmaps_path: str = 'rand',
+                         cohort: Cohort = None) -> CadetTable:
+    """
+    Generate the whole cohort in bulk.
+
+    Arrivals are Poisson within blocks of block_size cadets, and a new block
+    never starts less than one hour after the previous one. At most
+    female_max even-numbered cadets per block are female, and at most
+    usmaps_max cadets per day are USMAPS, placed according to usmaps_path.
+    Each day of a multi-day cohort starts DAY_LENGTH hours after the
+    previous one, with the same rules applied to its position within the day.
+
+    Args:
+        streams: RandomStreams supplying inter-arrival times and USMAPS
+            coin flips
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        cohort: Intake size and composition (default: Cohort())
+
+    Returns:
+        CadetTable
+    """
+    cohort = cohort or Cohort()
+    cadet_ct = cohort.cadet_ct
+    per_day = cohort.cadets_per_day
+    block_size = cohort.block_size
+    ids = np.arange(cadet_ct + 1)
+    # Position within the day, 1..cadets_per_day (0 for the unused row 0)
+    day_pos = np.concatenate(([0], np.arange(cadet_ct) % per_day + 1))
+
+    # USMAPS cadets, capped at usmaps_max per day in arrival order
+    if usmaps_path == 'rand':
+        usmaps = np.concatenate(([False], streams.uniforms(cadet_ct) < USMAPS_PROBABILITY))
+    elif usmaps_path == 'front':
+        usmaps = day_pos < cohort.usmaps_max
+    elif usmaps_path == 'back':
+        usmaps = day_pos >= (per_day + 1 - cohort.usmaps_max)
+    else:
+        usmaps = np.zeros(cadet_ct + 1, dtype=bool)
+    usmaps[0] = False
+    usmaps[1:] &= (np.cumsum(usmaps[1:].reshape(cohort.days, per_day), axis=1)
+                   <= cohort.usmaps_max).ravel()
+
+    interarrival = np.concatenate(([0.0], streams.interarrival_times(cadet_ct)))
+    arrival_time = np.zeros(cadet_ct + 1)
+    block_wait = np.zeros(cadet_ct + 1)
+    female = np.zeros(cadet_ct + 1, dtype=bool)
+
+    block_start = 0.0
+    for day in range(cohort.days):
+        day_first = day * per_day + 1
+        day_end = day_first + per_day
+        if day > 0:
+            # Hold after the previous day's last cadet until this day starts
+            last = day_first - 1
+            wait = day * DAY_LENGTH - arrival_time[last]
+            if wait < 0:
+                raise ValueError(f"Day {day} arrivals run past {DAY_LENGTH} hours; "
+                                 f"use fewer cadets per day or larger blocks")
+            block_wait[last] = wait
+            block_start = arrival_time[last] + wait
+
+        for first in range(day_first, day_end, block_size):
+            block = slice(first, min(first + block_size, day_end))
+
+            # Female cadets: even positions until the block's quota is used up
+            even = day_pos[block] % 2 == 0
+            female[block] = even & (np.cumsum(even) <= cohort.female_max)
+
+            # Sequential sums, so times match a step-by-step event clock exactly
+            arrival_time[block] = np.cumsum(
+                np.concatenate(([block_start], interarrival[block])))[1:]
+
+            last = block.stop - 1
+            if last - first + 1 == block_size:
+                now = arrival_time[last]
+                wait = 1 - (now - block_start)
+                if wait > 0:
+                    block_wait[last] = wait
+                    now = now + wait
+                block_start = now
+
+    sex = np.where(female, 0, 1).astype(np.int8)
+    cls = cadet_class(female, usmaps, mod_path).astype(np.int8)
+    return CadetTable(sex, usmaps.astype(np.int8), cls, interarrival,
+                      block_wait, arrival_time)
@@ -0,0 +1,131 @@
+"""
+Startup-time budget check for headless simulation runs.
+
+Schedulers launch thousands of short headless runs, so interpreter start-up
+and imports are a large share of each job. This script measures, in fresh
+interpreters, (1) importing the simulation engines, which must not load
+matplotlib, pandas or scipy, and (2) a complete seeded headless run
+(`simulation.py --no-plot --no-cache --engine fast`) writing into a scratch
+directory, and fails when either exceeds its budget. The best of several
+attempts is compared, which filters out one-off scheduling noise. The
+budgets are enforced by tests/test_startup.py.
+
+Usage:
+    python -m pytest tests/test_startup.py
+    python check_startup.py [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time as timer
+
+# Budgets in seconds of wall time, including interpreter start-up
+IMPORT_BUDGET = 0.5
+HEADLESS_RUN_BUDGET = 3.0
+
+# Modules the engines must not load at import time
+LAZY_MODULES = ("matplotlib", "pandas", "scipy")
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+tic = time.perf_counter()
+import simulation, fast_engine
+seconds = time.perf_counter() - tic
+print(json.dumps({{"seconds": seconds,
+                  "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import() -> dict:
+    """
+    Import the engines in a fresh interpreter.
+
+    Returns:
+        Dictionary with 'wall' (process wall time), 'seconds' (import time
+        measured inside the process) and 'loaded' (lazy modules loaded)
+    """
+    tic = timer.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=_PACKAGE_DIR,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out)
+    result["wall"] = timer.perf_counter() - tic
+    return result
+
+
+def measure_headless_run(output_dir: str, seed: int = 1) -> float:
+    """
+    Wall time of a complete seeded headless run in a fresh interpreter.
+
+    Args:
+        output_dir: Scratch directory for the run's results (also its
+            working directory)
+        seed: Seed of the run
+
+    Returns:
+        Seconds
+    """
+    cmd = [sys.executable, os.path.join(_PACKAGE_DIR, "simulation.py"),
+           "--seed", str(seed), "--engine", "fast", "--no-plot", "--no-cache",
+           "--output-dir", output_dir]
+    tic = timer.perf_counter()
+    subprocess.run(cmd, cwd=output_dir, capture_output=True, check=True)
+    return timer.perf_counter() - tic
+
+
+def parse_arguments():
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='R-Day Simulation - check the headless start-up time budget')
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Attempts per measurement; the best is compared (default: 3)'
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_arguments()
+
+    imports = [measure_import() for _ in range(args.repeat)]
+    with tempfile.TemporaryDirectory(prefix="startup-") as scratch:
+        runs = [measure_headless_run(scratch) for _ in range(args.repeat)]
+    import_wall = min(r["wall"] for r in imports)
+    import_only = min(r["seconds"] for r in imports)
+    loaded = sorted({m for r in imports for m in r["loaded"]})
+    run_wall = min(runs)
+
+    failures = []
+    if loaded:
+        failures.append(f"importing the engines loaded {', '.join(loaded)}")
+    if import_wall > IMPORT_BUDGET:
+        failures.append(f"import took {import_wall:.3f}s (budget {IMPORT_BUDGET}s)")
+    if run_wall > HEADLESS_RUN_BUDGET:
+        failures.append(f"headless run took {run_wall:.3f}s "
+                        f"(budget {HEADLESS_RUN_BUDGET}s)")
+
+    print(f"Import: {import_wall:.3f}s wall ({import_only:.3f}s in imports), "
+          f"budget {IMPORT_BUDGET}s")
+    print(f"Headless run: {run_wall:.3f}s wall, budget {HEADLESS_RUN_BUDGET}s")
+    if failures:
+        for failure in failures:
+            print(f"FAILED: {failure}")
+        sys.exit(1)
+    print("PASSED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Checkpoint, restore and warm-start of R-Day simulation state.
+
+Many what-if studies only change the afternoon (barber shop or Red Sash
+staffing, say), yet a fresh run re-simulates the whole morning. A
+FastRDaySimulation paused with run(until=...) keeps its complete state as
+plain data - event heap, station queues and busy servers, the batch queues
+batch_bus_q/batch_oath_q, cadet positions, the event log so far and the
+random streams - so snapshot() can serialize it and restore() can rebuild
+any number of simulations from it, each with its own staffing from the
+checkpoint time on. Every branch shares the morning prefix (the same cadets,
+service draws and queues) and only simulates the rest of the day.
+
+The SimPy engine keeps its state inside generator frames, which cannot be
+serialized, so checkpoints always use the fast engine; a seeded fast run
+matches the SimPy engine visit for visit.
+
+Usage:
+    python checkpoint.py --at 12:00 --staff "CA 2 Barber Shop=11,13,15" --replications 20
+"""
+
+import argparse
+import os
+import pickle
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from config import dir_setup
+from fast_engine import FastRDaySimulation
+from optimizer import parse_clock
+from replications import replication_seeds, kpi_row
+from sweep import parse_staffing_grid, scenario_key, staffing_label, summarize_sweep
+
+# Bump when the layout of the saved state changes
+CHECKPOINT_FORMAT = 2
+
+# Simulation attributes that make up its state at a point in time
+_STATE_ATTRS = ("staffing", "record_log", "cohort", "cadets", "time_stamp", "arc_ct",
+                "visit_ct", "completed_ct", "now", "streams", "queue_stats",
+                "batch_bus_q", "batch_oath_q", "_engine_state")
+
+
+def snapshot(sim: FastRDaySimulation) -> bytes:
+    """
+    Serialize the state of a paused (or finished) simulation.
+
+    Args:
+        sim: FastRDaySimulation advanced with run(until=...)
+
+    Returns:
+        Pickled checkpoint
+    """
+    if getattr(sim, "_engine_state", None) is None:
+        raise ValueError("Only a started FastRDaySimulation can be checkpointed; "
+                         "advance it with run(until=...) first")
+    state = {"format": CHECKPOINT_FORMAT, "mod_path": sim.mod_path,
+             "usmaps_path": sim.usmaps_path, "output_dir": sim.output_dir}
+    for attr in _STATE_ATTRS:
+        state[attr] = getattr(sim, attr)
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restore(checkpoint: bytes, staffing: Dict[str, int] = None,
+            output_dir: str = None) -> FastRDaySimulation:
+    """
+    Rebuild a simulation from a checkpoint, ready to resume with run().
+
+    Args:
+        checkpoint: Pickled checkpoint from snapshot()
+        staffing: Station name -> server count overrides applied on top of
+            the checkpoint's staffing from the checkpoint time on (cadets
+            already in service keep their server)
+        output_dir: Output directory (default: the checkpointed run's)
+
+    Returns:
+        FastRDaySimulation in the checkpointed state
+    """
+    state = pickle.loads(checkpoint)
+    if state.get("format") != CHECKPOINT_FORMAT:
+        raise ValueError(f"Unsupported checkpoint format {state.get('format')}; "
+                         f"expected {CHECKPOINT_FORMAT}")
+
+    plan = dict(state["staffing"])
+    plan.update(staffing or {})
+    sim = FastRDaySimulation(state["mod_path"], state["usmaps_path"],
+                             output_dir=output_dir or state["output_dir"],
+                             seed=0, staffing=plan, record_log=state["record_log"])
+    for attr in _STATE_ATTRS:
+        if attr != "staffing":
+            setattr(sim, attr, state[attr])
+
+    # The branch's staffing applies from the checkpoint time on; utilization
+    # before it stays measured against the servers the morning had
+    sim.queue_stats.set_capacity(sim.now, sim.stations.server_ct.tolist())
+
+    # Per-cadet lists derived from the restored cohort
+    sim._cadet_usmaps = sim.cadets.usmaps.astype(bool).tolist()
+    sim._cadet_female = (sim.cadets.sex == 0).tolist()
+    sim._cadet_routes = [sim.stations.next_stn_rows[c]
+                         for c in sim.cadets.cls.tolist()]
+    return sim
+
+
+def save_checkpoint(sim: FastRDaySimulation, path: str):
+    """
+    Write a checkpoint of a paused simulation to disk.
+
+    Args:
+        sim: FastRDaySimulation advanced with run(until=...)
+        path: Destination file
+    """
+    with open(path, "wb") as f:
+        f.write(snapshot(sim))
+
+
+def load_checkpoint(path: str, staffing: Dict[str, int] = None,
+                    output_dir: str = None) -> FastRDaySimulation:
+    """
+    Restore a simulation from a checkpoint file.
+
+    Args:
+        path: File written by save_checkpoint
+        staffing: Station name -> server count overrides from the checkpoint
+            time on
+        output_dir: Output directory (default: the checkpointed run's)
+
+    Returns:
+        FastRDaySimulation in the checkpointed state
+    """
+    with open(path, "rb") as f:
+        return restore(f.read(), staffing, output_dir)
+
+
+def run_checkpoint(until: float, mod_path: str = 'std', usmaps_path: str = 'rand',
+                   seed=None, output_dir: str = None) -> bytes:
+    """
+    Simulate the shared prefix of a day and checkpoint it.
+
+    Args:
+        until: Checkpoint time in hours after SIMULATION_START_TIME
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        seed: Seed or SeedSequence of the run
+        output_dir: Output directory
+
+    Returns:
+        Pickled checkpoint
+    """
+    sim = FastRDaySimulation(mod_path, usmaps_path, output_dir=output_dir or os.getcwd(),
+                             seed=seed)
+    sim.run(verbose=False, until=until)
+    return snapshot(sim)
+
+
+def run_branch(task: Tuple) -> List[Dict]:
+    """
+    Run every staffing variant of one replication from a shared checkpoint.
+
+    Args:
+        task: Tuple of (replication index, pickled checkpoint or None,
+            checkpoint time, mod_path, usmaps_path, seed, staffing variants);
+            the prefix is simulated first when no checkpoint is given
+
+    Returns:
+        One KPI row per staffing variant
+    """
+    rep_idx, checkpoint, until, mod_path, usmaps_path, seed, variants = task
+    if checkpoint is None:
+        checkpoint = run_checkpoint(until, mod_path, usmaps_path, seed)
+
+    rows = []
+    for staffing in variants:
+        sim = restore(checkpoint, staffing, output_dir=os.getcwd())
+        sim.run(verbose=False)
+        rows.append(kpi_row(sim, rep_idx))
+    return rows
+
+
+def run_branches(until: float, variants: List[Dict[str, int]], n_reps: int,
+                 mod_path: str = 'std', usmaps_path: str = 'rand', seed: int = None,
+                 workers: int = 1, checkpoint: bytes = None) -> pd.DataFrame:
+    """
+    Branch staffing variants from per-replication morning checkpoints.
+
+    Replication i simulates its prefix once with seed i, then runs every
+    variant from that checkpoint, so the variants share common random
+    numbers up to the checkpoint time and the prefix is never repeated.
+
+    Args:
+        until: Checkpoint time in hours after SIMULATION_START_TIME
+        variants: Staffing overrides applied from the checkpoint time on
+        n_reps: Replications (ignored when checkpoint is given)
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        seed: Base seed (None draws fresh entropy)
+        workers: Number of worker processes
+        checkpoint: Existing checkpoint to branch from instead of simulating
+            n_reps fresh prefixes
+
+    Returns:
+        DataFrame with one row per variant x replication, in the layout of
+        sweep.run_sweep
+    """
+    if checkpoint is not None:
+        state = pickle.loads(checkpoint)
+        mod_path, usmaps_path = state["mod_path"], state["usmaps_path"]
+        tasks = [(0, checkpoint, until, mod_path, usmaps_path, None, variants)]
+    else:
+        tasks = [(rep_idx, None, until, mod_path, usmaps_path, rep_seed, variants)
+                 for rep_idx, rep_seed in enumerate(replication_seeds(seed, n_reps))]
+
+    if workers <= 1 or len(tasks) == 1:
+        results = [run_branch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_branch, tasks))
+
+    rows = []
+    for variant_idx, staffing in enumerate(variants):
+        for rep_rows in results:
+            row = dict(rep_rows[variant_idx])
+            row["scenario"] = scenario_key(mod_path, usmaps_path, staffing)
+            row["mod_path"] = mod_path
+            row["usmaps_path"] = usmaps_path
+            row["staffing"] = staffing_label(staffing)
+            rows.append(row)
+
+    df = pd.DataFrame(rows)
+    lead = ["scenario", "mod_path", "usmaps_path", "staffing", "replication"]
+    return df[lead + [c for c in df.columns if c not in lead]]
+
+
+def parse_arguments():
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='R-Day Simulation - branch staffing variants from a checkpoint',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python checkpoint.py --at 12:00 --staff "CA 2 Barber Shop=11,13,15" --replications 20
+  python checkpoint.py --at 12:00 --seed 1 --save output/noon.pkl
+  python checkpoint.py --load output/noon.pkl --staff "TH 6 Oath=2,3"
+        """
+    )
+
+    parser.add_argument(
+        '--at',
+        default=None,
+        metavar='HH:MM',
+        help='Checkpoint time of day (24-hour clock)'
+    )
+
+    parser.add_argument(
+        '--staff',
+        action='append',
+        default=[],
+        metavar='"STATION=N[,N...]"',
+        help='server_ct levels from the checkpoint on for one station (repeatable)'
+    )
+
+    parser.add_argument(
+        '--mod',
+        choices=['mod', 'std'],
+        default='std',
+        help='Modification path (default: std)'
+    )
+
+    parser.add_argument(
+        '--usmaps',
+        choices=['rand', 'front', 'back'],
+        default='rand',
+        help='USMAPS cadet distribution strategy (default: rand)'
+    )
+
+    parser.add_argument(
+        '--replications',
+        type=int,
+        default=20,
+        help='Replications, each with its own checkpoint (default: 20)'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Base seed (default: fresh entropy)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Worker processes (default: number of CPUs)'
+    )
+
+    parser.add_argument(
+        '--save',
+        default=None,
+        metavar='FILE',
+        help='Simulate one replication up to --at, save its checkpoint and exit'
+    )
+
+    parser.add_argument(
+        '--load',
+        default=None,
+        metavar='FILE',
+        help='Branch the variants from this checkpoint instead of simulating '
+             'fresh prefixes (--at, --mod, --usmaps and --seed are ignored)'
+    )
+
+    args = parser.parse_args()
+    if args.at is None and args.load is None:
+        parser.error("--at is required unless --load is given")
+    if args.save and args.load:
+        parser.error("--save and --load are mutually exclusive")
+    return args
+
+
+def main():
+    """Main execution function."""
+    args = parse_arguments()
+    output_dir = dir_setup()
+
+    if args.save:
+        seed = replication_seeds(args.seed, 1)[0]
+        sim = FastRDaySimulation(args.mod, args.usmaps, output_dir=output_dir, seed=seed)
+        sim.run(verbose=False, until=parse_clock(args.at))
+        save_checkpoint(sim, args.save)
+        print(f"Checkpoint at {sim.now:.3f} h ({sim.completed_ct} cadets complete) "
+              f"saved to {args.save}")
+        return
+
+    checkpoint = None
+    until = None
+    if args.load:
+        with open(args.load, "rb") as f:
+            checkpoint = f.read()
+    else:
+        until = parse_clock(args.at)
+
+    variants = parse_staffing_grid(args.staff)
+    start = timer.perf_counter()
+    df_branches = run_branches(until, variants, args.replications, args.mod,
+                               args.usmaps, seed=args.seed, workers=args.workers,
+                               checkpoint=checkpoint)
+    elapsed = timer.perf_counter() - start
+    df_summary = summarize_sweep(df_branches)
+
+    results_file = os.path.join(output_dir, "branch_results.csv")
+    summary_file = os.path.join(output_dir, "branch_summary.csv")
+    df_branches.to_csv(results_file, index=False)
+    df_summary.to_csv(summary_file)
+
+    print(df_summary.xs("completion_time", level="kpi")[
+        ["mean", "ci_low", "ci_high", "q95"]].to_string())
+    print(f"{len(df_branches)} branches in {elapsed:.2f}s")
+    print(f"Branch results saved to {results_file}")
+    print(f"Branch summary saved to {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
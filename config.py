@@ -18,6 +18,7 @@ FEMALE_COUNT_MAX = 53
 USMAPS_COUNT_MAX = 200
 USMAPS_PROBABILITY = 0.25
 SIMULATION_START_TIME = 5.5  # 0530 AM
+DAY_LENGTH = 24  # hours between the starts of consecutive days in multi-day runs
 
 def dir_setup():
     try:
@@ -36,6 +37,16 @@ def dir_setup():
     
     return(OUTPUT_DIR_STR)
 
+def default_output_dir():
+    """
+    Output directory used when none is given, without dir_setup()'s side
+    effects (no chdir, nothing created until results are written).
+    
+    Returns:
+        Absolute path of the 'output' directory next to this file
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output')
+
 # All service times now show min, mode, max; all times are in minutes
 STATION_DIC = {"RN - Smart Card Issue":{"server_ct" : 8, "service_time" : [1,2,3], "next_stn" : 1, "next_fem_stn" : 1, "USMAPS_frac" : 1, "next_USMAPS_stn" : 1, "next_USMAPS_fem_stn" : 1}, #0
                "Ike 1 Scan-In":{"server_ct" : 200, "service_time" : [40,45,50], "next_stn" : 2, "next_fem_stn" : 2, "USMAPS_frac" : 1, "next_USMAPS_stn" : 2, "next_USMAPS_fem_stn" : 2}, #1 #includes bus movement
@@ -0,0 +1,312 @@
+"""
+Analytic estimator for screening R-Day staffing plans.
+
+estimate() approximates the station network in closed form instead of
+simulating it, in a few milliseconds. Cadets arrive in blocks of
+CUSTOMER_BATCH_SIZE at ARRIVAL_RATE, with at most one block per hour, and
+follow the fixed route of their class; the class mix comes from the cohort
+constants in config.py. Rates are propagated through the network as a fluid:
+a station passes on at most its capacity (server_ct / mean service time).
+This is done twice, for the sustained rate (one block per block period) and
+for the burst rate within a block. Per station this gives:
+
+- utilization of the sustained rate (1 or more means the station is
+  overloaded and its queue grows for the whole arrival window)
+- the fluid wait for backlog built up during bursts and, at overloaded
+  stations, over the arrival window
+- an M/G/c queueing wait (Allen-Cunneen) at stations with spare capacity
+- the batch-filling wait at the bus and oath stations
+
+The usmaps_path only changes the expected number of USMAPS cadets, not where
+they arrive in the cohort. Estimates are meant to rank staffing candidates
+and find bottlenecks; promising candidates still go to the full simulation.
+"""
+
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    dir_setup, STATION_DIC, TOTAL_CUSTOMERS, ARRIVAL_RATE, CUSTOMER_BATCH_SIZE,
+    FEMALE_COUNT_MAX, USMAPS_COUNT_MAX, USMAPS_PROBABILITY,
+    BUS_BATCH_SIZE, OATH_BATCH_SIZE
+)
+from routing import compile_station_table, cadet_class, BUS_BATCH, OATH_BATCH
+
+
+def cohort_groups(mod_path: str = 'std', usmaps_path: str = 'rand',
+                  cadet_ct: int = TOTAL_CUSTOMERS - 1) -> List[Dict]:
+    """
+    Expected cohort mix by sex and USMAPS status.
+
+    Args:
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        cadet_ct: Number of cadets
+
+    Returns:
+        One dictionary per group with its share of the cohort, the female
+        and USMAPS flags and the routing class code
+    """
+    female = min(FEMALE_COUNT_MAX, CUSTOMER_BATCH_SIZE // 2) / CUSTOMER_BATCH_SIZE
+    expected = cadet_ct * USMAPS_PROBABILITY if usmaps_path == 'rand' else cadet_ct
+    usmaps = min(USMAPS_COUNT_MAX, expected) / cadet_ct
+
+    groups = []
+    for is_female in (False, True):
+        for is_usmaps in (False, True):
+            share = ((female if is_female else 1 - female)
+                     * (usmaps if is_usmaps else 1 - usmaps))
+            groups.append({"share": share, "female": is_female, "usmaps": is_usmaps,
+                           "cls": cadet_class(is_female, is_usmaps, mod_path)})
+    return groups
+
+
+def arrival_profile(cadet_ct: int = TOTAL_CUSTOMERS - 1) -> Dict:
+    """
+    Sustained and burst arrival rates of the block arrival process.
+
+    Args:
+        cadet_ct: Number of cadets
+
+    Returns:
+        Dictionary with the sustained rate (cadets per hour over a block
+        period), the burst rate within a block, the block period and the
+        arrival window (hours until the last cadet arrives)
+    """
+    block_time = CUSTOMER_BATCH_SIZE / ARRIVAL_RATE
+    period = max(1.0, block_time)
+    blocks = -(-cadet_ct // CUSTOMER_BATCH_SIZE)
+    last_block = cadet_ct - (blocks - 1) * CUSTOMER_BATCH_SIZE
+    return {
+        "sustained_rate": CUSTOMER_BATCH_SIZE / period,
+        "burst_rate": float(ARRIVAL_RATE),
+        "block_period": period,
+        "window": (blocks - 1) * period + last_block / ARRIVAL_RATE,
+    }
+
+
+def erlang_c(servers: int, offered: float) -> float:
+    """
+    Probability that an arrival waits in an M/M/c queue (Erlang C).
+
+    Args:
+        servers: Number of servers c
+        offered: Offered load a = arrival rate x mean service time (a < c)
+
+    Returns:
+        Waiting probability
+    """
+    # Erlang B by its stable recursion, then converted to Erlang C
+    blocking = 1.0
+    for k in range(1, servers + 1):
+        blocking = offered * blocking / (k + offered * blocking)
+    rho = offered / servers
+    return blocking / (1 - rho * (1 - blocking))
+
+
+def _propagate(share: np.ndarray, routes: List[List[int]], rate: float,
+               capacity: np.ndarray) -> np.ndarray:
+    """
+    Fluid arrival rate at every station.
+
+    Each station forwards at most its capacity, so the flow of a group at a
+    station is the external rate scaled by the throttle of every station
+    before it on the group's route. Routes cross (the oath and LRC 687
+    stations are visited in opposite orders), so throttles are iterated to
+    a fixed point.
+
+    Args:
+        share: (groups,) cohort share of each group
+        routes: Per group, its route as station indices
+        rate: External arrival rate (cadets per hour)
+        capacity: (stations,) service capacity (cadets per hour)
+
+    Returns:
+        (stations,) offered arrival rate
+    """
+    throttle = np.ones(len(capacity))
+    for _ in range(len(capacity) + 1):
+        offered = np.zeros(len(capacity))
+        for g, route in enumerate(routes):
+            passed = rate * share[g]
+            for stn in route:
+                offered[stn] += passed
+                passed *= throttle[stn]
+        new_throttle = np.minimum(1.0, capacity / np.maximum(offered, 1e-12))
+        if np.allclose(new_throttle, throttle):
+            break
+        throttle = new_throttle
+    return offered
+
+
+def estimate(mod_path: str = 'std', usmaps_path: str = 'rand',
+             staffing: Dict[str, int] = None, station_dic: Dict = None) -> Dict:
+    """
+    Approximate utilization, waits and completion time of one scenario.
+
+    Args:
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        staffing: Station name -> server count overrides
+        station_dic: Station definitions (defaults to config.STATION_DIC)
+
+    Returns:
+        Dictionary with a per-station DataFrame ("stations"), the bottleneck
+        station, its utilization and the estimated completion time (hours
+        after SIMULATION_START_TIME)
+    """
+    table = compile_station_table(station_dic or STATION_DIC, staffing)
+    station_ct = len(table)
+    cadet_ct = TOTAL_CUSTOMERS - 1
+    groups = cohort_groups(mod_path, usmaps_path, cadet_ct)
+    profile = arrival_profile(cadet_ct)
+
+    share = np.array([g["share"] for g in groups])
+    routes = [list(table.routes[g["cls"]]) for g in groups]
+    visits = np.zeros((len(groups), station_ct), dtype=bool)
+    for g, route in enumerate(routes):
+        visits[g, route] = True
+
+    # Triangular service moments per group and station, in hours
+    low, mode, high = table.service_params.T
+    tri_mean = (low + mode + high) / 3
+    tri_var = (low ** 2 + mode ** 2 + high ** 2 - low * mode - low * high - mode * high) / 18
+    scale = np.ones((len(groups), station_ct))
+    for g, group in enumerate(groups):
+        if group["usmaps"]:
+            scale[g] *= table.usmaps_frac
+        if group["female"]:
+            scale[g, table.female_skip] = 0.0
+    weight = share[:, None] * visits
+    visit_share = weight.sum(axis=0)
+    weight = weight / np.maximum(visit_share, 1e-12)
+    mean_service = (weight * scale * tri_mean).sum(axis=0)
+    second_moment = (weight * scale ** 2 * (tri_var + tri_mean ** 2)).sum(axis=0)
+    service_scv = np.where(mean_service > 0,
+                           second_moment / np.maximum(mean_service, 1e-12) ** 2 - 1, 0.0)
+
+    servers = table.server_ct.astype(float)
+    capacity = np.where(mean_service > 0, servers / np.maximum(mean_service, 1e-12), np.inf)
+    sustained = _propagate(share, routes, profile["sustained_rate"], capacity)
+    burst = _propagate(share, routes, profile["burst_rate"], capacity)
+    utilization = sustained / capacity
+    burst_utilization = burst / capacity
+
+    # Fluid backlog: a block of B_s cadets arriving faster than capacity
+    # waits (B_s / capacity - B_s / burst) at the end, half that on average;
+    # an overloaded station keeps growing its queue over the arrival window
+    block_visitors = CUSTOMER_BATCH_SIZE * visit_share
+    burst_tail = np.where(burst > capacity,
+                          block_visitors * (1 / capacity - 1 / np.maximum(burst, 1e-12)), 0.0)
+    window_tail = np.maximum(utilization - 1, 0.0) * profile["window"]
+
+    # Allen-Cunneen M/G/c wait at stations with spare capacity
+    queue_wait = np.zeros(station_ct)
+    for stn in range(station_ct):
+        if 0 < utilization[stn] < 1:
+            offered = sustained[stn] * mean_service[stn]
+            queue_wait[stn] = (erlang_c(int(servers[stn]), offered)
+                               / (capacity[stn] - sustained[stn])
+                               * (1 + service_scv[stn]) / 2)
+
+    batch_size = np.zeros(station_ct)
+    batch_size[table.batch == BUS_BATCH] = BUS_BATCH_SIZE
+    batch_size[table.batch == OATH_BATCH] = OATH_BATCH_SIZE
+    batch_wait = np.where(batch_size > 0, batch_size / (2 * np.maximum(burst, 1e-12)), 0.0)
+
+    wait = (burst_tail + window_tail) / 2 + queue_wait + batch_wait
+    tail_wait = burst_tail + window_tail + queue_wait + batch_wait
+
+    # The last cadet arrives at the end of the window and meets the tail
+    # wait at every station on its route
+    path_time = [(scale[g, route] * tri_mean[route] + tail_wait[route]).sum()
+                 for g, route in enumerate(routes) if share[g] > 0]
+    completion_time = profile["window"] + max(path_time)
+
+    df = pd.DataFrame({
+        "station": table.names,
+        "server_ct": table.server_ct,
+        "visitors": visit_share * cadet_ct,
+        "arrival_rate": sustained,
+        "mean_service_min": mean_service * 60,
+        "utilization": utilization,
+        "burst_utilization": burst_utilization,
+        "wait_min": wait * 60,
+        "queue_length": sustained * wait,
+        "overloaded": utilization >= 1,
+    })
+    bottleneck = int(np.argmax(utilization))
+    return {
+        "stations": df,
+        "bottleneck": table.names[bottleneck],
+        "max_utilization": float(utilization[bottleneck]),
+        "completion_time": float(completion_time),
+    }
+
+
+def screen_staffing(staffing_grid: List[Dict[str, int]], mod_path: str = 'std',
+                    usmaps_path: str = 'rand', keep: int = None) -> pd.DataFrame:
+    """
+    Rank staffing candidates by their estimated completion time.
+
+    Args:
+        staffing_grid: Staffing override dictionaries
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        keep: Number of candidates to mark as promising (default: all)
+
+    Returns:
+        DataFrame with one row per candidate, best first: its index in
+        staffing_grid, the staffing overrides, the estimated completion time,
+        bottleneck station and utilization, and a 'promising' flag
+    """
+    rows = []
+    for idx, staffing in enumerate(staffing_grid):
+        est = estimate(mod_path, usmaps_path, staffing)
+        rows.append({"candidate": idx, "staffing": staffing,
+                     "completion_time": est["completion_time"],
+                     "bottleneck": est["bottleneck"],
+                     "max_utilization": est["max_utilization"]})
+    df = pd.DataFrame(rows).sort_values(["completion_time", "candidate"], ignore_index=True)
+    df["promising"] = df.index < (len(df) if keep is None else keep)
+    return df
+
+
+def print_estimate(est: Dict, mod_path: str, usmaps_path: str):
+    """
+    Print the per-station estimate and its headline numbers.
+
+    Args:
+        est: Result of estimate()
+        mod_path: Modification path
+        usmaps_path: USMAPS distribution strategy
+    """
+    with pd.option_context("display.width", 140, "display.max_columns", None,
+                           "display.float_format", "{:.2f}".format):
+        print(est["stations"].to_string(index=False))
+    print(f"\nEstimate for {mod_path} {usmaps_path}: bottleneck "
+          f"{est['bottleneck']} (utilization {est['max_utilization']:.2f}), "
+          f"completion about {est['completion_time']:.2f} h after start")
+
+
+def run_estimate(mod_path: str, usmaps_path: str) -> Dict:
+    """
+    Estimate one scenario, print it and save the per-station table.
+
+    Args:
+        mod_path: Modification path
+        usmaps_path: USMAPS distribution strategy
+
+    Returns:
+        Result of estimate()
+    """
+    est = estimate(mod_path, usmaps_path)
+    print_estimate(est, mod_path, usmaps_path)
+    output_dir = dir_setup()
+    out_file = os.path.join(output_dir, f"estimate_{mod_path}_{usmaps_path}.csv")
+    est["stations"].to_csv(out_file, index=False)
+    print(f"Estimate saved to {out_file}")
+    return est
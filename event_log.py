@@ -0,0 +1,210 @@
+"""
+Compact columnar event log for the R-Day simulation.
+
+Each station visit is written into preallocated, typed NumPy columns that
+grow by doubling. Stations are stored as small integer codes with a separate
+name table, and to_frame() hands out a DataFrame whose columns are views of
+the log's buffers rather than copies.
+
+For large cohorts the log can stream instead: given a writer, the buffer
+never grows past its initial capacity, and each time it fills its rows are
+written out and the buffer reused, so memory stays bounded however many
+visits are recorded. Per-station peak queue lengths and the last visit time
+are kept as running totals so a run's summary needs no read-back, and flush
+listeners see every chunk before it is written (see kpis.StreamedWaits).
+"""
+
+import numpy as np
+from typing import List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Initial number of rows allocated per column
+DEFAULT_CAPACITY = 32768
+
+# Stored columns and their dtypes
+COLUMN_DTYPES = {
+    "entity": np.int32,
+    "stn_idx": np.int16,
+    "q_length": np.int32,
+    "svc_count": np.int32,
+    "svc_capacity": np.int32,
+    "time": np.float64,
+    "next_stn": np.int16,
+    "arc_ct": np.int32,
+    "start_time": np.float64,
+    "request_time": np.float64,
+}
+
+# Column order of the df_time_stamp frame ("stn_nm" and "svc_count_after"
+# are derived from stn_idx and svc_count)
+FRAME_COLUMNS = [
+    "entity", "stn_idx", "q_length", "svc_count", "svc_capacity",
+    "stn_nm", "time", "next_stn", "arc_ct", "svc_count_after", "start_time",
+    "request_time"
+]
+
+
+class EventLog:
+    """
+    Growable struct-of-arrays store of station visits.
+
+    Attributes:
+        station_names: Name table indexed by station code
+        columns: Column name -> NumPy buffer (only the first buffered_ct
+            rows are valid)
+        writer: Sink of full buffers (None keeps every row in memory)
+        flush_listeners: Objects whose on_flush(log) is called with the
+            buffered rows each time a streaming log flushes
+    """
+
+    def __init__(self, station_names: List[str], capacity: int = DEFAULT_CAPACITY,
+                 writer=None):
+        """
+        Initialize an empty event log.
+
+        Args:
+            station_names: Station names, indexed by station code
+            capacity: Initial number of rows to allocate (the chunk size
+                when streaming)
+            writer: Object with a write(DataFrame) method that receives the
+                rows each time the buffer fills (see
+                results_io.TimeStampWriter); None keeps the log in memory
+        """
+        self.station_names = list(station_names)
+        self.columns = {name: np.empty(capacity, dtype=dtype)
+                        for name, dtype in COLUMN_DTYPES.items()}
+        self._capacity = capacity
+        self._size = 0
+        self.writer = writer
+        self.flush_listeners = []
+        self._flushed_ct = 0
+        self._flushed_peak = np.zeros(len(self.station_names), dtype=np.int64)
+        self._last_time = np.nan
+
+    def __len__(self) -> int:
+        """Number of visits recorded, including rows already written out."""
+        return self._flushed_ct + self._size
+
+    @property
+    def buffered_ct(self) -> int:
+        """Number of visits still held in memory."""
+        return self._size
+
+    def _grow(self):
+        """Double the capacity of every column, or flush a streaming log."""
+        if self.writer is not None:
+            self.flush()
+            return
+        self._capacity *= 2
+        for name, buf in self.columns.items():
+            grown = np.empty(self._capacity, dtype=buf.dtype)
+            grown[:self._size] = buf[:self._size]
+            self.columns[name] = grown
+
+    def append(self, entity: int, stn_idx: int, q_length: int, svc_count: int,
+               svc_capacity: int, finish_time: float, next_stn: int,
+               arc_ct: int, start_time: float, request_time: float):
+        """
+        Append one station visit.
+
+        Args:
+            entity: Cadet identifier
+            stn_idx: Station code
+            q_length: Queue length when service started
+            svc_count: Servers busy once service started
+            svc_capacity: Servers at the station
+            finish_time: Time when service completes
+            next_stn: Index of next station
+            arc_ct: Running count of the (stn_idx, next_stn) arc
+            start_time: Time when service started
+            request_time: Time when the cadet joined the station's queue
+        """
+        if self._size == self._capacity:
+            self._grow()
+        row = self._size
+        cols = self.columns
+        cols["entity"][row] = entity
+        cols["stn_idx"][row] = stn_idx
+        cols["q_length"][row] = q_length
+        cols["svc_count"][row] = svc_count
+        cols["svc_capacity"][row] = svc_capacity
+        cols["time"][row] = finish_time
+        cols["next_stn"][row] = next_stn
+        cols["arc_ct"][row] = arc_ct
+        cols["start_time"][row] = start_time
+        cols["request_time"][row] = request_time
+        self._size = row + 1
+
+    def flush(self):
+        """Write the buffered rows to the writer and empty the buffer."""
+        if self.writer is None:
+            raise ValueError("Only a streaming event log (with a writer) can be flushed")
+        if self._size:
+            np.maximum.at(self._flushed_peak, self.column("stn_idx"),
+                          self.column("q_length"))
+            self._last_time = float(self.columns["time"][self._size - 1])
+            for listener in self.flush_listeners:
+                listener.on_flush(self)
+        self.writer.write(self.to_frame())
+        self._flushed_ct += self._size
+        self._size = 0
+
+    def peak_by_station(self) -> np.ndarray:
+        """
+        Largest queue length logged at each station over the whole run.
+
+        Returns:
+            int64 array indexed by station code
+        """
+        peak = self._flushed_peak.copy()
+        np.maximum.at(peak, self.column("stn_idx"), self.column("q_length"))
+        return peak
+
+    def last_time(self) -> float:
+        """
+        Finish time of the last visit recorded (NaN if there is none).
+
+        Returns:
+            Hours after SIMULATION_START_TIME
+        """
+        if self._size:
+            return float(self.columns["time"][self._size - 1])
+        return self._last_time
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        View of the valid (buffered) rows of one stored column.
+
+        Args:
+            name: Column name (see COLUMN_DTYPES)
+
+        Returns:
+            NumPy view (not a copy) of the column
+        """
+        return self.columns[name][:self._size]
+
+    def to_frame(self) -> "pd.DataFrame":
+        """
+        DataFrame view of the log in the df_time_stamp schema.
+
+        Numeric columns share memory with the log; "stn_nm" is a categorical
+        over the station name table. A streaming log only holds the rows
+        buffered since its last flush.
+
+        Returns:
+            DataFrame with FRAME_COLUMNS
+        """
+        import pandas as pd
+
+        data = {}
+        for name in FRAME_COLUMNS:
+            if name == "stn_nm":
+                data[name] = pd.Categorical.from_codes(
+                    self.column("stn_idx"), categories=self.station_names)
+            elif name == "svc_count_after":
+                data[name] = self.column("svc_count")
+            else:
+                data[name] = self.column(name)
+        return pd.DataFrame(data, copy=False)
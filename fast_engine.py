@@ -0,0 +1,429 @@
+"""
+Event-heap engine for the R-Day simulation.
+
+FastRDaySimulation runs the same network as RDaySimulation - multi-server
+FIFO stations, the bus and oath batch-release rules and per-class routing -
+without SimPy. Service completions and arrivals live in a binary heap of
+(time, sequence, kind, cadet, station) tuples, events due at the current time
+in two FIFO lanes, and each station is just a free-server counter plus a FIFO
+deque of waiting cadets, so a visit costs a few tuple operations instead of a
+generator, a resource request and a timeout event. The lanes reproduce
+SimPy's event order, so a seeded run fills the same event log, arc matrix and
+cadet table as the SimPy engine and summary(), save_results() and
+plot_results() work unchanged.
+
+Run this module to cross-check the engine against the SimPy engine:
+
+    python fast_engine.py --replications 200 --seed 1
+"""
+
+import argparse
+import heapq
+import os
+import sys
+import time as timer
+from collections import deque
+from typing import Dict
+
+import numpy as np
+
+from config import BUS_BATCH_SIZE, OATH_BATCH_SIZE
+from routing import BUS_BATCH, OATH_BATCH, EXIT_STN
+from simulation import RDaySimulation
+
+# Event kinds
+_INIT = 0      # cadet reaches a station and requests a server
+_START = 1     # server granted, service starts
+_FINISH = 2    # service complete
+_RELEASE = 3   # freed server handed to the next waiting cadet
+_ARRIVE = 4    # next cadet arrives at the first station
+_HOLD = 5      # hold between arrival blocks ends
+_SAMPLE = 6    # observer state sample
+
+
+class FastRDaySimulation(RDaySimulation):
+    """
+    RDaySimulation driven by a hand-rolled event heap instead of SimPy.
+
+    Takes the same arguments and produces the same outputs (event log, arc
+    matrix, cadet table, observer callbacks). Draws come from the same
+    per-station streams and simultaneous events are processed in SimPy's
+    order, so a seeded run matches the SimPy engine visit for visit.
+    """
+
+    # Event-loop state of a started run (None until run() is first called)
+    _engine_state = None
+
+    def run(self, verbose: bool = True, until: float = None):
+        """
+        Execute the simulation, or advance it to a pause time.
+
+        A paused run keeps its whole state (event heap, station queues and
+        busy servers, batch queues, cadet positions and random streams) as
+        plain data, so it can be resumed by calling run() again or saved with
+        checkpoint.save_checkpoint().
+
+        Args:
+            verbose: Whether to print progress messages
+            until: Pause once every event up to this simulated time (hours
+                after SIMULATION_START_TIME) is processed (None runs to the end)
+        """
+        if verbose:
+            action = "Resuming" if self._engine_state else "Starting"
+            print(f"{action} fast simulation with USMAPS path: {self.usmaps_path}, "
+                  f"mod path: {self.mod_path}")
+
+        stations = self.stations
+        cadet_ct = len(self.cadets)
+        capacity = stations.server_ct.tolist()
+        exit_col = stations.exit_col
+        usmaps_frac = stations.usmaps_frac_row
+        female_skip = stations.female_skip_row
+        batch_row = stations.batch_row
+        bus_idx, oath_idx = stations.bus_idx, stations.oath_idx
+        bus_feeders, oath_feeders = self._bus_feeders, self._oath_feeders
+        cadet_usmaps = self._cadet_usmaps
+        cadet_female = self._cadet_female
+        cadet_routes = self._cadet_routes
+        cadet_station = self.cadets.station
+        cadet_request = self.cadets.request_time
+        completion_time = self.cadets.completion_time
+        interarrival = self.cadets.interarrival.tolist()
+        block_wait = self.cadets.block_wait.tolist()
+        service_time = self.streams.service_time
+        arc_ct = self.arc_ct
+        visit_ct = self.visit_ct
+        log_append = self.time_stamp.append if self.record_log else None
+        update_stats = self.queue_stats.update
+        observers = self.observers
+        sample_intervals = self._sample_intervals
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        # Future events live in the heap as (time, sequence, kind, cadet,
+        # station). Events due at the current time wait in two FIFO lanes,
+        # mirroring SimPy's ordering: process starts (URGENT) run before
+        # everything else, then heap events already due, then request grants
+        # and zero-length timeouts (NORMAL) in the order they were created.
+        state = self._engine_state or {
+            "heap": [(interarrival[1], 0, _ARRIVE, 1, 0)] if cadet_ct else [],
+            "seq": 1, "now": 0.0, "completed": 0,
+            "busy": [0] * len(capacity),
+            "queues": [deque() for _ in capacity],
+            "urgent": deque(), "immediate": deque(),
+        }
+        heap, urgent, immediate = state["heap"], state["urgent"], state["immediate"]
+        queues = state["queues"]
+        seq, now, completed = state["seq"], state["now"], state["completed"]
+        # Free servers may go negative if a restored run has fewer servers
+        # than are busy; no one is granted a server until enough finish
+        free = [c - b for c, b in zip(capacity, state["busy"])]
+        for k, (observer, interval) in enumerate(sample_intervals):
+            heap.append((now + interval, seq, _SAMPLE, k, 0))
+            seq += 1
+        heapq.heapify(heap)
+        bus_q, oath_q = self.batch_bus_q, self.batch_oath_q
+
+        release_count = self.cohort.release_count
+
+        def release_batch(batch_q, stn, feeders, batch_size, cadet_id):
+            # Same rule as batch_bus/batch_oath: release when the batch is
+            # full or every cadet of the day has passed the feeding stations
+            if (len(batch_q) > batch_size or
+                    arc_ct[feeders, stn].sum() >= release_count(cadet_id)):
+                for cdt in batch_q:
+                    urgent.append((_INIT, cdt, stn, 0.0))
+                batch_q.clear()
+
+        paused = False
+        while True:
+            if urgent:
+                kind, cadet_id, stn, svc = urgent.popleft()
+            elif heap and heap[0][0] <= now:
+                _, _, kind, cadet_id, stn = heappop(heap)
+            elif immediate:
+                kind, cadet_id, stn, svc = immediate.popleft()
+            elif heap:
+                if until is not None and heap[0][0] > until:
+                    paused = True
+                    break
+                now, _, kind, cadet_id, stn = heappop(heap)
+            else:
+                break
+
+            if kind == _INIT:
+                # Cadet reaches a station: draw its service time and queue
+                # for a server; a free server goes to the oldest request
+                svc = service_time(stn)
+                if cadet_usmaps[cadet_id]:
+                    svc *= usmaps_frac[stn]
+                if cadet_female[cadet_id] and female_skip[stn]:
+                    svc = 0
+                cadet_request[cadet_id] = now
+                queue = queues[stn]
+                queue.append((cadet_id, svc))
+                if free[stn] > 0:
+                    free[stn] -= 1
+                    waiting_id, waiting_svc = queue.popleft()
+                    immediate.append((_START, waiting_id, stn, waiting_svc))
+                update_stats(stn, now, len(queue), capacity[stn] - free[stn])
+
+            elif kind == _START:
+                # Server granted: log the visit and schedule the finish
+                nxt = cadet_routes[cadet_id][stn]
+                finish = now + svc
+                col = nxt if nxt >= 0 else exit_col
+                arc_ct[stn, col] += 1
+                visit_ct[stn] += 1
+                cadet_station[cadet_id] = stn
+                if log_append is not None:
+                    log_append(cadet_id, stn, len(queues[stn]),
+                               capacity[stn] - free[stn], capacity[stn],
+                               finish, nxt, arc_ct[stn, col], now,
+                               cadet_request[cadet_id])
+                for observer in observers:
+                    observer.on_visit(self, cadet_id, stn, now, finish, nxt)
+                if finish > now:
+                    heappush(heap, (finish, seq, _FINISH, cadet_id, stn))
+                    seq += 1
+                else:
+                    immediate.append((_FINISH, cadet_id, stn, 0.0))
+
+            elif kind == _FINISH:
+                # Free the server (handed on once the release is processed)
+                # and route the cadet onwards
+                free[stn] += 1
+                immediate.append((_RELEASE, 0, stn, 0.0))
+                nxt = cadet_routes[cadet_id][stn]
+                if nxt > 0:
+                    batch = batch_row[nxt]
+                    if batch == BUS_BATCH:
+                        bus_q.append(cadet_id)
+                        release_batch(bus_q, bus_idx, bus_feeders, BUS_BATCH_SIZE, cadet_id)
+                    elif batch == OATH_BATCH:
+                        oath_q.append(cadet_id)
+                        release_batch(oath_q, oath_idx, oath_feeders, OATH_BATCH_SIZE, cadet_id)
+                    else:
+                        urgent.append((_INIT, cadet_id, nxt, 0.0))
+                else:
+                    completed += 1
+                    cadet_station[cadet_id] = EXIT_STN
+                    completion_time[cadet_id] = now
+
+            elif kind == _RELEASE:
+                queue = queues[stn]
+                if queue and free[stn] > 0:
+                    free[stn] -= 1
+                    waiting_id, waiting_svc = queue.popleft()
+                    immediate.append((_START, waiting_id, stn, waiting_svc))
+                # Station state once the freed server has been handed on
+                update_stats(stn, now, len(queue), capacity[stn] - free[stn])
+
+            elif kind == _ARRIVE:
+                # Next cadet of the pre-generated cohort enters R-Day
+                urgent.append((_INIT, cadet_id, 0, 0.0))
+                if block_wait[cadet_id] > 0:
+                    heappush(heap, (now + block_wait[cadet_id], seq, _HOLD, cadet_id, 0))
+                    seq += 1
+                elif cadet_id < cadet_ct:
+                    heappush(heap, (now + interarrival[cadet_id + 1], seq,
+                                    _ARRIVE, cadet_id + 1, 0))
+                    seq += 1
+
+            elif kind == _HOLD:
+                # End of the hold between arrival blocks
+                if cadet_id < cadet_ct:
+                    heappush(heap, (now + interarrival[cadet_id + 1], seq,
+                                    _ARRIVE, cadet_id + 1, 0))
+                    seq += 1
+
+            elif kind == _SAMPLE:
+                observer, interval = sample_intervals[cadet_id]
+                observer.on_sample(self, now, [len(q) for q in queues],
+                                   [c - f for c, f in zip(capacity, free)],
+                                   list(visit_ct))
+                if completed < cadet_ct:
+                    heappush(heap, (now + interval, seq, _SAMPLE, cadet_id, 0))
+                    seq += 1
+
+        self.completed_ct = completed
+        self.now = now
+        # Samples belong to this run's observers and are rescheduled on resume
+        heap = [event for event in heap if event[2] != _SAMPLE]
+        heapq.heapify(heap)
+        self._engine_state = {
+            "heap": heap, "seq": seq, "now": now, "completed": completed,
+            "busy": [c - f for c, f in zip(capacity, free)],
+            "queues": queues, "urgent": urgent, "immediate": immediate,
+        }
+        if paused:
+            if verbose:
+                print(f"Simulation paused at {now:.3f} h")
+            return
+        self.queue_stats.close(now)
+
+        for observer in self.observers:
+            observer.on_finish(self)
+
+        if verbose:
+            print("Simulation complete")
+
+
+def cross_check(n_reps: int, mod_path: str = 'std', usmaps_path: str = 'rand',
+                seed: int = None, alpha: float = 0.01) -> Dict:
+    """
+    Run both engines on the same seeds and compare them.
+
+    The cohort, the per-arc flow counts and the visits per station must match
+    exactly (they depend only on the seed and routing). Completion time, mean
+    cycle time and peak queues are compared as distributions with Welch's
+    t-test and a two-sample Kolmogorov-Smirnov test, and the number of
+    replications whose event logs are identical is reported.
+
+    Args:
+        n_reps: Number of replications per engine
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        seed: Base seed shared by both engines
+        alpha: Significance level below which a KPI is flagged
+
+    Returns:
+        Dictionary with 'kpis' (DataFrame of per-KPI comparisons),
+        'exact_mismatches' (replications whose flows differ),
+        'identical_logs' (replications with identical event logs),
+        'seconds' (wall time per engine) and 'passed'
+    """
+    import pandas as pd
+    from scipy import stats
+    from replications import replication_seeds
+
+    engines = {"simpy": RDaySimulation, "fast": FastRDaySimulation}
+    rows = {name: [] for name in engines}
+    seconds = dict.fromkeys(engines, 0.0)
+    exact_mismatches = []
+    identical_logs = 0
+
+    for rep_idx, rep_seed in enumerate(replication_seeds(seed, n_reps)):
+        sims = {}
+        for name, engine in engines.items():
+            tic = timer.perf_counter()
+            sim = engine(mod_path=mod_path, usmaps_path=usmaps_path,
+                         output_dir=os.getcwd(), seed=rep_seed)
+            sim.run(verbose=False)
+            seconds[name] += timer.perf_counter() - tic
+            sims[name] = sim
+
+            summary = sim.summary()
+            row = {"completion_time": summary["completion_time"],
+                   "mean_cycle_time": summary["mean_cycle_time"]}
+            for station, peak in zip(sim.station_list, summary["peak_queue"]):
+                row[f"peak_q_{station}"] = peak
+            rows[name].append(row)
+
+        ref, fast = sims["simpy"], sims["fast"]
+        if not (np.array_equal(ref.arc_ct, fast.arc_ct)
+                and ref.visit_ct == fast.visit_ct
+                and np.array_equal(ref.cadets.cls, fast.cadets.cls)
+                and np.array_equal(ref.cadets.arrival_time, fast.cadets.arrival_time)):
+            exact_mismatches.append(rep_idx)
+        if ref.time_stamp.to_frame().equals(fast.time_stamp.to_frame()):
+            identical_logs += 1
+
+    df_ref = pd.DataFrame(rows["simpy"])
+    df_fast = pd.DataFrame(rows["fast"])
+    comparisons = []
+    for kpi in df_ref.columns:
+        a, b = df_ref[kpi].to_numpy(float), df_fast[kpi].to_numpy(float)
+        if np.array_equal(a, b) or (a.std() == 0 and b.std() == 0):
+            t_p = ks_p = 1.0 if a.mean() == b.mean() else 0.0
+        else:
+            t_p = stats.ttest_ind(a, b, equal_var=False).pvalue
+            ks_p = stats.ks_2samp(a, b).pvalue
+        comparisons.append({"kpi": kpi, "simpy_mean": a.mean(), "fast_mean": b.mean(),
+                            "identical_reps": int(np.sum(a == b)),
+                            "welch_p": t_p, "ks_p": ks_p})
+    df_kpis = pd.DataFrame(comparisons).set_index("kpi")
+
+    passed = (not exact_mismatches and
+              bool((df_kpis[["welch_p", "ks_p"]] >= alpha).all().all()))
+    return {"kpis": df_kpis, "exact_mismatches": exact_mismatches,
+            "identical_logs": identical_logs, "seconds": seconds, "passed": passed}
+
+
+def parse_arguments():
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='Cross-check the fast R-Day engine against the SimPy engine',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python fast_engine.py --replications 200 --seed 1
+  python fast_engine.py --usmaps front --mod mod --replications 50
+        """
+    )
+
+    parser.add_argument(
+        '--usmaps',
+        choices=['rand', 'front', 'back'],
+        default='rand',
+        help='USMAPS cadet distribution strategy (default: rand)'
+    )
+
+    parser.add_argument(
+        '--mod',
+        choices=['mod', 'std'],
+        default='std',
+        help='Modification path: modified or standard (default: std)'
+    )
+
+    parser.add_argument(
+        '--replications',
+        type=int,
+        default=100,
+        help='Replications per engine (default: 100)'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Base seed shared by both engines (default: fresh entropy)'
+    )
+
+    parser.add_argument(
+        '--alpha',
+        type=float,
+        default=0.01,
+        help='Significance level for flagging a KPI (default: 0.01)'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    import pandas as pd
+
+    args = parse_arguments()
+
+    result = cross_check(args.replications, mod_path=args.mod,
+                         usmaps_path=args.usmaps, seed=args.seed, alpha=args.alpha)
+
+    with pd.option_context("display.width", 120, "display.max_rows", None):
+        print(result["kpis"].to_string(float_format=lambda v: f"{v:.4f}"))
+    seconds = result["seconds"]
+    print(f"simpy: {seconds['simpy']:.2f}s  fast: {seconds['fast']:.2f}s  "
+          f"speed-up: {seconds['simpy'] / max(seconds['fast'], 1e-9):.1f}x")
+    print(f"Identical event logs: {result['identical_logs']}/{args.replications}")
+    if result["exact_mismatches"]:
+        print(f"Cohort/flow mismatch in replications {result['exact_mismatches']}")
+    print("PASSED" if result["passed"] else "FAILED")
+    sys.exit(0 if result["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
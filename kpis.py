@@ -0,0 +1,521 @@
+"""
+Vectorized waiting-time and cycle-time KPIs from the columnar event log.
+
+Every logged visit carries the time the cadet joined the station's queue
+(request_time), the time service started (start_time) and the time it
+finished (time), so the wait at a station is start_time - request_time and a
+cadet's cycle time runs from its request at the first station to the finish
+of the visit that routes it to the exit. Time held in the Bus Movement and
+Oath batch queues comes before the batch station's request, so it counts
+toward cycle time but not toward waits. compute_kpis derives per-station
+wait distributions, per-cadet cycle time and total wait, and per-class
+percentiles of both from the log's columns with a fixed number of NumPy
+passes (one sort per grouping, no Python loop over visits or cadets). It
+reads the EventLog buffers directly, so a replication pays no DataFrame
+conversion. A streamed log is never read back: StreamedWaits folds each
+chunk into per-station and per-cadet totals as it is flushed, keeping memory
+bounded by the station and cadet counts. The command line runs compute_kpis
+across many fast-engine replications, each worker returning one flat row.
+
+Usage:
+    python kpis.py --replications 1000 --workers 8
+"""
+
+import argparse
+import os
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Mapping, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from routing import cadet_class, CLASS_NAMES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Percentiles reported for every wait and cycle-time distribution
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+# Bin width of the per-station wait histograms of streamed logs (hours);
+# their percentiles are exact to half a bin (3 seconds)
+STREAM_WAIT_RESOLUTION = 0.1 / 60
+
+# Event log columns the KPIs are computed from
+KPI_COLUMNS = ("entity", "stn_idx", "next_stn", "request_time", "start_time", "time")
+
+
+def log_columns(source) -> Dict[str, np.ndarray]:
+    """
+    The KPI columns of an event log as NumPy arrays.
+
+    Args:
+        source: EventLog (its buffered rows, without copying) or an event
+            log DataFrame (e.g. from results_io.read_time_stamp)
+
+    Returns:
+        Column name -> array
+    """
+    missing = [name for name in KPI_COLUMNS if name not in source.columns]
+    if missing:
+        raise ValueError(f"Event log has no {', '.join(missing)} column(s); logs "
+                         f"written before request times were recorded need a rerun")
+    if hasattr(source, "column"):
+        return {name: source.column(name) for name in KPI_COLUMNS}
+    return {name: source[name].to_numpy() for name in KPI_COLUMNS}
+
+
+def group_stats(groups: np.ndarray, values: np.ndarray, group_ct: int,
+                quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, np.ndarray]:
+    """
+    Count, mean, max and quantiles of values per group, from a single sort.
+
+    Quantiles interpolate linearly between order statistics, as
+    np.quantile does by default.
+
+    Args:
+        groups: Group code of each value, in range(group_ct)
+        values: Values (NaNs must be removed beforehand)
+        group_ct: Number of groups
+        quantiles: Probabilities in [0, 1]
+
+    Returns:
+        Dictionary with 'count', 'mean' and 'max' (group_ct,) and
+        'quantiles' (group_ct, len(quantiles)); statistics of empty groups
+        are NaN
+    """
+    q = np.asarray(quantiles, dtype=np.float64)
+    counts = np.bincount(groups, minlength=group_ct)
+    stats = {
+        "count": counts,
+        "mean": np.full(group_ct, np.nan),
+        "max": np.full(group_ct, np.nan),
+        "quantiles": np.full((group_ct, len(q)), np.nan),
+    }
+    filled = counts > 0
+    if not filled.any():
+        return stats
+
+    ordered = values[np.lexsort((values, groups))]
+    starts = np.cumsum(counts) - counts
+    sums = np.bincount(groups, weights=values, minlength=group_ct)
+    stats["mean"][filled] = sums[filled] / counts[filled]
+    stats["max"][filled] = ordered[starts[filled] + counts[filled] - 1]
+
+    # Fractional rank of each quantile within its group's sorted run
+    rank = (counts[filled, None] - 1) * q[None, :]
+    below = np.floor(rank).astype(np.int64)
+    above = np.minimum(below + 1, counts[filled, None] - 1)
+    frac = rank - below
+    base = starts[filled, None]
+    stats["quantiles"][filled] = (ordered[base + below] * (1 - frac)
+                                  + ordered[base + above] * frac)
+    return stats
+
+
+def compute_kpis(columns: Mapping[str, np.ndarray], cadets, station_ct: int,
+                 quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict:
+    """
+    Waiting-time and cycle-time KPIs of one run.
+
+    A wait is the time between joining a station's queue and starting
+    service. Cadets held in the Bus Movement or Oath batch queue request the
+    station only when their batch is released, so time spent in a batch is
+    not part of any wait; it does count toward the cycle time.
+
+    Args:
+        columns: Event log columns (see log_columns)
+        cadets: CadetTable of the run (for each cadet's class)
+        station_ct: Number of stations
+        quantiles: Percentiles to report, as probabilities
+
+    Returns:
+        Dictionary with
+        'quantiles': the probabilities reported;
+        'visit_wait': wait of every logged visit (hours);
+        'station_wait': group_stats of the waits per station code;
+        'cadet_wait', 'cycle_time': total wait and arrival-to-completion
+            time per cadet id (NaN for cadets that did not finish);
+        'class_wait', 'class_cycle': group_stats of those per class
+            (indexed like CLASS_NAMES, by sex and USMAPS flag)
+    """
+    entity = columns["entity"]
+    stn_idx = columns["stn_idx"]
+    next_stn = columns["next_stn"]
+    wait = columns["start_time"] - columns["request_time"]
+    cadet_slots = len(cadets.sex)
+
+    # Arrival is the request at the first station; completion the finish of
+    # the visit that routes the cadet to the exit
+    arrival = np.full(cadet_slots, np.nan)
+    entry = stn_idx == 0
+    arrival[entity[entry]] = columns["request_time"][entry]
+    completion = np.full(cadet_slots, np.nan)
+    exits = next_stn < 0
+    completion[entity[exits]] = columns["time"][exits]
+    cycle_time = completion - arrival
+
+    cadet_wait = np.bincount(entity, weights=wait, minlength=cadet_slots)
+
+    kpis = {"quantiles": tuple(quantiles), "visit_wait": wait,
+            "station_wait": group_stats(stn_idx.astype(np.int64), wait, station_ct,
+                                        quantiles)}
+    kpis.update(_cadet_kpis(cadets, cycle_time, cadet_wait, quantiles))
+    return kpis
+
+
+def _cadet_kpis(cadets, cycle_time: np.ndarray, cadet_wait: np.ndarray,
+                quantiles: Sequence[float]) -> Dict:
+    """
+    Per-cadet and per-class entries of the KPI dictionary.
+
+    Args:
+        cadets: CadetTable of the run
+        cycle_time: Arrival-to-completion time per cadet id (NaN if not done)
+        cadet_wait: Total wait per cadet id
+        quantiles: Percentiles to report, as probabilities
+
+    Returns:
+        Dictionary with 'cadet_wait', 'cycle_time', 'class_wait' and
+        'class_cycle' (see compute_kpis)
+    """
+    cadet_wait = np.where(np.isnan(cycle_time), np.nan, cadet_wait)
+
+    # Classes by sex and USMAPS flag, whatever the routing path
+    cls = cadet_class(cadets.sex == 0, cadets.usmaps, 'mod')
+    done = np.flatnonzero(~np.isnan(cycle_time))
+    class_ct = len(CLASS_NAMES)
+    return {
+        "cadet_wait": cadet_wait,
+        "cycle_time": cycle_time,
+        "class_wait": group_stats(cls[done], cadet_wait[done], class_ct, quantiles),
+        "class_cycle": group_stats(cls[done], cycle_time[done], class_ct, quantiles),
+    }
+
+
+class StreamedWaits:
+    """
+    Wait and cycle-time totals of a streamed event log, folded in chunk by
+    chunk as the log flushes.
+
+    Counts, means and maxima match compute_kpis; per-station wait
+    percentiles come from a histogram with STREAM_WAIT_RESOLUTION bins and
+    are exact to half a bin, and per-class percentiles are exact (they only
+    need per-cadet totals).
+
+    Attributes:
+        count: Visits per station
+        wait_sum: Total wait per station (hours)
+        wait_max: Longest wait per station (NaN before any visit)
+        cadet_wait: Total wait per cadet id
+        arrival: Request time at the first station per cadet id
+        completion: Finish time of the exit visit per cadet id
+        resolution: Histogram bin width (hours)
+    """
+
+    def __init__(self, station_ct: int, cadet_slots: int,
+                 resolution: float = STREAM_WAIT_RESOLUTION):
+        self.count = np.zeros(station_ct, dtype=np.int64)
+        self.wait_sum = np.zeros(station_ct)
+        self.wait_max = np.full(station_ct, np.nan)
+        self.cadet_wait = np.zeros(cadet_slots)
+        self.arrival = np.full(cadet_slots, np.nan)
+        self.completion = np.full(cadet_slots, np.nan)
+        self.resolution = resolution
+        self._hist = np.zeros((station_ct, 64), dtype=np.int64)
+
+    def on_flush(self, log):
+        """EventLog flush listener: fold in the rows about to be written."""
+        self.add(log_columns(log))
+
+    def add(self, columns: Mapping[str, np.ndarray]):
+        """
+        Fold in a chunk of visits.
+
+        Args:
+            columns: Event log columns of the chunk (see log_columns)
+        """
+        entity = columns["entity"]
+        if not len(entity):
+            return
+        stn_idx = columns["stn_idx"].astype(np.int64)
+        wait = columns["start_time"] - columns["request_time"]
+        station_ct = len(self.count)
+
+        self.count += np.bincount(stn_idx, minlength=station_ct)
+        self.wait_sum += np.bincount(stn_idx, weights=wait, minlength=station_ct)
+        chunk_max = np.full(station_ct, -np.inf)
+        np.maximum.at(chunk_max, stn_idx, wait)
+        self.wait_max = np.fmax(self.wait_max,
+                                np.where(np.isinf(chunk_max), np.nan, chunk_max))
+        self.cadet_wait += np.bincount(entity, weights=wait,
+                                       minlength=len(self.cadet_wait))
+
+        entry = stn_idx == 0
+        self.arrival[entity[entry]] = columns["request_time"][entry]
+        exits = columns["next_stn"] < 0
+        self.completion[entity[exits]] = columns["time"][exits]
+
+        bins = (wait / self.resolution).astype(np.int64)
+        bin_ct = self._hist.shape[1]
+        if bins.max() >= bin_ct:
+            while bin_ct <= bins.max():
+                bin_ct *= 2
+            grown = np.zeros((station_ct, bin_ct), dtype=np.int64)
+            grown[:, :self._hist.shape[1]] = self._hist
+            self._hist = grown
+        self._hist += np.bincount(stn_idx * bin_ct + bins,
+                                  minlength=station_ct * bin_ct).reshape(station_ct, bin_ct)
+
+    def kpis(self, cadets, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict:
+        """
+        KPIs of the visits folded in so far.
+
+        Args:
+            cadets: CadetTable of the run
+            quantiles: Percentiles to report, as probabilities
+
+        Returns:
+            Dictionary as returned by compute_kpis, with 'visit_wait' None
+        """
+        q = np.asarray(quantiles, dtype=np.float64)
+        filled = self.count > 0
+        station_q = np.full((len(self.count), len(q)), np.nan)
+        if filled.any():
+            # Bin holding each quantile's order statistic, read at its centre
+            cum = np.cumsum(self._hist[filled], axis=1)
+            rank = (self.count[filled, None] - 1) * q[None, :]
+            bins = np.array([np.searchsorted(row, r, side='right')
+                             for row, r in zip(cum, rank)])
+            station_q[filled] = np.minimum((bins + 0.5) * self.resolution,
+                                           self.wait_max[filled, None])
+        with np.errstate(invalid="ignore"):
+            mean = self.wait_sum / self.count
+        kpis = {"quantiles": tuple(quantiles), "visit_wait": None,
+                "station_wait": {"count": self.count.copy(), "mean": mean,
+                                 "max": self.wait_max.copy(), "quantiles": station_q}}
+        kpis.update(_cadet_kpis(cadets, self.completion - self.arrival,
+                                self.cadet_wait, quantiles))
+        return kpis
+
+
+def sim_kpis(sim, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict:
+    """
+    KPIs of a finished simulation.
+
+    An in-memory log is reduced directly; a streamed log is flushed and the
+    totals its StreamedWaits listener gathered are used, so the log is never
+    read back.
+
+    Args:
+        sim: Simulation run with its event log recorded
+        quantiles: Percentiles to report, as probabilities
+
+    Returns:
+        Dictionary as returned by compute_kpis ('visit_wait' is None for a
+        streamed log)
+    """
+    log = sim.time_stamp
+    if log.writer is None:
+        return compute_kpis(log_columns(log), sim.cadets, len(sim.station_list),
+                            quantiles)
+    totals = [listener for listener in log.flush_listeners
+              if isinstance(listener, StreamedWaits)]
+    if not totals:
+        raise ValueError("Streamed event log has no StreamedWaits listener")
+    log.flush()
+    return totals[0].kpis(sim.cadets, quantiles)
+
+
+def quantile_label(q: float) -> str:
+    """Column label of a percentile, e.g. 0.95 -> 'p95'."""
+    return f"p{q * 100:g}"
+
+
+def kpi_frames(kpis: Dict, station_names: List[str]) -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+    """
+    Tabulate KPIs per station and per cadet class.
+
+    Args:
+        kpis: Dictionary from compute_kpis
+        station_names: Station names, indexed by station code
+
+    Returns:
+        (stations, classes): waits per station (visits, mean, max and
+        percentiles, in minutes), and cycle time and total wait per class
+        (cadets, mean and percentiles, in hours)
+    """
+    import pandas as pd
+
+    labels = [quantile_label(q) for q in kpis["quantiles"]]
+
+    def table(stats, prefix, scale):
+        data = {f"{prefix}_mean": stats["mean"] * scale}
+        for k, label in enumerate(labels):
+            data[f"{prefix}_{label}"] = stats["quantiles"][:, k] * scale
+        data[f"{prefix}_max"] = stats["max"] * scale
+        return data
+
+    stations = pd.DataFrame({"visits": kpis["station_wait"]["count"],
+                             **table(kpis["station_wait"], "wait_min", 60)},
+                            index=pd.Index(station_names, name="station"))
+    classes = pd.DataFrame({"cadets": kpis["class_cycle"]["count"],
+                            **table(kpis["class_cycle"], "cycle", 1),
+                            **table(kpis["class_wait"], "wait", 1)},
+                           index=pd.Index(CLASS_NAMES, name="cadet_class"))
+    return stations, classes
+
+
+def flat_kpis(kpis: Dict, station_names: List[str]) -> Dict[str, float]:
+    """
+    KPIs as one flat row, for replication tables.
+
+    Args:
+        kpis: Dictionary from compute_kpis
+        station_names: Station names, indexed by station code
+
+    Returns:
+        Dictionary of mean and percentile waits per station (minutes) and
+        cycle times per class (hours)
+    """
+    labels = [quantile_label(q) for q in kpis["quantiles"]]
+    row = {}
+    for stn, station in enumerate(station_names):
+        stats = kpis["station_wait"]
+        row[f"wait_mean_{station}"] = stats["mean"][stn] * 60
+        for k, label in enumerate(labels):
+            row[f"wait_{label}_{station}"] = stats["quantiles"][stn, k] * 60
+    for c, name in enumerate(CLASS_NAMES):
+        stats = kpis["class_cycle"]
+        row[f"cycle_mean_{name}"] = stats["mean"][c]
+        for k, label in enumerate(labels):
+            row[f"cycle_{label}_{name}"] = stats["quantiles"][c, k]
+    return row
+
+
+def run_kpi_replication(task: Tuple) -> Dict:
+    """
+    Run one fast-engine replication and return its flat KPI row.
+
+    Args:
+        task: Tuple of (replication index, mod_path, usmaps_path, seed,
+            quantiles)
+
+    Returns:
+        Flat dictionary of per-replication KPIs
+    """
+    from fast_engine import FastRDaySimulation
+
+    rep_idx, mod_path, usmaps_path, seed, quantiles = task
+    sim = FastRDaySimulation(mod_path, usmaps_path, output_dir=os.getcwd(), seed=seed)
+    sim.run(verbose=False)
+    row = {"replication": rep_idx}
+    row.update(flat_kpis(sim_kpis(sim, quantiles), sim.station_list))
+    return row
+
+
+def parse_arguments():
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='R-Day Simulation - waiting-time and cycle-time KPIs '
+                    'across replications',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python kpis.py --replications 1000 --workers 8
+  python kpis.py --mod mod --usmaps front --replications 200 --quantiles 0.5 0.9 0.99
+        """
+    )
+
+    parser.add_argument(
+        '--usmaps',
+        type=str,
+        choices=['rand', 'front', 'back'],
+        default='rand',
+        help='USMAPS cadet distribution strategy (default: rand)'
+    )
+
+    parser.add_argument(
+        '--mod',
+        type=str,
+        choices=['mod', 'std'],
+        default='std',
+        help='Modification path: modified or standard (default: std)'
+    )
+
+    parser.add_argument(
+        '--replications',
+        type=int,
+        default=100,
+        help='Number of replications (default: 100)'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Base seed (default: fresh entropy)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Worker processes (default: number of CPUs)'
+    )
+
+    parser.add_argument(
+        '--quantiles',
+        type=float,
+        nargs='+',
+        default=list(DEFAULT_QUANTILES),
+        help='Percentiles to report, as probabilities (default: 0.5 0.9 0.95 0.99)'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    from config import dir_setup
+    from replications import replication_seeds, summarize_replications
+
+    args = parse_arguments()
+    output_dir = dir_setup()
+
+    tasks = [(rep_idx, args.mod, args.usmaps, rep_seed, tuple(args.quantiles))
+             for rep_idx, rep_seed in enumerate(replication_seeds(args.seed,
+                                                                  args.replications))]
+    start = timer.perf_counter()
+    if args.workers <= 1:
+        rows = [run_kpi_replication(task) for task in tasks]
+    else:
+        chunk = max(1, len(tasks) // (4 * args.workers))
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            rows = list(executor.map(run_kpi_replication, tasks, chunksize=chunk))
+    elapsed = timer.perf_counter() - start
+
+    import pandas as pd
+    df_reps = pd.DataFrame(rows)
+    df_summary = summarize_replications(df_reps)
+
+    stem = f"{args.mod}_{args.usmaps}"
+    results_file = os.path.join(output_dir, f"wait_kpis_{stem}.csv")
+    summary_file = os.path.join(output_dir, f"wait_kpi_summary_{stem}.csv")
+    df_reps.to_csv(results_file, index=False)
+    df_summary.to_csv(summary_file)
+
+    cycle_rows = [name for name in df_summary.index if name.startswith("cycle_")]
+    print(df_summary.loc[cycle_rows, ["mean", "ci_low", "ci_high"]].to_string())
+    print(f"{len(df_reps)} replications in {elapsed:.2f}s")
+    print(f"Per-replication KPIs saved to {results_file}")
+    print(f"KPI summary saved to {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Live-state observers for the R-Day simulation.
+
+Observers subscribe to an RDaySimulation with add_observer() and receive
+every station visit as it is logged plus periodic snapshots of per-station
+queue length, in-service count and cumulative throughput taken by a SimPy
+sampling process. Consumers such as the frame renderer or a metrics
+aggregator can then work incrementally instead of reconstructing state from
+the full event log after the run.
+"""
+
+import numpy as np
+from typing import Dict, List
+
+
+class SimulationObserver:
+    """
+    Base class for simulation observers; override the hooks you need.
+    """
+
+    def on_visit(self, sim, cadet_id: int, stn_idx: int, start_time: float,
+                 finish_time: float, next_stn_idx: int):
+        """
+        Called when a cadet starts service at a station.
+
+        Args:
+            sim: Simulation being observed
+            cadet_id: Cadet identifier
+            stn_idx: Station index
+            start_time: Service start time (hours after SIMULATION_START_TIME)
+            finish_time: Service finish time
+            next_stn_idx: Index of the next station (negative at exit)
+        """
+
+    def on_sample(self, sim, time: float, queue: List[int],
+                  in_service: List[int], throughput: List[int]):
+        """
+        Called every sampling interval of simulated time.
+
+        Args:
+            sim: Simulation being observed
+            time: Sample time (hours after SIMULATION_START_TIME)
+            queue: Cadets waiting per station
+            in_service: Busy servers per station
+            throughput: Cumulative service starts per station
+        """
+
+    def on_finish(self, sim):
+        """
+        Called once the run is complete.
+
+        Args:
+            sim: Simulation being observed
+        """
+
+
+class FrameStateRecorder(SimulationObserver):
+    """
+    Collects periodic samples into the per-frame state table used by the
+    dashboard renderer (see build_images.compute_frame_states), without
+    needing the event log.
+    """
+
+    def __init__(self):
+        self.times = []
+        self.queue = []
+        self.in_svc = []
+        self.done = []
+        self.arc = []
+        self.cap = None
+
+    def on_sample(self, sim, time, queue, in_service, throughput):
+        if self.cap is None:
+            self.cap = [r.capacity for r in sim.resource_list]
+        self.times.append(time)
+        self.queue.append(queue)
+        self.in_svc.append(in_service)
+        self.done.append(throughput)
+        self.arc.append(sim.arc_ct.copy())
+
+    def states(self) -> Dict:
+        """
+        Per-frame state table of the samples recorded so far.
+
+        Returns:
+            Dictionary with 'time', 'queue', 'in_svc', 'cap', 'done' and
+            'arc' entries, as returned by build_images.compute_frame_states
+        """
+        frame_ct = len(self.times)
+        return {
+            "time": np.array(self.times),
+            "queue": np.array(self.queue, dtype=np.int64).reshape(frame_ct, -1),
+            "in_svc": np.array(self.in_svc, dtype=np.int64).reshape(frame_ct, -1),
+            "cap": np.tile(np.array(self.cap or [], dtype=np.int64), (frame_ct, 1)),
+            "done": np.array(self.done, dtype=np.int64).reshape(frame_ct, -1),
+            "arc": (np.array(self.arc) if self.arc
+                    else np.zeros((0, 0, 1), dtype=np.int64)),
+        }
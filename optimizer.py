@@ -0,0 +1,451 @@
+"""
+Staffing optimizer for the R-Day simulation.
+
+Searches per-station server counts for a plan that finishes R-Day by a
+target time without exceeding a total-staff budget. The search is a local
+search over single-server moves: moving one server between two stations,
+or adding (removing) one server while the plan is under (over) budget. Each
+iteration pre-screens the moves with the analytic estimator, then races the
+incumbent against the most promising ones with the full simulation:
+
+- every candidate runs the same seeded replications (common random
+  numbers), so candidates are compared on paired differences
+- replications are added in rounds, and after each round a candidate whose
+  paired difference to the current leader is significantly positive is
+  dropped, so dominated candidates stop consuming replications early
+- the race ends when one candidate is left or the replication cap is hit
+
+A move is only taken when it beats the incumbent significantly on the paired
+replications. The search stops when the incumbent meets the target with
+confidence (upper confidence bound of its mean completion time at or before
+the target) or when no move beats it.
+"""
+
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from config import dir_setup, STATION_DIC, SIMULATION_START_TIME
+from estimator import screen_staffing
+from replications import replication_seeds, run_tasks
+from routing import compile_station_table, NO_BATCH
+from simulation import REPLICATION_ENGINES, BATCH_ENGINE
+from sweep import staffing_label
+
+# Stations with at least this many servers model rooms or vehicles rather
+# than staffed service points, and are left out of the search by default
+STAFFED_SERVER_MAX = 100
+
+
+def parse_clock(text: str) -> float:
+    """
+    Convert a clock time to hours after SIMULATION_START_TIME.
+
+    Args:
+        text: Time as "HH:MM" (24-hour clock) or decimal hours of the day
+
+    Returns:
+        Hours after SIMULATION_START_TIME
+    """
+    if ":" in text:
+        hours, minutes = text.split(":")
+        clock = int(hours) + int(minutes) / 60
+    else:
+        clock = float(text)
+    return clock - SIMULATION_START_TIME
+
+
+def default_stations() -> List[str]:
+    """
+    Stations searched by default: staffed service points, not batch stations.
+
+    Returns:
+        Station names in STATION_DIC order
+    """
+    table = compile_station_table(STATION_DIC)
+    return [name for idx, name in enumerate(table.names)
+            if table.batch[idx] == NO_BATCH and table.server_ct[idx] < STAFFED_SERVER_MAX]
+
+
+def neighbours(staffing: Dict[str, int], budget: int) -> List[Dict[str, int]]:
+    """
+    Plans one server move away from a staffing plan.
+
+    Args:
+        staffing: Station name -> server count of the searched stations
+        budget: Total servers allowed over the searched stations
+
+    Returns:
+        Plans that remove one server while over budget; otherwise plans
+        that move one server between two stations, plus plans that add one
+        server while under budget
+    """
+    total = sum(staffing.values())
+    if total > budget:
+        return [{**staffing, stn: ct - 1} for stn, ct in staffing.items() if ct > 1]
+
+    moves = []
+    if total < budget:
+        moves += [{**staffing, stn: ct + 1} for stn, ct in staffing.items()]
+    for src, dst in itertools.permutations(staffing, 2):
+        if staffing[src] > 1:
+            moves.append({**staffing, src: staffing[src] - 1, dst: staffing[dst] + 1})
+    return moves
+
+
+def _run_batch_block(task) -> np.ndarray:
+    """Completion times of one candidate's block on the batch engine."""
+    from batch_engine import run_batch
+    return run_batch(task)["completion_time"].to_numpy()
+
+
+def evaluate(candidates: List[Dict[str, int]], seeds: List, first_rep: int,
+             mod_path: str, usmaps_path: str, engine: str = BATCH_ENGINE,
+             workers: int = 1) -> np.ndarray:
+    """
+    Completion times of candidate plans on a common set of replications.
+
+    Args:
+        candidates: Staffing plans
+        seeds: Replication seeds, shared by every candidate
+        first_rep: Replication index of seeds[0]
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        engine: Simulation engine
+        workers: Number of worker processes
+
+    Returns:
+        (candidates, replications) completion times
+    """
+    if engine == BATCH_ENGINE:
+        tasks = [(first_rep, seeds, mod_path, usmaps_path, staffing)
+                 for staffing in candidates]
+        if workers <= 1:
+            return np.array([_run_batch_block(task) for task in tasks])
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return np.array(list(executor.map(_run_batch_block, tasks)))
+
+    tasks = [(first_rep + i, mod_path, usmaps_path, seed, staffing, engine)
+             for staffing in candidates for i, seed in enumerate(seeds)]
+    rows = run_tasks(tasks, workers)
+    return np.array([row["completion_time"] for row in rows]).reshape(len(candidates), -1)
+
+
+def race(candidates: List[Dict[str, int]], seeds: List, mod_path: str,
+         usmaps_path: str, engine: str = BATCH_ENGINE, workers: int = 1,
+         round_size: int = 10, alpha: float = 0.05) -> Tuple[int, np.ndarray]:
+    """
+    Race candidate plans on common random numbers, dropping dominated ones.
+
+    Args:
+        candidates: Staffing plans
+        seeds: Replication seeds; their count caps the replications per plan
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        engine: Simulation engine
+        workers: Number of worker processes
+        round_size: Replications added per round
+        alpha: One-sided significance level of an elimination
+
+    Returns:
+        (index of the winner, (candidates, replications) completion times
+        with NaN where a candidate was no longer run)
+    """
+    times = np.full((len(candidates), len(seeds)), np.nan)
+    alive = list(range(len(candidates)))
+    done = 0
+    while done < len(seeds):
+        block = slice(done, min(done + round_size, len(seeds)))
+        times[alive, block] = evaluate([candidates[c] for c in alive], seeds[block],
+                                       done, mod_path, usmaps_path, engine, workers)
+        done = block.stop
+        if len(alive) == 1:
+            break
+        if done < 2:
+            continue
+
+        means = times[alive, :done].mean(axis=1)
+        leader = alive[int(np.argmin(means))]
+        t_crit = stats.t.ppf(1 - alpha, done - 1)
+        survivors = []
+        for c in alive:
+            diff = times[c, :done] - times[leader, :done]
+            bound = diff.mean() - t_crit * diff.std(ddof=1) / np.sqrt(done)
+            if c == leader or not bound > 0:
+                survivors.append(c)
+        alive = survivors
+
+    means = np.array([times[c, :done].mean() for c in alive])
+    return alive[int(np.argmin(means))], times
+
+
+def plan_label(staffing: Dict[str, int]) -> str:
+    """
+    Label of a plan by its changes to STATION_DIC ("baseline" if none).
+
+    Args:
+        staffing: Station name -> server count
+
+    Returns:
+        Label such as "TH 2 Finance=16; CA 2 Barber Shop=15"
+    """
+    changes = {stn: ct for stn, ct in staffing.items()
+               if ct != STATION_DIC[stn]["server_ct"]}
+    return staffing_label(changes) or "baseline"
+
+
+def optimize_staffing(target: float, budget: int = None, stations: List[str] = None,
+                      mod_path: str = 'std', usmaps_path: str = 'rand', seed: int = None,
+                      engine: str = BATCH_ENGINE, workers: int = 1, max_reps: int = 50,
+                      round_size: int = 10, screen: int = 6, alpha: float = 0.05,
+                      max_iter: int = 20) -> Tuple[Dict[str, int], pd.DataFrame]:
+    """
+    Local search for a staffing plan that finishes by the target time.
+
+    Args:
+        target: Target completion time (hours after SIMULATION_START_TIME)
+        budget: Total servers over the searched stations (default: their
+            current total)
+        stations: Stations to search (default: default_stations())
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        seed: Base seed of the common random numbers
+        engine: Simulation engine
+        workers: Number of worker processes
+        max_reps: Replications per candidate at most
+        round_size: Replications added per racing round
+        screen: Moves raced per iteration, best by analytic estimate
+            (0 races every move)
+        alpha: Significance level of eliminations and of the target check
+        max_iter: Maximum search iterations
+
+    Returns:
+        (best plan, DataFrame with one row per raced candidate)
+    """
+    table = compile_station_table(STATION_DIC)
+    stations = stations or default_stations()
+    unknown = set(stations) - set(table.names)
+    if unknown:
+        raise ValueError(f"Unknown station(s): {sorted(unknown)}")
+    incumbent = {name: int(table.server_ct[table.index[name]]) for name in stations}
+    budget = sum(incumbent.values()) if budget is None else budget
+    seeds = replication_seeds(seed, max_reps)
+
+    history = []
+    for iteration in range(1, max_iter + 1):
+        feasible = sum(incumbent.values()) <= budget
+        moves = neighbours(incumbent, budget)
+        if screen and len(moves) > screen:
+            ranked = screen_staffing(moves, mod_path, usmaps_path, keep=screen)
+            moves = [moves[c] for c in ranked.loc[ranked["promising"], "candidate"]]
+        candidates = ([incumbent] if feasible else []) + moves
+        if not candidates:
+            break
+
+        winner, times = race(candidates, seeds, mod_path, usmaps_path, engine,
+                             workers, round_size, alpha)
+        for c, plan in enumerate(candidates):
+            reps = times[c][~np.isnan(times[c])]
+            history.append({
+                "iteration": iteration,
+                "plan": plan_label(plan),
+                "total_staff": sum(plan.values()),
+                "replications": len(reps),
+                "mean": reps.mean(),
+                "ci_high": _upper_bound(reps, alpha),
+                "incumbent": feasible and c == 0,
+                "winner": c == winner,
+            })
+        best = candidates[winner]
+        best_reps = times[winner][~np.isnan(times[winner])]
+        print(f"Iteration {iteration}: {plan_label(best)} -> mean completion "
+              f"{best_reps.mean():.3f} h over {len(best_reps)} replications "
+              f"({len(candidates)} raced)")
+
+        if feasible and winner != 0 and not _beats(times[winner], times[0], alpha):
+            # Not significantly better than the incumbent: a local optimum
+            break
+        incumbent = best
+        met = sum(best.values()) <= budget and _upper_bound(best_reps, alpha) <= target
+        if met or (feasible and winner == 0):
+            break
+
+    return incumbent, pd.DataFrame(history)
+
+
+def _beats(challenger: np.ndarray, incumbent: np.ndarray, alpha: float) -> bool:
+    """
+    Whether a challenger finishes significantly earlier than the incumbent.
+
+    An incumbent dropped from the race (NaN in later rounds) was already
+    significantly worse than the leader.
+    """
+    if np.isnan(incumbent).any():
+        return True
+    diff = challenger - incumbent
+    return _upper_bound(diff, alpha) < 0
+
+
+def _upper_bound(values: np.ndarray, alpha: float) -> float:
+    """One-sided upper confidence bound of the mean."""
+    if len(values) < 2:
+        return np.inf
+    t_crit = stats.t.ppf(1 - alpha, len(values) - 1)
+    return values.mean() + t_crit * values.std(ddof=1) / np.sqrt(len(values))
+
+
+def parse_arguments():
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='R-Day Simulation - staffing optimizer under a total-staff budget',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python optimizer.py --target 14:00
+  python optimizer.py --target 14:15 --budget 170 --mod mod --workers 8
+  python optimizer.py --target 14:00 --station "TH 2 Finance" --station "CA 1 Issue Point 2 (WB4)"
+        """
+    )
+
+    parser.add_argument(
+        '--target',
+        required=True,
+        help='Target completion clock time, "HH:MM" or decimal hours'
+    )
+
+    parser.add_argument(
+        '--budget',
+        type=int,
+        default=None,
+        help='Total servers over the searched stations (default: current total)'
+    )
+
+    parser.add_argument(
+        '--station',
+        action='append',
+        default=None,
+        help='Station to search (repeatable; default: staffed, non-batch stations)'
+    )
+
+    parser.add_argument(
+        '--usmaps',
+        choices=['rand', 'front', 'back'],
+        default='rand',
+        help='USMAPS cadet distribution strategy (default: rand)'
+    )
+
+    parser.add_argument(
+        '--mod',
+        choices=['mod', 'std'],
+        default='std',
+        help='Modification path: modified or standard (default: std)'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Base seed of the common random numbers (default: fresh entropy)'
+    )
+
+    parser.add_argument(
+        '--engine',
+        choices=REPLICATION_ENGINES,
+        default=BATCH_ENGINE,
+        help=f'Simulation engine (default: {BATCH_ENGINE})'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Worker processes (default: number of CPUs)'
+    )
+
+    parser.add_argument(
+        '--max-reps',
+        type=int,
+        default=50,
+        help='Replications per candidate at most (default: 50)'
+    )
+
+    parser.add_argument(
+        '--round-size',
+        type=int,
+        default=10,
+        help='Replications added per racing round (default: 10)'
+    )
+
+    parser.add_argument(
+        '--screen',
+        type=int,
+        default=6,
+        help='Moves raced per iteration, best by analytic estimate; 0 races '
+             'every move (default: 6)'
+    )
+
+    parser.add_argument(
+        '--alpha',
+        type=float,
+        default=0.05,
+        help='Significance level of eliminations and the target check (default: 0.05)'
+    )
+
+    parser.add_argument(
+        '--max-iter',
+        type=int,
+        default=20,
+        help='Maximum search iterations (default: 20)'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_arguments()
+    target = parse_clock(args.target)
+
+    best, history = optimize_staffing(
+        target, budget=args.budget, stations=args.station, mod_path=args.mod,
+        usmaps_path=args.usmaps, seed=args.seed, engine=args.engine,
+        workers=args.workers, max_reps=args.max_reps, round_size=args.round_size,
+        screen=args.screen, alpha=args.alpha, max_iter=args.max_iter)
+
+    output_dir = dir_setup()
+    history_file = os.path.join(output_dir, "staffing_search.csv")
+    history.to_csv(history_file, index=False)
+
+    print(f"Best plan: {plan_label(best)} ({sum(best.values())} servers)")
+    if args.budget is not None and sum(best.values()) > args.budget:
+        print(f"Still over the budget of {args.budget} servers after "
+              f"{args.max_iter} iterations; raise --max-iter")
+
+    # The plan's own most recent statistics (it may have been dropped from
+    # the last race, or never raced when no candidate fit the budget)
+    runs = history[history["plan"] == plan_label(best)] if len(history) else history
+    if len(runs):
+        final = runs.iloc[-1]
+        met = final["ci_high"] <= target
+        print(f"Mean completion {final['mean']:.3f} h after start over "
+              f"{final['replications']} replications (upper bound "
+              f"{final['ci_high']:.3f} h); target {target:.3f} h "
+              f"{'met' if met else 'not met'}")
+    else:
+        print("No candidate plan was simulated; check --budget and --station")
+    print(f"Search history saved to {history_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Online time-weighted queue and utilization statistics per station.
+
+The event log records the queue length only when a cadet starts service, so
+averaging or plotting those samples over-weights busy moments and misses how
+long each queue length lasted. QueueStats instead integrates each station's
+queue length and busy-server count over time: the engines call update()
+whenever a request, grant or release changes a station, and the area since
+the previous change is added in O(1). Peaks count queue lengths held for a
+positive time, so instantaneous hand-overs at one time stamp (which the two
+engines order differently) do not register. The same areas are also
+accumulated into fixed-width time bins, giving binned average queue,
+utilization and per-bin peak queue series without keeping or post-processing
+the per-visit list.
+
+Server counts may change mid-run (a checkpoint restored with different
+staffing); each change is recorded with its time, so utilization divides
+busy server-hours by the server-hours actually available in each interval.
+
+State is kept in plain Python lists (one slot per station), which keeps the
+per-event update free of NumPy scalar access on the engines' hot paths.
+"""
+
+from typing import List, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Width of the binned series, in hours
+DEFAULT_BIN_WIDTH = 5 / 60
+
+
+class QueueStats:
+    """
+    Time-weighted accumulators of queue length and busy servers per station.
+
+    Attributes:
+        station_names: Station names, indexed by station code
+        capacity: Current servers per station (see set_capacity)
+        bin_width: Width of the binned series in hours
+        queue_area: Integral of queue length over time per station
+            (cadet-hours waiting)
+        busy_area: Integral of busy servers over time per station
+            (server-hours of service)
+        end_time: Time up to which the areas are complete
+    """
+
+    def __init__(self, station_names: List[str], capacity: List[int],
+                 bin_width: float = DEFAULT_BIN_WIDTH):
+        station_ct = len(station_names)
+        self.station_names = list(station_names)
+        self.capacity = [int(c) for c in capacity]
+        self.bin_width = bin_width
+        self.queue_area = [0.0] * station_ct
+        self.busy_area = [0.0] * station_ct
+        self.end_time = 0.0
+        # (time, servers per station) at the start and at every change
+        self._capacity_changes = [(0.0, list(self.capacity))]
+        # Per station: [time of last change, queue length, busy servers]
+        self._state = [[0.0, 0, 0] for _ in range(station_ct)]
+        # Per station: [queue area, busy area, peak queue] per bin
+        self._bins = [[] for _ in range(station_ct)]
+
+    @property
+    def max_queue(self) -> List[int]:
+        """Largest queue length held at each station (for any positive time)."""
+        return [max((b[2] for b in bins), default=0) for bins in self._bins]
+
+    def set_capacity(self, now: float, capacity: List[int]):
+        """
+        Change the server counts from a point in time on; earlier intervals
+        keep the servers they had.
+
+        Args:
+            now: Time of the change (hours)
+            capacity: Servers per station from now on
+        """
+        capacity = [int(c) for c in capacity]
+        if capacity != self.capacity:
+            self._capacity_changes.append((now, capacity))
+            self.capacity = capacity
+
+    def capacity_area(self, edges: np.ndarray) -> np.ndarray:
+        """
+        Server-hours available per station between consecutive time edges.
+
+        Args:
+            edges: Increasing interval edges in hours, shape (B + 1,)
+
+        Returns:
+            Array of shape (B, stations)
+        """
+        starts, ends = edges[:-1, None], edges[1:, None]
+        area = np.zeros((len(edges) - 1, len(self.station_names)))
+        times = [t for t, _ in self._capacity_changes[1:]] + [np.inf]
+        for (begin, capacity), end in zip(self._capacity_changes, times):
+            overlap = np.clip(np.minimum(ends, end) - np.maximum(starts, begin), 0, None)
+            area += overlap * np.array(capacity)
+        return area
+
+    def utilization(self) -> List[float]:
+        """
+        Busy server-hours over available server-hours per station, over
+        [0, end_time].
+
+        Returns:
+            Utilization per station (NaN before any time has elapsed)
+        """
+        if self.end_time <= 0:
+            return [np.nan] * len(self.station_names)
+        available = self.capacity_area(np.array([0.0, self.end_time]))[0]
+        return (np.array(self.busy_area) / available).tolist()
+
+    def update(self, stn: int, now: float, queue: int, busy: int):
+        """
+        Record a station's new state, closing the interval since its last change.
+
+        Args:
+            stn: Station code
+            now: Current simulated time (hours)
+            queue: Cadets now waiting at the station
+            busy: Servers now busy at the station
+        """
+        state = self._state[stn]
+        last, held_queue, held_busy = state
+        if now > last and (held_queue or held_busy):
+            span = now - last
+            self.queue_area[stn] += held_queue * span
+            self.busy_area[stn] += held_busy * span
+            bins = self._bins[stn]
+            k = int(last // self.bin_width)
+            if k < len(bins) and now <= (k + 1) * self.bin_width:
+                # Interval inside one existing bin (the common case)
+                acc = bins[k]
+                acc[0] += held_queue * span
+                acc[1] += held_busy * span
+                if held_queue > acc[2]:
+                    acc[2] = held_queue
+            else:
+                self._accumulate_bins(bins, last, now, held_queue, held_busy)
+        state[0] = now
+        state[1] = queue
+        state[2] = busy
+
+    def _accumulate_bins(self, bins: List, start: float, end: float,
+                         queue: int, busy: int):
+        """Spread a constant-state interval over the bins it covers."""
+        width = self.bin_width
+        k = int(start // width)
+        while len(bins) <= int(end // width):
+            bins.append([0.0, 0.0, 0])
+        while start < end:
+            stop = min(end, (k + 1) * width)
+            if stop > start:
+                acc = bins[k]
+                acc[0] += queue * (stop - start)
+                acc[1] += busy * (stop - start)
+                if queue > acc[2]:
+                    acc[2] = queue
+                start = stop
+            k += 1
+
+    def close(self, now: float):
+        """
+        Extend every station's current state to the end of the run.
+
+        Args:
+            now: End time of the run (hours)
+        """
+        for stn, (_, queue, busy) in enumerate(self._state):
+            self.update(stn, now, queue, busy)
+        self.end_time = max(self.end_time, now)
+
+    def station_frame(self) -> "pd.DataFrame":
+        """
+        Per-station KPIs over [0, end_time].
+
+        Returns:
+            DataFrame indexed by station name with time-average queue
+            length, utilization, max queue, the queue and busy areas and the
+            server-hours available
+        """
+        import pandas as pd
+
+        horizon = self.end_time if self.end_time > 0 else np.nan
+        queue_area = np.array(self.queue_area)
+        busy_area = np.array(self.busy_area)
+        available = self.capacity_area(np.array([0.0, max(self.end_time, 0.0)]))[0]
+        return pd.DataFrame({
+            "avg_queue": queue_area / horizon,
+            "utilization": self.utilization(),
+            "max_queue": self.max_queue,
+            "queue_area": queue_area,
+            "busy_area": busy_area,
+            "capacity_area": available,
+        }, index=pd.Index(self.station_names, name="station"))
+
+    def binned(self) -> dict:
+        """
+        Fixed-interval series for every station.
+
+        Returns:
+            Dictionary with 'bin_start' (B,) bin start times in hours and
+            'avg_queue', 'utilization' and 'max_queue' (B, stations)
+        """
+        bin_ct = max((len(bins) for bins in self._bins), default=0)
+        station_ct = len(self.station_names)
+        queue = np.zeros((bin_ct, station_ct))
+        busy = np.zeros((bin_ct, station_ct))
+        peak = np.zeros((bin_ct, station_ct), dtype=np.int64)
+        for stn, bins in enumerate(self._bins):
+            if bins:
+                acc = np.array(bins)
+                queue[:len(bins), stn] = acc[:, 0]
+                busy[:len(bins), stn] = acc[:, 1]
+                peak[:len(bins), stn] = acc[:, 2]
+        edges = np.arange(bin_ct + 1) * self.bin_width
+        with np.errstate(invalid="ignore", divide="ignore"):
+            utilization = busy / self.capacity_area(edges)
+        return {
+            "bin_start": edges[:-1],
+            "avg_queue": queue / self.bin_width,
+            "utilization": utilization,
+            "max_queue": peak,
+        }
+
+    def binned_frame(self) -> "pd.DataFrame":
+        """
+        Binned series in long form, one row per bin and station.
+
+        Returns:
+            DataFrame with bin_start, station, avg_queue, utilization and
+            max_queue columns
+        """
+        import pandas as pd
+
+        series = self.binned()
+        bin_ct, station_ct = series["avg_queue"].shape
+        return pd.DataFrame({
+            "bin_start": np.repeat(series["bin_start"], station_ct),
+            "station": np.tile(self.station_names, bin_ct),
+            "avg_queue": series["avg_queue"].ravel(),
+            "utilization": series["utilization"].ravel(),
+            "max_queue": series["max_queue"].ravel(),
+        })
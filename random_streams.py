@@ -0,0 +1,196 @@
+"""
+Pre-drawn random-variate streams for the R-Day simulation.
+
+Drawing one variate at a time through scipy.stats spends most of its time in
+distribution dispatch. RandomStreams draws service times, inter-arrival times
+and USMAPS coin flips in large NumPy batches from a seeded Generator and hands
+them out one at a time, refilling each stream on demand.
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Union
+
+from config import STATION_DIC, ARRIVAL_RATE
+
+# Number of variates drawn per refill of a stream
+DEFAULT_BATCH_SIZE = 4096
+
+
+class RandomStreams:
+    """
+    Batched random-variate provider backed by numpy.random.Generator.
+
+    Every station gets its own child stream so that changing the staffing or
+    routing at one station does not shift the service times drawn at the
+    others.
+
+    Attributes:
+        seed_seq: SeedSequence the child streams were spawned from
+        batch_size: Number of variates drawn per refill
+    """
+
+    def __init__(self, seed: Optional[Union[int, np.random.SeedSequence]] = None,
+                 station_dic: Dict = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize the random streams.
+
+        Args:
+            seed: Integer seed or SeedSequence (None draws fresh entropy)
+            station_dic: Station definitions (defaults to config.STATION_DIC)
+            batch_size: Number of variates drawn per refill
+        """
+        station_dic = station_dic or STATION_DIC
+        if isinstance(seed, np.random.SeedSequence):
+            # Spawn from a copy: spawning advances the caller's sequence, and a
+            # seed shared by several runs (common random numbers) must give
+            # each of them the same streams
+            self.seed_seq = np.random.SeedSequence(
+                seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size)
+        else:
+            self.seed_seq = np.random.SeedSequence(seed)
+        self.batch_size = batch_size
+
+        station_ct = len(station_dic)
+        children = self.seed_seq.spawn(station_ct + 2)
+        self._service_rngs = [np.random.default_rng(s) for s in children[:station_ct]]
+        self._arrival_rng = np.random.default_rng(children[station_ct])
+        self._uniform_rng = np.random.default_rng(children[station_ct + 1])
+
+        # Triangular parameters per station, converted from minutes to hours
+        self._service_params = []
+        for station in station_dic.values():
+            min_time, mode_time, max_time = (t / 60 for t in station["service_time"])
+            self._service_params.append((min_time, mode_time, max_time))
+
+        self._service_buf: List[List[float]] = [[] for _ in range(station_ct)]
+        self._service_pos = [0] * station_ct
+        self._arrival_buf: List[float] = []
+        self._arrival_pos = 0
+        self._uniform_buf: List[float] = []
+        self._uniform_pos = 0
+
+    def _draw_service_batch(self, stn_idx: int) -> List[float]:
+        """
+        Draw a batch of triangular service times for one station.
+
+        Args:
+            stn_idx: Station index
+
+        Returns:
+            List of service times in hours
+        """
+        min_time, mode_time, max_time = self._service_params[stn_idx]
+        if max_time == min_time:
+            return [min_time] * self.batch_size
+        return self._service_rngs[stn_idx].triangular(
+            min_time, mode_time, max_time, size=self.batch_size).tolist()
+
+    def service_time(self, stn_idx: int) -> float:
+        """
+        Next triangular service time for a station.
+
+        Args:
+            stn_idx: Station index
+
+        Returns:
+            Service time in hours
+        """
+        pos = self._service_pos[stn_idx]
+        buf = self._service_buf[stn_idx]
+        if pos >= len(buf):
+            buf = self._service_buf[stn_idx] = self._draw_service_batch(stn_idx)
+            pos = 0
+        self._service_pos[stn_idx] = pos + 1
+        return buf[pos]
+
+    def service_times(self, stn_idx: int, n: int) -> np.ndarray:
+        """
+        Next n triangular service times for a station, taken from the same
+        stream (and in the same order) as repeated service_time() calls.
+
+        Args:
+            stn_idx: Station index
+            n: Number of variates
+
+        Returns:
+            Array of service times in hours
+        """
+        pos = self._service_pos[stn_idx]
+        values = self._service_buf[stn_idx][pos:pos + n]
+        self._service_pos[stn_idx] = pos + len(values)
+        while len(values) < n:
+            self._service_buf[stn_idx] = self._draw_service_batch(stn_idx)
+            take = min(n - len(values), self.batch_size)
+            values = values + self._service_buf[stn_idx][:take]
+            self._service_pos[stn_idx] = take
+        return np.array(values)
+
+    def interarrival_time(self) -> float:
+        """
+        Next exponential inter-arrival time.
+
+        Returns:
+            Inter-arrival time in hours
+        """
+        if self._arrival_pos >= len(self._arrival_buf):
+            self._arrival_buf = self._arrival_rng.exponential(
+                scale=1 / ARRIVAL_RATE, size=self.batch_size).tolist()
+            self._arrival_pos = 0
+        value = self._arrival_buf[self._arrival_pos]
+        self._arrival_pos += 1
+        return value
+
+    def interarrival_times(self, n: int) -> np.ndarray:
+        """
+        Next n exponential inter-arrival times, taken from the same stream
+        (and in the same order) as repeated interarrival_time() calls.
+
+        Args:
+            n: Number of variates
+
+        Returns:
+            Array of inter-arrival times in hours
+        """
+        values = self._arrival_buf[self._arrival_pos:self._arrival_pos + n]
+        self._arrival_pos += len(values)
+        while len(values) < n:
+            self._arrival_buf = self._arrival_rng.exponential(
+                scale=1 / ARRIVAL_RATE, size=self.batch_size).tolist()
+            take = min(n - len(values), self.batch_size)
+            values = values + self._arrival_buf[:take]
+            self._arrival_pos = take
+        return np.array(values)
+
+    def uniforms(self, n: int) -> np.ndarray:
+        """
+        Next n standard uniform variates, taken from the same stream (and in
+        the same order) as repeated uniform() calls.
+
+        Args:
+            n: Number of variates
+
+        Returns:
+            Array of uniform variates on [0, 1)
+        """
+        values = self._uniform_buf[self._uniform_pos:self._uniform_pos + n]
+        self._uniform_pos += len(values)
+        while len(values) < n:
+            self._uniform_buf = self._uniform_rng.random(self.batch_size).tolist()
+            take = min(n - len(values), self.batch_size)
+            values = values + self._uniform_buf[:take]
+            self._uniform_pos = take
+        return np.array(values)
+
+    def uniform(self) -> float:
+        """
+        Next standard uniform variate (used for USMAPS coin flips).
+
+        Returns:
+            Uniform variate on [0, 1)
+        """
+        if self._uniform_pos >= len(self._uniform_buf):
+            self._uniform_buf = self._uniform_rng.random(self.batch_size).tolist()
+            self._uniform_pos = 0
+        value = self._uniform_buf[self._uniform_pos]
+        self._uniform_pos += 1
+        return value
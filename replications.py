@@ -0,0 +1,292 @@
+"""
+Multi-replication runner for the R-Day simulation.
+
+Independent, seeded RDaySimulation instances are fanned out across a process
+pool. Each worker returns only a compact summary (completion time, mean
+cycle time and peak queue per station) so the full event logs never cross
+process boundaries.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from config import STATION_DIC
+from simulation import create_simulation, BATCH_ENGINE
+
+
+def replication_seeds(seed: int, n_reps: int) -> List[np.random.SeedSequence]:
+    """
+    Spawn statistically independent seeds for a set of replications.
+
+    Args:
+        seed: Base seed (None draws fresh entropy)
+        n_reps: Number of replications
+
+    Returns:
+        One SeedSequence per replication
+    """
+    return np.random.SeedSequence(seed).spawn(n_reps)
+
+
+def run_replication(task: Tuple) -> Dict:
+    """
+    Run one replication and return its compact summary.
+
+    Args:
+        task: Tuple of (replication index, mod_path, usmaps_path, seed,
+            staffing overrides or None, engine name)
+
+    Returns:
+        Flat dictionary of per-replication KPIs
+    """
+    rep_idx, mod_path, usmaps_path, seed, staffing, engine = task
+    sim = create_simulation(engine, mod_path=mod_path, usmaps_path=usmaps_path,
+                            output_dir=os.getcwd(), seed=seed, staffing=staffing)
+    sim.run(verbose=False)
+    return kpi_row(sim, rep_idx)
+
+
+def kpi_row(sim, rep_idx: int) -> Dict:
+    """
+    Compact KPI summary of a finished simulation.
+
+    Args:
+        sim: Simulation that has run to completion
+        rep_idx: Replication index recorded in the row
+
+    Returns:
+        Flat dictionary of per-replication KPIs
+    """
+    summary = sim.summary()
+    row = {"replication": rep_idx, "completion_time": summary["completion_time"],
+           "mean_cycle_time": summary["mean_cycle_time"]}
+    for station, peak in zip(sim.station_list, summary["peak_queue"]):
+        row[f"peak_q_{station}"] = peak
+    return row
+
+
+def run_tasks(tasks: List[Tuple], workers: int = 1) -> List[Dict]:
+    """
+    Run replication tasks, in-process or across a process pool.
+
+    Args:
+        tasks: Replication task tuples (see run_replication)
+        workers: Number of worker processes (1 runs in-process)
+
+    Returns:
+        Per-replication summaries in task order
+    """
+    if workers <= 1:
+        return [run_replication(task) for task in tasks]
+
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_replication, tasks, chunksize=chunksize))
+
+
+def run_block(seeds: List, first_rep: int, mod_path: str = 'std',
+              usmaps_path: str = 'rand', workers: int = 1,
+              engine: str = 'simpy') -> pd.DataFrame:
+    """
+    Run the replications of one block of seeds.
+
+    Args:
+        seeds: Replication seeds
+        first_rep: Replication index of seeds[0]
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        workers: Number of worker processes
+        engine: Simulation engine ('simpy', 'fast' or 'batch')
+
+    Returns:
+        DataFrame with one row per replication
+    """
+    if engine == BATCH_ENGINE:
+        from batch_engine import run_batched_replications
+        df = run_batched_replications(seeds, mod_path, usmaps_path, workers=workers)
+        df["replication"] += first_rep
+        return df
+
+    tasks = [(first_rep + i, mod_path, usmaps_path, s, None, engine)
+             for i, s in enumerate(seeds)]
+    return pd.DataFrame(run_tasks(tasks, workers))
+
+
+def run_replications(n_reps: int, mod_path: str = 'std', usmaps_path: str = 'rand',
+                     seed: int = None, workers: int = 1,
+                     engine: str = 'simpy') -> pd.DataFrame:
+    """
+    Run independent replications of one scenario.
+
+    Args:
+        n_reps: Number of replications
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        seed: Base seed for the replication streams
+        workers: Number of worker processes
+        engine: Simulation engine ('simpy', 'fast' or 'batch')
+
+    Returns:
+        DataFrame with one row per replication
+    """
+    print(f"Running {n_reps} replications of {mod_path} {usmaps_path} "
+          f"on {workers} worker(s)")
+    return run_block(replication_seeds(seed, n_reps), 0, mod_path, usmaps_path,
+                     workers, engine)
+
+
+def kpi_names() -> List[str]:
+    """
+    Names of the per-replication KPIs (columns of run_replication rows).
+
+    Returns:
+        KPI names
+    """
+    return (["completion_time", "mean_cycle_time"]
+            + [f"peak_q_{station}" for station in STATION_DIC])
+
+
+def parse_precision(specs: List[str]) -> Dict[str, Tuple[float, bool]]:
+    """
+    Parse --precision specs of the form "<kpi>=<tol>" or "<kpi>=<pct>%".
+
+    Args:
+        specs: Raw --precision arguments
+
+    Returns:
+        KPI name -> (tolerance, whether it is relative to the mean)
+    """
+    targets = {}
+    for spec in specs:
+        kpi, sep, value = spec.rpartition("=")
+        relative = value.endswith("%")
+        try:
+            tolerance = float(value.rstrip("%"))
+        except ValueError:
+            tolerance = None
+        if not sep or not kpi or tolerance is None or tolerance <= 0:
+            raise ValueError(f"Bad precision spec '{spec}': expected "
+                             f"'<kpi>=<half-width>' or '<kpi>=<percent>%'")
+        targets[kpi] = (tolerance / 100 if relative else tolerance, relative)
+
+    unknown = set(targets) - set(kpi_names())
+    if unknown:
+        raise ValueError(f"Unknown KPI(s) in precision targets: {sorted(unknown)}; "
+                         f"expected one of {kpi_names()}")
+    return targets
+
+
+def precision_met(df_summary: pd.DataFrame,
+                  targets: Dict[str, Tuple[float, bool]]) -> pd.DataFrame:
+    """
+    Compare confidence-interval half-widths with their tolerances.
+
+    Args:
+        df_summary: Output of summarize_replications
+        targets: KPI name -> (tolerance, relative), from parse_precision
+
+    Returns:
+        DataFrame indexed by KPI with the half-width, the tolerance in KPI
+        units and whether it is met
+    """
+    rows = {}
+    for kpi, (tolerance, relative) in targets.items():
+        half_width = df_summary.loc[kpi, "ci_high"] - df_summary.loc[kpi, "mean"]
+        limit = tolerance * abs(df_summary.loc[kpi, "mean"]) if relative else tolerance
+        rows[kpi] = {"half_width": half_width, "tolerance": limit,
+                     "met": bool(half_width <= limit)}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def run_until_precise(targets: Dict[str, Tuple[float, bool]], mod_path: str = 'std',
+                      usmaps_path: str = 'rand', seed: int = None, workers: int = 1,
+                      engine: str = 'simpy', round_size: int = 20, min_reps: int = 10,
+                      max_reps: int = 10000,
+                      confidence: float = 0.95) -> Tuple[pd.DataFrame, bool]:
+    """
+    Add replications in parallel rounds until every KPI is precise enough.
+
+    After each round the confidence-interval half-width of every target KPI
+    is compared with its tolerance; the run stops as soon as all are met
+    (with at least min_reps replications) or max_reps is reached.
+    Replication i always uses the same seed, so a run that stops after n
+    replications matches the first n of a fixed-size run.
+
+    Args:
+        targets: KPI name -> (tolerance, relative), from parse_precision
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
+        seed: Base seed for the replication streams
+        workers: Number of worker processes
+        engine: Simulation engine ('simpy', 'fast' or 'batch')
+        round_size: Replications launched per round
+        min_reps: Replications before the stopping rule applies
+        max_reps: Replication cap
+        confidence: Confidence level of the intervals
+
+    Returns:
+        (per-replication KPIs, whether every target was met)
+    """
+    seeds = replication_seeds(seed, max_reps)
+    frames = []
+    done = 0
+    met = False
+    goals = [f"{kpi} +/- {tol * 100:g}%" if relative else f"{kpi} +/- {tol:g}"
+             for kpi, (tol, relative) in targets.items()]
+    print(f"Running replications of {mod_path} {usmaps_path} in rounds of "
+          f"{round_size} on {workers} worker(s) until {', '.join(goals)}")
+    while done < max_reps and not met:
+        block = seeds[done:min(done + round_size, max_reps)]
+        frames.append(run_block(block, done, mod_path, usmaps_path, workers, engine))
+        done += len(block)
+        if done < max(min_reps, 2):
+            continue
+        df_reps = pd.concat(frames, ignore_index=True)
+        status = precision_met(summarize_replications(df_reps, confidence), targets)
+        met = bool(status["met"].all())
+        worst = (status["half_width"] / status["tolerance"]).idxmax()
+        print(f"  {done} replications: {worst} half-width "
+              f"{status.loc[worst, 'half_width']:.4g} "
+              f"(tolerance {status.loc[worst, 'tolerance']:.4g})")
+    return pd.concat(frames, ignore_index=True), met
+
+
+def summarize_replications(df_reps: pd.DataFrame,
+                           confidence: float = 0.95) -> pd.DataFrame:
+    """
+    Aggregate per-replication KPIs into means, quantiles and CIs.
+
+    Args:
+        df_reps: Per-replication KPIs (one row per replication)
+        confidence: Confidence level of the t-interval on the mean
+
+    Returns:
+        DataFrame indexed by KPI with mean, std, CI bounds and quantiles
+    """
+    kpis = df_reps.drop(columns=["replication"], errors="ignore")
+    n_reps = len(kpis)
+
+    mean = kpis.mean()
+    std = kpis.std(ddof=1) if n_reps > 1 else kpis.std(ddof=0)
+    if n_reps > 1:
+        t_crit = stats.t.ppf(0.5 + confidence / 2, n_reps - 1)
+        half_width = t_crit * std / np.sqrt(n_reps)
+    else:
+        half_width = mean * np.nan
+
+    return pd.DataFrame({
+        "n": n_reps,
+        "mean": mean,
+        "std": std,
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width,
+        "q05": kpis.quantile(0.05),
+        "q50": kpis.quantile(0.50),
+        "q95": kpis.quantile(0.95),
+        "max": kpis.max(),
+    })
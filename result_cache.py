@@ -0,0 +1,306 @@
+"""
+Content-addressed on-disk cache of simulation results and rendered frames.
+
+Each entry is a directory under output/cache named by the SHA-256 of
+everything that determines its contents: the entry kind, the scenario
+arguments, the seed, the simulation configuration (STATION_DIC and the
+constants in config.py) and the source of the modules that produce it. A
+seeded run of an unchanged scenario therefore maps to the same key, and
+changing any input or any line of engine code maps to a new one. Entries are
+written to a temporary directory and renamed into place, so an interrupted
+write never leaves a partial entry behind. The cache is bounded in size:
+every hit refreshes the entry's last-used stamp, and after each store the
+least recently used entries are evicted until the total fits the budget.
+
+Usage:
+    python result_cache.py            # list entries, least recently used first
+    python result_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+
+# Default location and size budget of the cache
+CACHE_DIR_NAME = "cache"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Source files whose code determines each kind of entry
+RUN_SOURCES = ("config.py", "simulation.py", "fast_engine.py", "random_streams.py",
+               "cadets.py", "routing.py", "event_log.py", "results_io.py",
+               "queue_stats.py", "kpis.py")
+FRAME_SOURCES = ("config.py", "build_images.py", "stitch_images.py", "results_io.py",
+                 "routing.py")
+
+# Entry metadata file (holds the key inputs, summary and last-used stamp)
+META_NAME = "meta.json"
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def file_digest(path: str) -> str:
+    """
+    SHA-256 of a file's contents.
+
+    Args:
+        path: File path
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version(sources=RUN_SOURCES) -> str:
+    """
+    Digest of the source files that produce an entry.
+
+    Args:
+        sources: File names relative to the package directory
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    for name in sources:
+        digest.update(name.encode())
+        digest.update(file_digest(os.path.join(_PACKAGE_DIR, name)).encode())
+    return digest.hexdigest()
+
+
+def config_fingerprint() -> Dict:
+    """
+    Current simulation configuration: STATION_DIC and the numeric constants
+    of config.py, read at call time so in-memory edits are seen.
+
+    Returns:
+        JSON-serializable dictionary
+    """
+    return {name: value for name, value in vars(config).items()
+            if name.isupper() and isinstance(value, (int, float, str, dict, list))}
+
+
+def _json_default(value):
+    """JSON encoding of NumPy scalars and arrays in keys and metadata."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cache key")
+
+
+class ResultCache:
+    """
+    Size-bounded, least-recently-used cache of result directories.
+
+    Attributes:
+        root: Cache directory
+        max_bytes: Total size budget; older entries are evicted beyond it
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or os.path.join(_PACKAGE_DIR, "output", CACHE_DIR_NAME)
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, kind: str, params: Dict, sources=RUN_SOURCES) -> str:
+        """
+        Content address of an entry.
+
+        Args:
+            kind: Entry kind (e.g. 'run' or 'frames')
+            params: Scenario arguments and seed
+            sources: Source files whose code determines the entry
+
+        Returns:
+            Hex digest
+        """
+        payload = {"kind": kind, "params": params, "config": config_fingerprint(),
+                   "code": code_version(sources)}
+        blob = json.dumps(payload, sort_keys=True, default=_json_default)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Find an entry and mark it as recently used.
+
+        Args:
+            key: Entry key
+
+        Returns:
+            Entry metadata with its 'path' and 'files', or None on a miss
+        """
+        entry = self._entry_dir(key)
+        meta_file = os.path.join(entry, META_NAME)
+        try:
+            with open(meta_file) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not all(os.path.isfile(os.path.join(entry, name)) for name in meta["files"]):
+            return None
+        meta["last_used"] = time.time()
+        with open(meta_file, "w") as f:
+            json.dump(meta, f, default=_json_default)
+        meta["path"] = entry
+        return meta
+
+    def store(self, key: str, files: List[str], meta: Dict = None) -> Dict:
+        """
+        Copy result files into a new entry, then evict down to the budget.
+
+        Args:
+            key: Entry key
+            files: Paths of the files to cache (stored by base name)
+            meta: Extra JSON-serializable metadata (e.g. summary statistics)
+
+        Returns:
+            Entry metadata, as returned by lookup
+        """
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            names = []
+            for path in files:
+                name = os.path.basename(path)
+                shutil.copy2(path, os.path.join(staging, name))
+                names.append(name)
+            entry_meta = dict(meta or {})
+            entry_meta.update({"key": key, "files": names, "last_used": time.time()})
+            with open(os.path.join(staging, META_NAME), "w") as f:
+                json.dump(entry_meta, f, default=_json_default)
+
+            entry = self._entry_dir(key)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry)
+            os.replace(staging, entry)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self.evict(keep=key)
+        entry_meta["path"] = entry
+        return entry_meta
+
+    def restore(self, meta: Dict, dest_dir: str) -> List[str]:
+        """
+        Copy an entry's files into a directory (as freshly written files,
+        so readers that pick the newest output see them).
+
+        Args:
+            meta: Entry metadata from lookup or store
+            dest_dir: Destination directory
+
+        Returns:
+            Paths of the restored files
+        """
+        paths = []
+        for name in meta["files"]:
+            dest = os.path.join(dest_dir, name)
+            shutil.copyfile(os.path.join(meta["path"], name), dest)
+            paths.append(dest)
+        return paths
+
+    def entries(self) -> List[Dict]:
+        """
+        Metadata of every complete entry, least recently used first.
+
+        Returns:
+            List of metadata dictionaries with 'path' and 'bytes' added
+        """
+        found = []
+        for name in os.listdir(self.root):
+            entry = self._entry_dir(name)
+            meta_file = os.path.join(entry, META_NAME)
+            if name.startswith(".") or not os.path.isfile(meta_file):
+                continue
+            try:
+                with open(meta_file) as f:
+                    meta = json.load(f)
+            except ValueError:
+                meta = {"last_used": 0.0}
+            meta["path"] = entry
+            meta["bytes"] = sum(os.path.getsize(os.path.join(entry, f))
+                                for f in os.listdir(entry))
+            found.append(meta)
+        found.sort(key=lambda m: m.get("last_used", 0.0))
+        return found
+
+    def evict(self, keep: str = None):
+        """
+        Remove least recently used entries until the cache fits its budget.
+
+        Args:
+            keep: Key of an entry never to evict (the one just stored)
+        """
+        entries = self.entries()
+        total = sum(meta["bytes"] for meta in entries)
+        for meta in entries:
+            if total <= self.max_bytes:
+                break
+            if os.path.basename(meta["path"]) == keep:
+                continue
+            shutil.rmtree(meta["path"], ignore_errors=True)
+            total -= meta["bytes"]
+
+    def clear(self):
+        """Remove every entry."""
+        for name in os.listdir(self.root):
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+def parse_arguments():
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='R-Day Simulation - list (default) or clear the result cache')
+    parser.add_argument(
+        '--clear',
+        action='store_true',
+        help='Remove every cached entry'
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_arguments()
+    cache = ResultCache()
+
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {cache.root}")
+        return
+
+    entries = cache.entries()
+    for meta in entries:
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta.get("last_used", 0)))
+        print(f"{os.path.basename(meta['path'])[:12]}  {meta.get('kind', '?'):7s} "
+              f"{meta['bytes'] / 1e6:9.1f} MB  last used {used}  "
+              f"{meta.get('label', '')}")
+    total = sum(meta["bytes"] for meta in entries)
+    print(f"{len(entries)} entries, {total / 1e6:.1f} MB of "
+          f"{cache.max_bytes / 1e6:.0f} MB in {cache.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Reading and writing the df_time_stamp event log in several file formats.
+
+CSV is kept for compatibility; Parquet and Feather (both need the optional
+pyarrow package) and NPZ are binary columnar formats that avoid the cost of
+formatting and re-parsing text. Readers auto-detect the format from the files
+present in the output directory and memory-map where the format allows it.
+"""
+
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Supported formats and their file extensions, in auto-detection order
+FORMAT_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "npz": ".npz",
+}
+FORMATS = list(FORMAT_EXTENSIONS)
+
+# Base name of the event log file in the output directory
+TIME_STAMP_NAME = "df_time_stamp"
+
+# Suffix of the NPZ entries that hold the categories of categorical columns
+_CATEGORIES_SUFFIX = ".categories"
+
+
+def _require_pyarrow(fmt: str):
+    """
+    Raise a helpful error if pyarrow (needed for parquet/feather) is missing.
+
+    Args:
+        fmt: Requested file format
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise ImportError(f"The '{fmt}' format requires pyarrow "
+                          f"(pip install pyarrow)") from exc
+
+
+def time_stamp_path(output_dir: str, fmt: str = "csv") -> str:
+    """
+    Path of the event log file for a given format.
+
+    Args:
+        output_dir: Output directory
+        fmt: File format (one of FORMATS)
+
+    Returns:
+        File path
+    """
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {FORMATS}")
+    return os.path.join(output_dir, TIME_STAMP_NAME + FORMAT_EXTENSIONS[fmt])
+
+
+def detect_format(path: str) -> str:
+    """
+    File format of an event log file, from its extension.
+
+    Args:
+        path: File path
+
+    Returns:
+        Format name (one of FORMATS)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in FORMAT_EXTENSIONS.items():
+        if ext == fmt_ext:
+            return fmt
+    raise ValueError(f"Cannot detect event log format of '{path}'")
+
+
+def find_time_stamp(output_dir: str, fmt: str = "auto") -> str:
+    """
+    Locate the event log in an output directory.
+
+    Args:
+        output_dir: Output directory
+        fmt: File format, or 'auto' to pick the most recently written log
+
+    Returns:
+        File path
+    """
+    if fmt != "auto":
+        return time_stamp_path(output_dir, fmt)
+
+    candidates = [time_stamp_path(output_dir, f) for f in FORMATS]
+    candidates = [p for p in candidates if os.path.exists(p)]
+    if not candidates:
+        raise FileNotFoundError(f"No {TIME_STAMP_NAME}.* event log in {output_dir}")
+    return max(candidates, key=os.path.getmtime)
+
+
+def write_time_stamp(df: "pd.DataFrame", output_dir: str, fmt: str = "csv") -> str:
+    """
+    Write the event log in the requested format.
+
+    Args:
+        df: Event log DataFrame
+        output_dir: Output directory
+        fmt: File format (one of FORMATS)
+
+    Returns:
+        Path of the written file
+    """
+    import pandas as pd
+
+    path = time_stamp_path(output_dir, fmt)
+
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "parquet":
+        _require_pyarrow(fmt)
+        df.to_parquet(path, index=False)
+    elif fmt == "feather":
+        _require_pyarrow(fmt)
+        # Uncompressed so readers can memory-map the columns
+        df.reset_index(drop=True).to_feather(path, compression="uncompressed")
+    elif fmt == "npz":
+        arrays = {}
+        for name in df.columns:
+            col = df[name]
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                arrays[name] = col.cat.codes.to_numpy()
+                arrays[name + _CATEGORIES_SUFFIX] = np.asarray(
+                    col.cat.categories, dtype=str)
+            else:
+                arrays[name] = col.to_numpy()
+        np.savez(path, **arrays)
+
+    return path
+
+
+class TimeStampWriter:
+    """
+    Writes an event log to its file chunk by chunk as a run progresses.
+
+    Only CSV can be appended to without holding the file open, so streamed
+    logs are always written as CSV.
+
+    Attributes:
+        path: Event log file
+        rows: Rows written so far
+    """
+
+    def __init__(self, output_dir: str, fmt: str = "csv"):
+        if fmt != "csv":
+            raise ValueError(f"Streamed event logs are written as csv, not '{fmt}'")
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = time_stamp_path(output_dir, fmt)
+        self.rows = 0
+
+    def write(self, df: "pd.DataFrame"):
+        """
+        Append rows to the file (the first call truncates it and writes the
+        header).
+
+        Args:
+            df: Event log chunk
+        """
+        first = self.rows == 0
+        df.to_csv(self.path, mode="w" if first else "a", header=first, index=False)
+        self.rows += len(df)
+
+
+def read_time_stamp(path: str, fmt: str = "auto") -> "pd.DataFrame":
+    """
+    Read an event log file or the event log of an output directory.
+
+    Args:
+        path: Event log file, or an output directory to search
+        fmt: File format, or 'auto' to detect it
+
+    Returns:
+        Event log DataFrame
+    """
+    import pandas as pd
+
+    if os.path.isdir(path):
+        path = find_time_stamp(path, fmt)
+    if fmt == "auto":
+        fmt = detect_format(path)
+
+    if fmt == "csv":
+        return pd.read_csv(path)
+    if fmt == "parquet":
+        _require_pyarrow(fmt)
+        return pd.read_parquet(path, memory_map=True)
+    if fmt == "feather":
+        _require_pyarrow(fmt)
+        from pyarrow import feather
+        return feather.read_table(path, memory_map=True).to_pandas()
+    if fmt == "npz":
+        data = {}
+        with np.load(path, allow_pickle=False) as npz:
+            for name in npz.files:
+                if name.endswith(_CATEGORIES_SUFFIX):
+                    continue
+                values = npz[name]
+                categories_key = name + _CATEGORIES_SUFFIX
+                if categories_key in npz.files:
+                    values = pd.Categorical.from_codes(values, npz[categories_key])
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    raise ValueError(f"Unknown format '{fmt}', expected one of {FORMATS}")
@@ -0,0 +1,271 @@
+"""
+Compiled, integer-indexed view of STATION_DIC.
+
+compile_station_table() turns the name-keyed station dictionary into NumPy
+arrays (and plain tuples for the per-visit hot path) indexed by station and
+cadet class, so the simulation never looks up station names while running.
+The routing graph is validated at compile time: every station a cadet class
+can reach must define that class's next station, indices must be in range,
+and every route must reach the exit without revisiting a station.
+
+Flows between stations are counted in a dense (stations, stations + 1) arc
+matrix whose last column stands for the exit; the simulation, the event log
+reader and the dashboard renderer all share this layout.
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+from config import STATION_DIC
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Cadet class codes: bit 0 set for female cadets, bit 1 set for USMAPS cadets
+# following the modified ('mod') path
+CLASS_CT = 4
+CLASS_NAMES = ("male", "female", "male USMAPS", "female USMAPS")
+
+# STATION_DIC routing field used by each cadet class
+ROUTE_FIELDS = ("next_stn", "next_fem_stn", "next_USMAPS_stn", "next_USMAPS_fem_stn")
+
+# Routing value marking the exit, and the fill value for routes a class never uses
+EXIT_STN = -99
+NO_ROUTE = -1
+
+# Stations with special handling
+BUS_STATION = "Bus Movement"
+OATH_STATION = "TH 6 Oath"
+FEMALE_SKIP_STATIONS = ("CA 2 Barber Shop",)  # female cadets take zero service time
+
+# Batch codes of stations whose arrivals are released in batches
+NO_BATCH = 0
+BUS_BATCH = 1
+OATH_BATCH = 2
+
+
+def cadet_class(is_female, is_usmaps, mod_path: str):
+    """
+    Cadet class code used to index the routing table.
+
+    Args:
+        is_female: Whether the cadet is female (bool or bool array)
+        is_usmaps: Whether the cadet is a USMAPS cadet (bool or bool array)
+        mod_path: Modification path ('mod' or 'std'); USMAPS routing only
+            applies on the modified path
+
+    Returns:
+        Class code in range(CLASS_CT), an int or an int array
+    """
+    if np.ndim(is_female) or np.ndim(is_usmaps):
+        return (np.asarray(is_female, dtype=np.int64)
+                + 2 * (np.asarray(is_usmaps, dtype=bool) & (mod_path == 'mod')))
+    return int(is_female) + 2 * int(is_usmaps and mod_path == 'mod')
+
+
+class StationTable:
+    """
+    Integer-indexed station and routing tables compiled from STATION_DIC.
+
+    Attributes:
+        names: Station names, indexed by station code
+        index: Station name -> station code
+        server_ct: Servers per station (after staffing overrides)
+        service_params: (stations, 3) triangular [min, mode, max] in hours
+        usmaps_frac: Service time multiplier for USMAPS cadets per station
+        female_skip: Whether female cadets skip service at each station
+        batch: Batch code per station (NO_BATCH, BUS_BATCH or OATH_BATCH)
+        next_stn: (CLASS_CT, stations) next station index per cadet class
+            (EXIT_STN at the exit, NO_ROUTE where the class never arrives)
+        routes: Station sequence followed by each cadet class
+        feeders: Per station, the stations that route cadets into it
+        bus_idx: Index of the bus movement station
+        oath_idx: Index of the oath station
+        exit_col: Arc matrix column that counts departures to the exit
+    """
+
+    def __init__(self, names, server_ct, service_params, usmaps_frac,
+                 female_skip, batch, next_stn, routes):
+        self.names = tuple(names)
+        self.index = {name: idx for idx, name in enumerate(self.names)}
+        self.server_ct = server_ct
+        self.service_params = service_params
+        self.usmaps_frac = usmaps_frac
+        self.female_skip = female_skip
+        self.batch = batch
+        self.next_stn = next_stn
+        self.routes = routes
+        feeders = [set() for _ in self.names]
+        for route in routes:
+            for src, dst in zip(route, route[1:]):
+                feeders[dst].add(src)
+        self.feeders = tuple(tuple(sorted(f)) for f in feeders)
+        self.bus_idx = self.index[BUS_STATION]
+        self.oath_idx = self.index[OATH_STATION]
+        self.exit_col = len(self.names)
+
+        # Plain-tuple copies for fast scalar access on the per-visit hot path
+        self.next_stn_rows = tuple(tuple(int(v) for v in row) for row in next_stn)
+        self.usmaps_frac_row = tuple(float(v) for v in usmaps_frac)
+        self.female_skip_row = tuple(bool(v) for v in female_skip)
+        self.batch_row = tuple(int(v) for v in batch)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def arc_matrix(station_ct: int) -> np.ndarray:
+    """
+    Empty arc counter matrix.
+
+    Args:
+        station_ct: Number of stations
+
+    Returns:
+        (station_ct, station_ct + 1) int64 zeros; entry [a, b] counts cadets
+        routed from station a to station b, column station_ct the exit
+    """
+    return np.zeros((station_ct, station_ct + 1), dtype=np.int64)
+
+
+def arc_column(next_stn, station_ct: int):
+    """
+    Arc matrix column of next-station indices (exit codes map to station_ct).
+
+    Args:
+        next_stn: Next station index, scalar or array
+        station_ct: Number of stations
+
+    Returns:
+        Column index, same shape as next_stn
+    """
+    return np.where(np.asarray(next_stn) < 0, station_ct, next_stn)
+
+
+def count_arcs(stn_idx: np.ndarray, next_stn: np.ndarray, station_ct: int) -> np.ndarray:
+    """
+    Arc counter matrix of a whole event log in one pass.
+
+    Args:
+        stn_idx: Station index per visit
+        next_stn: Next station index per visit (negative at the exit)
+        station_ct: Number of stations
+
+    Returns:
+        (station_ct, station_ct + 1) arc counts
+    """
+    code = (np.asarray(stn_idx, dtype=np.int64) * (station_ct + 1)
+            + arc_column(next_stn, station_ct))
+    counts = np.bincount(code, minlength=station_ct * (station_ct + 1))
+    return counts.reshape(station_ct, station_ct + 1)
+
+
+def flow_frame(arc_ct: np.ndarray, names) -> "pd.DataFrame":
+    """
+    Labelled flow matrix (from-station rows, to-station columns plus 'Exit').
+
+    Args:
+        arc_ct: Arc counter matrix
+        names: Station names
+
+    Returns:
+        DataFrame view of arc_ct
+    """
+    import pandas as pd
+
+    return pd.DataFrame(arc_ct, index=pd.Index(list(names), name="from_stn"),
+                        columns=list(names) + ["Exit"], copy=False)
+
+
+def _trace_route(next_row: np.ndarray, names: List[str], cls: int) -> Tuple[int, ...]:
+    """
+    Follow one cadet class from the first station to the exit.
+
+    Args:
+        next_row: Next-station row of the class
+        names: Station names
+        cls: Cadet class code
+
+    Returns:
+        Station indices visited, in order
+    """
+    route = []
+    stn = 0
+    while stn != EXIT_STN:
+        if stn in route:
+            loop = " -> ".join(names[s] for s in route + [stn])
+            raise ValueError(f"Routing loop for {CLASS_NAMES[cls]} cadets: {loop}")
+        route.append(stn)
+        nxt = int(next_row[stn])
+        if nxt == NO_ROUTE:
+            raise ValueError(f"Station '{names[stn]}' is reached by "
+                             f"{CLASS_NAMES[cls]} cadets but has no "
+                             f"'{ROUTE_FIELDS[cls]}'")
+        stn = nxt
+    return tuple(route)
+
+
+def compile_station_table(station_dic: Dict = None,
+                          staffing: Dict[str, int] = None) -> StationTable:
+    """
+    Compile and validate a station dictionary.
+
+    Args:
+        station_dic: Station definitions (defaults to config.STATION_DIC)
+        staffing: Station name -> server count overrides
+
+    Returns:
+        StationTable
+    """
+    station_dic = station_dic or STATION_DIC
+    staffing = staffing or {}
+    names = list(station_dic.keys())
+    station_ct = len(names)
+
+    unknown = set(staffing) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown station(s) in staffing: {sorted(unknown)}")
+    for required in (BUS_STATION, OATH_STATION):
+        if required not in station_dic:
+            raise ValueError(f"STATION_DIC has no '{required}' station")
+
+    server_ct = np.empty(station_ct, dtype=np.int64)
+    service_params = np.empty((station_ct, 3), dtype=np.float64)
+    usmaps_frac = np.empty(station_ct, dtype=np.float64)
+    next_stn = np.full((CLASS_CT, station_ct), NO_ROUTE, dtype=np.int64)
+
+    for idx, name in enumerate(names):
+        station = station_dic[name]
+        for key in ("server_ct", "service_time", "USMAPS_frac"):
+            if key not in station:
+                raise ValueError(f"Station '{name}' has no '{key}'")
+
+        server_ct[idx] = staffing.get(name, station["server_ct"])
+        if server_ct[idx] < 1:
+            raise ValueError(f"Station '{name}' needs at least one server")
+
+        min_time, mode_time, max_time = station["service_time"]
+        if not 0 <= min_time <= mode_time <= max_time:
+            raise ValueError(f"Station '{name}' service_time must satisfy "
+                             f"0 <= min <= mode <= max")
+        service_params[idx] = (min_time / 60, mode_time / 60, max_time / 60)
+        usmaps_frac[idx] = station["USMAPS_frac"]
+
+        for cls, field in enumerate(ROUTE_FIELDS):
+            if field not in station:
+                continue
+            nxt = station[field]
+            if nxt != EXIT_STN and not 0 <= nxt < station_ct:
+                raise ValueError(f"Station '{name}' {field}={nxt} is not a "
+                                 f"station index or the exit ({EXIT_STN})")
+            next_stn[cls, idx] = nxt
+
+    routes = tuple(_trace_route(next_stn[cls], names, cls) for cls in range(CLASS_CT))
+
+    female_skip = np.array([name in FEMALE_SKIP_STATIONS for name in names])
+    batch = np.full(station_ct, NO_BATCH, dtype=np.int64)
+    batch[names.index(BUS_STATION)] = BUS_BATCH
+    batch[names.index(OATH_STATION)] = OATH_BATCH
+
+    return StationTable(names, server_ct, service_params, usmaps_frac,
+                        female_skip, batch, next_stn, routes)
@@ -4,18 +4,26 @@ This eliminates global variables and improves code organization
 """
 
 import simpy
-from scipy import stats
-import matplotlib.pyplot as plt
-import pandas as pd
+import numpy as np
 import os
 import argparse
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 
 from config import (
-    dir_setup, STATION_DIC, TOTAL_CUSTOMERS, ARRIVAL_RATE,
-    SIMULATION_START_TIME, BUS_BATCH_SIZE, OATH_BATCH_SIZE,
-    USMAPS_COUNT_MAX, USMAPS_PROBABILITY, FEMALE_COUNT_MAX,
-    CUSTOMER_BATCH_SIZE
+    dir_setup, default_output_dir, STATION_DIC, TOTAL_CUSTOMERS,
+    CUSTOMER_BATCH_SIZE, SIMULATION_START_TIME, BUS_BATCH_SIZE, OATH_BATCH_SIZE
+)
+from random_streams import RandomStreams
+from cadets import Cohort, generate_cadet_table
+from event_log import EventLog
+from queue_stats import QueueStats
+from kpis import kpi_frames, sim_kpis, StreamedWaits
+from results_io import (
+    FORMATS, TimeStampWriter, read_time_stamp, time_stamp_path, write_time_stamp
+)
+from routing import (
+    compile_station_table, arc_matrix, flow_frame,
+    BUS_BATCH, OATH_BATCH, EXIT_STN
 )
 
 
@@ -28,172 +36,238 @@ class RDaySimulation:
         mod_path: Modification path ('mod' or 'std')
         usmaps_path: USMAPS distribution strategy ('rand', 'front', or 'back')
         output_dir: Directory for output files
+        streams: Batched random-variate streams driving the run
+        staffing: Per-station server_ct overrides applied to STATION_DIC
+        stations: Compiled, integer-indexed station and routing table
+        cohort: Intake size and composition (cadets per day, days, blocks)
+        cadets: Per-cadet attribute table, generated before the run
+        queue_stats: Online time-weighted queue and utilization statistics
+        observers: Subscribers notified of visits and periodic state samples
     """
     
     def __init__(self, mod_path: str = 'std', usmaps_path: str = 'rand', 
-                 output_dir: str = None):
+                 output_dir: str = None,
+                 seed: Union[int, np.random.SeedSequence] = None,
+                 staffing: Dict[str, int] = None, record_log: bool = True,
+                 cohort: Cohort = None, stream_log: bool = False):
         """
         Initialize the R-Day simulation.
         
         Args:
             mod_path: Modification path ('mod' or 'std')
             usmaps_path: USMAPS distribution strategy ('rand', 'front', 'back')
-            output_dir: Output directory path
+            output_dir: Output directory path (default: 'output' next to
+                config.py, created when results are first written)
+            seed: Seed or SeedSequence for the random-variate streams
+                (None for fresh entropy)
+            staffing: Station name -> server count overrides
+            record_log: Whether to keep the full event log (observers can
+                consume the run incrementally without it)
+            cohort: Intake size and composition (default: one day as set
+                in config.py)
+            stream_log: Write the event log to output_dir as CSV in chunks
+                while the run progresses instead of holding it in memory,
+                so memory stays bounded for large or multi-day cohorts
         """
         self.mod_path = mod_path
         self.usmaps_path = usmaps_path
-        self.output_dir = output_dir or dir_setup()
+        self.output_dir = output_dir or default_output_dir()
         
         # Initialize SimPy environment
         self.env = simpy.Environment()
         
-        # Station configuration
-        self.station_list = list(STATION_DIC.keys())
-        self.station_idx_dic = dict(zip(self.station_list, 
-                                       range(len(self.station_list))))
+        # Random-variate streams (drawn in batches, one stream per station)
+        self.streams = RandomStreams(seed)
+        
+        # Station configuration, compiled and validated once
+        self.staffing = dict(staffing or {})
+        self.stations = compile_station_table(STATION_DIC, self.staffing)
+        self.station_list = list(self.stations.names)
+        self.station_idx_dic = dict(self.stations.index)
         
         # Resources (servers at each station)
-        self.resource_list = []
-        for station_name in self.station_list:
-            server_count = STATION_DIC[station_name]["server_ct"]
-            self.resource_list.append(simpy.Resource(self.env, server_count))
+        self.resource_list = [simpy.Resource(self.env, int(server_count))
+                              for server_count in self.stations.server_ct]
         
         # Tracking data structures
-        self.time_stamp = []
-        self.arc_dic = {}
-        self.q_list = [[] for _ in self.station_list]
-        self.q_list_time = [[] for _ in self.station_list]
-        self.sex_dic = {}
-        self.usmaps_dic = {}
-        
-        # Batch queues
+        self.record_log = record_log
+        writer = TimeStampWriter(self.output_dir) if stream_log else None
+        self.time_stamp = EventLog(self.station_list, writer=writer)
+        self.arc_ct = arc_matrix(len(self.station_list))
+        self.visit_ct = [0] * len(self.station_list)
+        self.completed_ct = 0
+        self.queue_stats = QueueStats(self.station_list, self.stations.server_ct)
+        
+        # Whole cohort generated up front; plain lists of the attributes read
+        # on every visit keep the hot path free of NumPy scalar access
+        self.cohort = cohort or Cohort()
+        self.cadets = generate_cadet_table(self.streams, mod_path, usmaps_path,
+                                           self.cohort)
+        self._cadet_usmaps = self.cadets.usmaps.astype(bool).tolist()
+        self._cadet_female = (self.cadets.sex == 0).tolist()
+        self._cadet_routes = [self.stations.next_stn_rows[c]
+                              for c in self.cadets.cls.tolist()]
+        
+        # A streamed log hands each chunk to the wait totals before writing
+        # it, so the wait KPIs never need the log read back
+        if writer is not None:
+            self.time_stamp.flush_listeners.append(
+                StreamedWaits(len(self.station_list), len(self.cadets.sex)))
+        
+        # Batch queues, and the stations whose arcs feed each batch
         self.batch_bus_q = []
         self.batch_oath_q = []
+        self._bus_feeders = list(self.stations.feeders[self.stations.bus_idx])
+        self._oath_feeders = list(self.stations.feeders[self.stations.oath_idx])
+        
+        # Live-state subscribers and their sampling intervals
+        self.observers = []
+        self._sample_intervals = []
+    
+    def add_observer(self, observer, interval: float = None):
+        """
+        Subscribe an observer to station visits and periodic state samples.
+        
+        Args:
+            observer: SimulationObserver (see observers.py)
+            interval: Simulated hours between on_sample calls (None for
+                visit notifications only)
+        """
+        self.observers.append(observer)
+        if interval is not None:
+            if interval <= 0:
+                raise ValueError("Sampling interval must be positive")
+            self._sample_intervals.append((observer, interval))
     
-    def calculate_service_time(self, station: str, cadet_id: int) -> float:
+    def sample_state(self, observer, interval: float):
+        """
+        Periodically send a state snapshot to one observer until every cadet
+        has completed R-Day.
+        
+        Args:
+            observer: Observer receiving on_sample calls
+            interval: Simulated hours between samples
+        """
+        while self.completed_ct < len(self.cadets):
+            yield self.env.timeout(interval)
+            observer.on_sample(self, self.env.now,
+                               [len(r.queue) for r in self.resource_list],
+                               [r.count for r in self.resource_list],
+                               list(self.visit_ct))
+    
+    def calculate_service_time(self, station_idx: int, cadet_id: int) -> float:
         """
         Calculate service time using triangular distribution.
         
         Args:
-            station: Station name
+            station_idx: Station index
             cadet_id: Cadet identifier
             
         Returns:
             Service time in hours
         """
-        service_time_params = STATION_DIC[station]["service_time"]
-        
-        # Convert minutes to hours
-        min_time = service_time_params[0] / 60
-        mode_time = service_time_params[1] / 60
-        max_time = service_time_params[2] / 60
-        
-        # Calculate triangular distribution parameters
-        scale = max_time - min_time
-        if scale == 0:
-            c_param = 0
-        else:
-            c_param = (mode_time - min_time) / scale
-        
-        # Generate random service time
-        service_time = stats.triang.rvs(c=c_param, loc=min_time, 
-                                       scale=scale, size=1)[0]
+        # Draw from the station's pre-drawn triangular stream
+        service_time = self.streams.service_time(station_idx)
         
         # Apply USMAPS adjustment if applicable
-        if self.usmaps_dic[cadet_id] == 1:
-            service_time *= STATION_DIC[station]["USMAPS_frac"]
+        if self._cadet_usmaps[cadet_id]:
+            service_time *= self.stations.usmaps_frac_row[station_idx]
         
         # Female cadets skip barber shop
-        if self.sex_dic[cadet_id] == 0 and station == "CA 2 Barber Shop":
+        if self._cadet_female[cadet_id] and self.stations.female_skip_row[station_idx]:
             service_time = 0
         
         return service_time
     
-    def determine_next_station(self, station: str, cadet_id: int) -> int:
+    def determine_next_station(self, station_idx: int, cadet_id: int) -> int:
         """
         Determine the next station based on cadet characteristics.
         
         Args:
-            station: Current station name
+            station_idx: Current station index
             cadet_id: Cadet identifier
             
         Returns:
             Index of next station
         """
-        is_male = self.sex_dic[cadet_id] == 1
-        is_usmaps = self.usmaps_dic[cadet_id] == 1
-        is_modified_path = self.mod_path == 'mod'
-        
-        if is_male:
-            if is_usmaps and is_modified_path:
-                return STATION_DIC[station]["next_USMAPS_stn"]
-            else:
-                return STATION_DIC[station]["next_stn"]
-        else:  # Female
-            if is_usmaps and is_modified_path:
-                return STATION_DIC[station]["next_USMAPS_fem_stn"]
-            else:
-                return STATION_DIC[station]["next_fem_stn"]
+        return self._cadet_routes[cadet_id][station_idx]
     
-    def record_station_visit(self, cadet_id: int, station: str, 
-                            finish_time: float, next_stn_idx: int):
+    def record_station_visit(self, cadet_id: int, station_idx: int, 
+                            finish_time: float, next_stn_idx: int,
+                            request_time: float):
         """
         Record data about a cadet's visit to a station.
         
         Args:
             cadet_id: Cadet identifier
-            station: Station name
+            station_idx: Station index
             finish_time: Time when service completes
             next_stn_idx: Index of next station
+            request_time: Time when the cadet joined the station's queue
         """
-        station_idx = self.station_idx_dic[station]
         resource = self.resource_list[station_idx]
         
-        # Track arc (flow between stations)
-        arc_key = f"{station_idx},{next_stn_idx}"
-        self.arc_dic[arc_key] = self.arc_dic.get(arc_key, 0) + 1
-        
-        # Record timestamp data
-        timestamp_record = [
-            cadet_id,
-            station_idx,
-            len(resource.queue),
-            resource.count,
-            resource.capacity,
-            station,
-            finish_time,
-            next_stn_idx,
-            self.arc_dic[arc_key],
-            resource.count
-        ]
-        self.time_stamp.append(timestamp_record)
-        
-        # Track queue lengths over time
-        self.q_list[station_idx].append(len(resource.queue))
-        self.q_list_time[station_idx].append(self.env.now + SIMULATION_START_TIME)
-    
-    def generic_stn(self, cadet_id: int, station: str):
+        # Track arc (flow between stations); exits count in the last column
+        arc_col = next_stn_idx if next_stn_idx >= 0 else self.stations.exit_col
+        self.arc_ct[station_idx, arc_col] += 1
+        
+        self.visit_ct[station_idx] += 1
+        self.cadets.station[cadet_id] = station_idx
+        
+        # Record timestamp data (queue length and start time double as the
+        # queue-over-time series used by plot_results)
+        if self.record_log:
+            self.time_stamp.append(
+                cadet_id,
+                station_idx,
+                len(resource.queue),
+                resource.count,
+                resource.capacity,
+                finish_time,
+                next_stn_idx,
+                self.arc_ct[station_idx, arc_col],
+                self.env.now,
+                request_time
+            )
+        
+        for observer in self.observers:
+            observer.on_visit(self, cadet_id, station_idx, self.env.now,
+                              finish_time, next_stn_idx)
+    
+    def generic_stn(self, cadet_id: int, station_idx: int):
         """
         Process a cadet through a station.
         
         Args:
             cadet_id: Cadet identifier
-            station: Station name
+            station_idx: Station index
         """
-        station_idx = self.station_idx_dic[station]
-        service_time = self.calculate_service_time(station, cadet_id)
-        
-        # Request resource and process
-        with self.resource_list[station_idx].request() as req:
+        service_time = self.calculate_service_time(station_idx, cadet_id)
+        resource = self.resource_list[station_idx]
+        update_stats = self.queue_stats.update
+        
+        # Request resource and process (station state recorded at the
+        # request, the grant and the release)
+        with resource.request() as req:
+            request_time = self.env.now
+            self.cadets.request_time[cadet_id] = request_time
+            update_stats(station_idx, request_time, len(resource.queue), resource.count)
             yield req
+            update_stats(station_idx, self.env.now, len(resource.queue), resource.count)
             finish_time = self.env.now + service_time
-            next_stn_idx = self.determine_next_station(station, cadet_id)
-            self.record_station_visit(cadet_id, station, finish_time, next_stn_idx)
+            next_stn_idx = self.determine_next_station(station_idx, cadet_id)
+            self.record_station_visit(cadet_id, station_idx, finish_time, next_stn_idx,
+                                      request_time)
             yield self.env.timeout(service_time)
+        update_stats(station_idx, self.env.now, len(resource.queue), resource.count)
         
         # Route to next station
         if next_stn_idx > 0:
             self.route_to_next_station(cadet_id, next_stn_idx)
+        else:
+            self.completed_ct += 1
+            self.cadets.station[cadet_id] = EXIT_STN
+            self.cadets.completion_time[cadet_id] = self.env.now
     
     def route_to_next_station(self, cadet_id: int, next_stn_idx: int):
         """
@@ -203,13 +277,13 @@ class RDaySimulation:
             cadet_id: Cadet identifier
             next_stn_idx: Index of next station
         """
-        if next_stn_idx == self.station_idx_dic["Bus Movement"]:
+        batch = self.stations.batch_row[next_stn_idx]
+        if batch == BUS_BATCH:
             self.batch_bus(cadet_id)
-        elif next_stn_idx == self.station_idx_dic["TH 6 Oath"]:
+        elif batch == OATH_BATCH:
             self.batch_oath(cadet_id)
         else:
-            next_station = self.station_list[next_stn_idx]
-            self.env.process(self.generic_stn(cadet_id, next_station))
+            self.env.process(self.generic_stn(cadet_id, next_stn_idx))
     
     def batch_bus(self, cadet_id: int):
         """
@@ -220,18 +294,17 @@ class RDaySimulation:
         """
         self.batch_bus_q.append(cadet_id)
         
-        # Check if batch is ready to process
-        ike_idx = self.station_idx_dic["Ike 2 Scan-Out"]
-        bus_idx = self.station_idx_dic["Bus Movement"]
-        arc_key = f"{ike_idx},{bus_idx}"
-        arc_count = self.arc_dic.get(arc_key, 0)
+        # Check if batch is ready to process (every cadet of the day bound
+        # for the bus has started service at a feeding station)
+        bus_idx = self.stations.bus_idx
+        arc_count = self.arc_ct[self._bus_feeders, bus_idx].sum()
         
         batch_ready = (len(self.batch_bus_q) > BUS_BATCH_SIZE or 
-                      arc_count == TOTAL_CUSTOMERS - 1)
+                      arc_count >= self.cohort.release_count(cadet_id))
         
         if batch_ready:
             for cdt in self.batch_bus_q:
-                self.env.process(self.generic_stn(cdt, "Bus Movement"))
+                self.env.process(self.generic_stn(cdt, bus_idx))
             self.batch_bus_q = []
     
     def batch_oath(self, cadet_id: int):
@@ -243,133 +316,164 @@ class RDaySimulation:
         """
         self.batch_oath_q.append(cadet_id)
         
-        # Calculate total cadets who have reached oath point
-        lrc_idx = self.station_idx_dic["LRC Issue Point 6 687"]
-        med_idx = self.station_idx_dic["TH 5 Med Screening 1"]
-        oath_idx = self.station_idx_dic["TH 6 Oath"]
-        
-        arc_lrc_key = f"{lrc_idx},{oath_idx}"
-        arc_med_key = f"{med_idx},{oath_idx}"
-        
-        try:
-            arc_lrc_count = self.arc_dic.get(arc_lrc_key, 0)
-            arc_med_count = self.arc_dic.get(arc_med_key, 0)
-            arc_sum = arc_lrc_count + arc_med_count
-        except:
-            arc_sum = 0
+        # Calculate total cadets who have reached oath point (from LRC Issue
+        # Point 6 and TH 5 Med Screening 1)
+        oath_idx = self.stations.oath_idx
+        arc_sum = self.arc_ct[self._oath_feeders, oath_idx].sum()
         
         batch_ready = (len(self.batch_oath_q) > OATH_BATCH_SIZE or 
-                      arc_sum == TOTAL_CUSTOMERS - 1)
+                      arc_sum >= self.cohort.release_count(cadet_id))
         
         if batch_ready:
             for cdt in self.batch_oath_q:
-                self.env.process(self.generic_stn(cdt, "TH 6 Oath"))
+                self.env.process(self.generic_stn(cdt, oath_idx))
             self.batch_oath_q = []
     
     def generate_cadets(self):
         """
-        Generate cadet arrivals over time.
+        Release the pre-generated cadets into R-Day at their arrival times.
         """
-        count = 0
-        start_time = 0
-        female_count = 0
-        usmaps_count = 0
+        interarrival = self.cadets.interarrival.tolist()
+        block_wait = self.cadets.block_wait.tolist()
         
-        for cadet_id in range(1, TOTAL_CUSTOMERS):
-            # Determine if cadet is USMAPS
-            self.usmaps_dic[cadet_id] = 0
-            if self._is_usmaps_cadet(cadet_id, usmaps_count):
-                self.usmaps_dic[cadet_id] = 1
-                usmaps_count += 1
-            
-            # Determine cadet gender (1=male, 0=female)
-            self.sex_dic[cadet_id] = 1
-            if cadet_id % 2 == 0 and female_count < FEMALE_COUNT_MAX:
-                self.sex_dic[cadet_id] = 0
-                female_count += 1
-            
-            # Generate inter-arrival time
-            inter_arrival_time = stats.expon.rvs(loc=0, scale=(1/ARRIVAL_RATE), 
-                                                 size=1)[0]
-            yield self.env.timeout(inter_arrival_time)
+        for cadet_id in range(1, len(self.cadets) + 1):
+            yield self.env.timeout(interarrival[cadet_id])
             
             # Start cadet through first station
-            self.env.process(self.generic_stn(cadet_id, self.station_list[0]))
+            self.env.process(self.generic_stn(cadet_id, 0))
             
-            count += 1
-            
-            # Batch timing control
-            if count == CUSTOMER_BATCH_SIZE:
-                discount_time = self.env.now - start_time
-                if (1 - discount_time) > 0:
-                    yield self.env.timeout(1 - discount_time)
-                count = 0
-                start_time = self.env.now
-                female_count = 0
+            # Hold between arrival blocks
+            if block_wait[cadet_id] > 0:
+                yield self.env.timeout(block_wait[cadet_id])
     
-    def _is_usmaps_cadet(self, cadet_id: int, usmaps_count: int) -> bool:
+    def run(self, verbose: bool = True):
         """
-        Determine if a cadet is USMAPS based on distribution strategy.
+        Execute the simulation.
         
         Args:
-            cadet_id: Cadet identifier
-            usmaps_count: Current count of USMAPS cadets
-            
-        Returns:
-            True if cadet is USMAPS
+            verbose: Whether to print progress messages
         """
-        if usmaps_count >= USMAPS_COUNT_MAX:
-            return False
+        if verbose:
+            print(f"Starting simulation with USMAPS path: {self.usmaps_path}, "
+                  f"mod path: {self.mod_path}")
         
-        if self.usmaps_path == 'rand':
-            return stats.uniform.rvs() < USMAPS_PROBABILITY
-        elif self.usmaps_path == 'front':
-            return cadet_id < USMAPS_COUNT_MAX
-        elif self.usmaps_path == 'back':
-            return cadet_id >= (TOTAL_CUSTOMERS - USMAPS_COUNT_MAX)
+        self.env.process(self.generate_cadets())
+        for observer, interval in self._sample_intervals:
+            self.env.process(self.sample_state(observer, interval))
+        self.env.run()
+        self.queue_stats.close(self.env.now)
         
-        return False
+        for observer in self.observers:
+            observer.on_finish(self)
+        
+        if verbose:
+            print("Simulation complete")
     
-    def run(self):
-        """
-        Execute the simulation.
+    def summary(self) -> Dict:
         """
-        print(f"Starting simulation with USMAPS path: {self.usmaps_path}, "
-              f"mod path: {self.mod_path}")
+        Compact summary of a completed run.
         
-        self.env.process(self.generate_cadets())
-        self.env.run()
+        Returns:
+            Dictionary with the final completion time (hours after
+            SIMULATION_START_TIME), the mean cadet cycle time (hours from
+            arrival to completion), the peak queue length per station seen
+            at service starts, and the time-average queue length and
+            utilization per station
+        """
+        queue_stats = self.queue_stats
+        horizon = queue_stats.end_time if queue_stats.end_time > 0 else np.nan
+        return {
+            "completion_time": self.time_stamp.last_time(),
+            "mean_cycle_time": float(np.mean(self.cadets.cycle_time()[1:])),
+            "peak_queue": self.time_stamp.peak_by_station().tolist(),
+            "avg_queue": [area / horizon for area in queue_stats.queue_area],
+            "utilization": queue_stats.utilization(),
+        }
+    
+    def event_frame(self):
+        """
+        The whole event log as a DataFrame (read back from disk when it was
+        streamed).
         
-        print("Simulation complete")
+        Returns:
+            DataFrame in the df_time_stamp schema
+        """
+        if self.time_stamp.writer is None:
+            return self.time_stamp.to_frame()
+        self.time_stamp.flush()
+        return read_time_stamp(self.time_stamp.writer.path)
     
-    def save_results(self):
+    def flow_matrix(self):
         """
-        Save simulation results to CSV files.
+        Station-to-station flow counts of the run.
+        
+        Returns:
+            DataFrame with from-station rows and to-station columns (plus
+            'Exit') counting the cadets routed along each arc
         """
-        df = pd.DataFrame(self.time_stamp, columns=[
-            "entity", "stn_idx", "q_length", "svc_count", "svc_capacity",
-            "stn_nm", "time", "next_stn", "arc_ct", "svc_count_after"
-        ])
+        return flow_frame(self.arc_ct, self.station_list)
+    
+    def save_results(self, fmt: str = 'csv'):
+        """
+        Save the simulation event log, flow matrix, per-cadet times, the
+        time-weighted station statistics and binned queue series, and the
+        wait and cycle-time percentiles per station and cadet class.
         
-        output_file = os.path.join(self.output_dir, "df_time_stamp.csv")
-        df.to_csv(output_file, index=False)
+        Args:
+            fmt: Output format ('csv', 'parquet', 'feather' or 'npz'); a
+                streamed log is always csv
+            
+        Returns:
+            Event log DataFrame (None when the log was streamed)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.time_stamp.writer is None:
+            df = self.time_stamp.to_frame()
+            output_file = write_time_stamp(df, self.output_dir, fmt)
+        else:
+            df = None
+            self.time_stamp.flush()
+            output_file = self.time_stamp.writer.path
         print(f"Results saved to {output_file}")
         
+        flow_file = os.path.join(self.output_dir, "flow_matrix.csv")
+        self.flow_matrix().to_csv(flow_file)
+        
+        cadet_file = os.path.join(self.output_dir, "cadet_times.csv")
+        self.cadets.to_frame().to_csv(cadet_file, index=False)
+        
+        stats_file = os.path.join(self.output_dir, "station_stats.csv")
+        self.queue_stats.station_frame().to_csv(stats_file)
+        
+        series_file = os.path.join(self.output_dir, "queue_series.csv")
+        self.queue_stats.binned_frame().to_csv(series_file, index=False)
+        
+        if self.record_log:
+            stations, classes = kpi_frames(sim_kpis(self), self.station_list)
+            stations.to_csv(os.path.join(self.output_dir, "station_waits.csv"))
+            classes.to_csv(os.path.join(self.output_dir, "class_times.csv"))
+        
         return df
     
     def plot_results(self, show_plots: bool = True):
         """
-        Generate and save visualization of queue lengths.
+        Generate and save visualization of queue lengths: the time-average
+        queue per bin (line) and the largest queue held in each bin (shaded).
         
         Args:
             show_plots: Whether to display plots interactively
+            
+        Returns:
+            Path of the saved plot
         """
-        df = pd.DataFrame(self.time_stamp, columns=[
-            "entity", "stn_idx", "q_length", "svc_count", "svc_capacity",
-            "stn_nm", "time", "next_stn", "arc_ct", "svc_count_after"
-        ])
+        # Imported on first use so headless runs never load matplotlib
+        import matplotlib.pyplot as plt
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        series = self.queue_stats.binned()
+        bin_times = series["bin_start"] + SIMULATION_START_TIME
         
-        final_time = round(df['time'].iloc[-1], 2)
+        final_time = round(self.time_stamp.last_time(), 2)
         
         fig, ax = plt.subplots(nrows=4, ncols=4, figsize=(15, 12))
         fig.suptitle(f"{self.mod_path} {self.usmaps_path} | {final_time}", 
@@ -378,7 +482,9 @@ class RDaySimulation:
         for i in range(len(self.station_list) - 1):
             row = i // 4
             col = i % 4
-            ax[row, col].scatter(self.q_list_time[i], self.q_list[i])
+            ax[row, col].fill_between(bin_times, series["max_queue"][:, i],
+                                      step="post", alpha=0.3)
+            ax[row, col].step(bin_times, series["avg_queue"][:, i], where="post")
             ax[row, col].set_title(self.station_list[i])
         
         plt.tight_layout()
@@ -393,6 +499,36 @@ class RDaySimulation:
             plt.close()
         
         print(f"Plot saved to {output_file}")
+        return output_file
+
+
+# Simulation engines selectable with --engine
+ENGINES = ['simpy', 'fast']
+
+# Lockstep engine for replication studies (see batch_engine.py); it yields
+# per-replication KPIs only, so it cannot drive a single logged run
+BATCH_ENGINE = 'batch'
+REPLICATION_ENGINES = ENGINES + [BATCH_ENGINE]
+
+
+def create_simulation(engine: str = 'simpy', **kwargs) -> RDaySimulation:
+    """
+    Create a simulation driven by the requested engine.
+    
+    Args:
+        engine: 'simpy' for RDaySimulation or 'fast' for the event-heap
+            FastRDaySimulation (see fast_engine.py)
+        **kwargs: RDaySimulation constructor arguments
+        
+    Returns:
+        Simulation instance
+    """
+    if engine == 'simpy':
+        return RDaySimulation(**kwargs)
+    if engine == 'fast':
+        from fast_engine import FastRDaySimulation
+        return FastRDaySimulation(**kwargs)
+    raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
 
 
 def parse_arguments():
@@ -409,6 +545,13 @@ def parse_arguments():
 Examples:
   python simulation.py --usmaps rand --mod std
   python simulation.py --usmaps front --mod mod --no-show
+  python simulation.py --usmaps rand --mod std --seed 7 --engine fast --no-plot
+  python simulation.py --cadets 25000 --block-size 5000 --days 3 --engine fast --stream-log --no-plot
+  python simulation.py --usmaps rand --mod std --replications 200 --workers 8
+  python simulation.py --usmaps rand --mod std --replications 10000 --engine fast
+  python simulation.py --usmaps rand --mod std --replications 10000 --engine batch
+  python simulation.py --usmaps rand --mod std --estimate
+  python simulation.py --precision completion_time=0.01 --precision mean_cycle_time=0.5% --workers 8
         """
     )
     
@@ -428,32 +571,270 @@ Examples:
         help='Modification path: modified or standard (default: std)'
     )
     
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Seed for the random-variate streams (default: fresh entropy)'
+    )
+    
+    parser.add_argument(
+        '--replications',
+        type=int,
+        default=1,
+        help='Number of independent replications to run (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes used for replications (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--precision',
+        action='append',
+        default=[],
+        metavar='KPI=TOL[%]',
+        help='Keep adding replications until the 95%% CI half-width of KPI '
+             'is at most TOL (or TOL%% of its mean); repeatable. '
+             '--replications then caps the run (default cap: 10000)'
+    )
+    
+    parser.add_argument(
+        '--round-size',
+        type=int,
+        default=20,
+        help='Replications launched per round with --precision (default: 20)'
+    )
+    
+    parser.add_argument(
+        '--cadets',
+        type=int,
+        default=TOTAL_CUSTOMERS - 1,
+        help=f'Cadets arriving per day (default: {TOTAL_CUSTOMERS - 1}); the '
+             f'USMAPS cap scales with it'
+    )
+    
+    parser.add_argument(
+        '--days',
+        type=int,
+        default=1,
+        help='Consecutive days simulated, each with its own cohort (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--block-size',
+        type=int,
+        default=CUSTOMER_BATCH_SIZE,
+        help=f'Cadets per arrival block (default: {CUSTOMER_BATCH_SIZE}); the '
+             f'female quota per block scales with it'
+    )
+    
+    parser.add_argument(
+        '--stream-log',
+        action='store_true',
+        help='Write the event log to disk in chunks during the run (csv), '
+             'keeping memory bounded for large cohorts'
+    )
+    
+    parser.add_argument(
+        '--format',
+        type=str,
+        choices=FORMATS,
+        default='csv',
+        help='File format of the df_time_stamp event log (default: csv)'
+    )
+    
+    parser.add_argument(
+        '--engine',
+        choices=REPLICATION_ENGINES,
+        default='simpy',
+        help='Simulation engine: SimPy processes, the event-heap fast '
+             'engine, or the lockstep batch engine (replications only; '
+             'default: simpy)'
+    )
+    
+    parser.add_argument(
+        '--estimate',
+        action='store_true',
+        help='Print the analytic queueing estimate of the scenario instead '
+             'of simulating it'
+    )
+    
     parser.add_argument(
         '--no-show',
         action='store_true',
         help='Do not display plots (only save them)'
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        '--no-plot',
+        action='store_true',
+        help='Headless run: skip the queue plot (matplotlib is never loaded)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always simulate, bypassing the result cache used for seeded '
+             'single runs'
+    )
+    
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default=None,
+        help='Directory for the results of a single run (default: output/ '
+             'next to config.py)'
+    )
+    
+    args = parser.parse_args()
+    if args.engine == BATCH_ENGINE and args.replications < 2 and not args.precision:
+        parser.error("--engine batch requires --replications > 1 or --precision")
+    custom_cohort = (args.cadets != TOTAL_CUSTOMERS - 1 or args.days != 1
+                     or args.block_size != CUSTOMER_BATCH_SIZE)
+    if custom_cohort and (args.replications > 1 or args.precision or args.estimate):
+        parser.error("--cadets, --days and --block-size apply to single runs")
+    if args.stream_log and args.format != 'csv':
+        parser.error("--stream-log writes the event log as csv")
+    return args
 
 
 def main():
     """Main execution function."""
     args = parse_arguments()
     
+    if args.estimate:
+        from estimator import run_estimate
+        run_estimate(args.mod, args.usmaps)
+        return
+    
+    if args.replications > 1 or args.precision:
+        run_replication_study(args)
+        return
+    
+    # Seeded runs are reproducible, so their results can come from the cache
+    cache = None
+    if args.seed is not None and not args.no_cache:
+        from result_cache import ResultCache
+        cache = ResultCache()
+        cache_key = run_cache_key(cache, args)
+        entry = cache.lookup(cache_key)
+        if entry is not None:
+            output_dir = args.output_dir or default_output_dir()
+            os.makedirs(output_dir, exist_ok=True)
+            for path in cache.restore(entry, output_dir):
+                print(f"Restored {path} from cache")
+            print(f"Completion time: {entry['summary']['completion_time']:.4f} h")
+            write_recent_run(output_dir, args)
+            return
+    
     # Create and run simulation
-    sim = RDaySimulation(mod_path=args.mod, usmaps_path=args.usmaps)
+    cohort = Cohort(args.cadets, args.days, block_size=args.block_size)
+    sim = create_simulation(args.engine, mod_path=args.mod,
+                            usmaps_path=args.usmaps, seed=args.seed,
+                            output_dir=args.output_dir, cohort=cohort,
+                            stream_log=args.stream_log)
     sim.run()
     
     # Save and plot results
-    sim.save_results()
-    sim.plot_results(show_plots=not args.no_show)
+    sim.save_results(fmt=args.format)
+    files = [time_stamp_path(sim.output_dir, args.format),
+             os.path.join(sim.output_dir, "flow_matrix.csv"),
+             os.path.join(sim.output_dir, "cadet_times.csv"),
+             os.path.join(sim.output_dir, "station_stats.csv"),
+             os.path.join(sim.output_dir, "queue_series.csv"),
+             os.path.join(sim.output_dir, "station_waits.csv"),
+             os.path.join(sim.output_dir, "class_times.csv")]
+    if not args.no_plot:
+        files.append(sim.plot_results(show_plots=not args.no_show))
+    write_recent_run(sim.output_dir, args)
+    
+    if cache is not None:
+        cache.store(cache_key, files, {"kind": "run", "summary": sim.summary(),
+                                       "label": f"{args.mod} {args.usmaps} "
+                                                f"seed {args.seed} {args.engine}"})
+
+
+def run_cache_key(cache, args) -> str:
+    """
+    Cache key of a seeded single run.
+    
+    Streamed runs report histogram percentiles in station_waits.csv, so they
+    are keyed apart from in-memory runs of the same scenario.
     
-    # Save control file for analysis
-    recent_run_file = os.path.join(sim.output_dir, "recent_run.txt")
+    Args:
+        cache: ResultCache the run is stored in
+        args: Parsed command line arguments
+    
+    Returns:
+        Hex digest
+    """
+    return cache.key("run", {"mod": args.mod, "usmaps": args.usmaps,
+                             "seed": args.seed, "engine": args.engine,
+                             "format": args.format, "plot": not args.no_plot,
+                             "stream_log": args.stream_log,
+                             "cohort": [args.cadets, args.days, args.block_size]})
+
+
+def write_recent_run(output_dir: str, args):
+    """
+    Save the control file that build_images.py reads to describe the run.
+    
+    Args:
+        output_dir: Output directory
+        args: Parsed command line arguments
+    """
+    recent_run_file = os.path.join(output_dir, "recent_run.txt")
     with open(recent_run_file, "w") as f:
         f.write(f"{args.mod} {args.usmaps}")
 
 
+def run_replication_study(args):
+    """
+    Run and summarize many independent replications of one scenario.
+    
+    With --precision, replications are added in rounds until every target
+    KPI is precise enough; otherwise a fixed number is run.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    from replications import (
+        run_replications, run_until_precise, summarize_replications,
+        parse_precision, precision_met
+    )
+    
+    output_dir = dir_setup()
+    if args.precision:
+        targets = parse_precision(args.precision)
+        max_reps = args.replications if args.replications > 1 else 10000
+        df_reps, met = run_until_precise(targets, mod_path=args.mod,
+                                         usmaps_path=args.usmaps, seed=args.seed,
+                                         workers=args.workers, engine=args.engine,
+                                         round_size=args.round_size,
+                                         max_reps=max_reps)
+    else:
+        df_reps = run_replications(args.replications, mod_path=args.mod,
+                                   usmaps_path=args.usmaps, seed=args.seed,
+                                   workers=args.workers, engine=args.engine)
+    df_summary = summarize_replications(df_reps)
+    
+    reps_file = os.path.join(output_dir, f"replications_{args.mod}_{args.usmaps}.csv")
+    summary_file = os.path.join(output_dir,
+                                f"replication_summary_{args.mod}_{args.usmaps}.csv")
+    df_reps.to_csv(reps_file, index=False)
+    df_summary.to_csv(summary_file)
+    
+    print(df_summary.loc["completion_time"].to_string())
+    if args.precision:
+        print(precision_met(df_summary, targets).to_string())
+        print(f"Precision {'met' if met else 'NOT met'} after {len(df_reps)} replications")
+    print(f"Replications saved to {reps_file}")
+    print(f"Summary saved to {summary_file}")
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,23 +7,32 @@ Created on Thu Oct 30 14:11:22 2025
 
 import cv2
 import os
-import re
+import queue
+import threading
 
 from config import (
     dir_setup
 )
 
-image_folder_path = dir_setup()
-os.chdir(image_folder_path)
+# Frames buffered between the renderer and the video writer when streaming
+STREAM_QUEUE_SIZE = 8
+
+# Length of the generated video in seconds
+VIDEO_SECONDS = 30
+
+def video_file_path(output_dir, path_descr):
+    """Path of the mp4 for a run described by recent_run.txt (e.g. 'std rand')."""
+    output_file = 'stitched_video_' + path_descr.replace(" ","_") + ".mp4"
+    return os.path.join(output_dir, output_file)
 
 def pngs_to_video_opencv(image_folder, output_video_path, fps=30):
     """Stitches PNGs from a folder into a video using OpenCV."""
-    
+
     # 1. Get and sort image files
     images = [img for img in os.listdir(image_folder) if img.endswith("Rday.png")]
     # Crucial: Sort numerically to ensure correct frame order
-    images.sort(key=lambda f: int(''.join(filter(str.isdigit, f)) or 0)) 
-    
+    images.sort(key=lambda f: int(''.join(filter(str.isdigit, f)) or 0))
+
     if not images:
         print("No PNG images found in the folder.")
         return
@@ -36,7 +45,7 @@ def pngs_to_video_opencv(image_folder, output_video_path, fps=30):
 
     # 3. Define the codec and create VideoWriter object
     # 'mp4v' for MP4 on most systems. Use 'DIVX' for AVI.
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v') 
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     video = cv2.VideoWriter(output_video_path, fourcc, fps, size)
 
     # 4. Iterate and write frames
@@ -49,23 +58,88 @@ def pngs_to_video_opencv(image_folder, output_video_path, fps=30):
              video.write(frame)
         else:
              print(f"Warning: Could not read image {image_file}. Skipping.")
-    
+
     # 5. Release the video writer
     video.release()
     print(f"Video saved successfully to {output_video_path}")
 
-dir_list = os.listdir('.')
-Rday_png_list = [
-    s for s in dir_list 
-    if re.search('.*Rday.png$', s)
-]
-
-fps_rate = len(Rday_png_list)/30 #always a 30-second video
-
-with open("recent_run.txt", "r") as file:
-    path_descr = file.read()
-    
-output_file = 'stitched_video_' + path_descr.replace(" ","_") + ".mp4"
-#pngs_to_video_opencv(image_folder_path, output_file, fps=fps_rate)
-output_path = os.path.join(image_folder_path, output_file)
-pngs_to_video_opencv(image_folder_path, output_path, fps=fps_rate)
\ No newline at end of file
+def frames_to_video_opencv(frames, output_video_path, fps=30,
+                           queue_size=STREAM_QUEUE_SIZE):
+    """
+    Streams in-memory RGB frames into a video without intermediate PNGs.
+
+    Frames are produced by the caller's iterable (e.g. the renderer) on this
+    thread and handed to a writer thread through a bounded queue, so
+    rendering and encoding overlap while at most queue_size frames are held
+    in memory.
+
+    Args:
+        frames: Iterable of HxWx3 uint8 RGB arrays, all the same size
+        output_video_path: Path of the video to write
+        fps: Frames per second
+        queue_size: Maximum number of frames waiting to be encoded
+
+    Returns:
+        Number of frames written
+    """
+    frame_queue = queue.Queue(maxsize=queue_size)
+    written = [0]
+    errors = []
+
+    def writer():
+        video = None
+        try:
+            while True:
+                frame = frame_queue.get()
+                if frame is None:
+                    break
+                if video is None:
+                    height, width = frame.shape[:2]
+                    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                    video = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
+                video.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+                written[0] += 1
+        except Exception as exc:
+            errors.append(exc)
+            # Keep draining so the producer never blocks on a full queue
+            while frame_queue.get() is not None:
+                pass
+        finally:
+            if video is not None:
+                video.release()
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    try:
+        for frame in frames:
+            if errors:
+                break
+            frame_queue.put(frame)
+    finally:
+        frame_queue.put(None)
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    print(f"Video saved successfully to {output_video_path} ({written[0]} frames)")
+    return written[0]
+
+def main():
+    image_folder_path = dir_setup()
+    os.chdir(image_folder_path)
+
+    Rday_png_list = [
+        s for s in os.listdir('.')
+        if s.endswith("Rday.png")
+    ]
+
+    fps_rate = len(Rday_png_list)/VIDEO_SECONDS #always a 30-second video
+
+    with open("recent_run.txt", "r") as file:
+        path_descr = file.read()
+
+    output_path = video_file_path(image_folder_path, path_descr)
+    pngs_to_video_opencv(image_folder_path, output_path, fps=fps_rate)
+
+if __name__ == "__main__":
+    main()
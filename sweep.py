@@ -0,0 +1,314 @@
+"""
+Scenario sweep for the R-Day simulation.
+
+Builds the full grid of USMAPS strategies x routing paths x per-station
+staffing overrides, schedules every cell x replication over one worker pool
+and writes a single results table keyed by scenario. Replication i of every
+scenario uses the same seed (common random numbers), so differences between
+scenarios are not masked by sampling noise.
+"""
+
+import argparse
+import itertools
+import os
+from typing import Dict, List
+
+import pandas as pd
+
+from config import dir_setup, STATION_DIC
+from replications import replication_seeds, run_tasks, summarize_replications
+from simulation import REPLICATION_ENGINES, BATCH_ENGINE
+
+
+def parse_staffing_grid(specs: List[str]) -> List[Dict[str, int]]:
+    """
+    Expand staffing specifications into the grid of server_ct overrides.
+
+    Args:
+        specs: Strings of the form "Station Name=8,10,12"
+
+    Returns:
+        List of station name -> server count dictionaries (the cartesian
+        product over all given stations; [{}] when specs is empty)
+    """
+    stations = []
+    levels = []
+    for spec in specs:
+        station, sep, values = spec.rpartition("=")
+        if not sep or station not in STATION_DIC:
+            raise ValueError(f"Invalid staffing spec '{spec}': expected "
+                             f"'<station name>=<n>[,<n>...]' with a station "
+                             f"from STATION_DIC")
+        stations.append(station)
+        levels.append([int(v) for v in values.split(",")])
+
+    return [dict(zip(stations, combo)) for combo in itertools.product(*levels)]
+
+
+def staffing_label(staffing: Dict[str, int]) -> str:
+    """
+    Readable label for a set of staffing overrides.
+
+    Args:
+        staffing: Station name -> server count overrides
+
+    Returns:
+        Label such as "CA 2 Barber Shop=15; TH 2 Finance=16" ("" if none)
+    """
+    return "; ".join(f"{stn}={ct}" for stn, ct in staffing.items())
+
+
+def scenario_key(mod_path: str, usmaps_path: str, staffing: Dict[str, int]) -> str:
+    """
+    Readable scenario key, e.g. "std rand | CA 2 Barber Shop=15".
+
+    Args:
+        mod_path: Modification path ('mod' or 'std')
+        usmaps_path: USMAPS distribution strategy
+        staffing: Station name -> server count overrides
+
+    Returns:
+        Scenario key string
+    """
+    key = f"{mod_path} {usmaps_path}"
+    if staffing:
+        key += " | " + staffing_label(staffing)
+    return key
+
+
+def build_scenarios(usmaps_paths: List[str], mod_paths: List[str],
+                    staffing_grid: List[Dict[str, int]]) -> List[Dict]:
+    """
+    Cartesian product of USMAPS strategies, routing paths and staffing levels.
+
+    Args:
+        usmaps_paths: USMAPS distribution strategies
+        mod_paths: Modification paths
+        staffing_grid: Staffing override dictionaries
+
+    Returns:
+        List of scenario dictionaries
+    """
+    scenarios = []
+    for mod_path, usmaps_path, staffing in itertools.product(
+            mod_paths, usmaps_paths, staffing_grid):
+        scenarios.append({
+            "scenario": scenario_key(mod_path, usmaps_path, staffing),
+            "mod_path": mod_path,
+            "usmaps_path": usmaps_path,
+            "staffing": staffing,
+        })
+    return scenarios
+
+
+def screen_scenarios(scenarios: List[Dict], keep: int) -> List[Dict]:
+    """
+    Keep the staffing candidates the analytic estimator ranks best.
+
+    Candidates are ranked by estimated completion time separately for every
+    (mod_path, usmaps_path) pair, and only the best keep of each go on to
+    the simulation.
+
+    Args:
+        scenarios: Scenario dictionaries from build_scenarios
+        keep: Staffing candidates to keep per routing path and USMAPS strategy
+
+    Returns:
+        The promising scenarios, in their original order
+    """
+    from estimator import screen_staffing
+
+    kept = set()
+    paths = {(s["mod_path"], s["usmaps_path"]) for s in scenarios}
+    for mod_path, usmaps_path in sorted(paths):
+        candidates = [s for s in scenarios
+                      if (s["mod_path"], s["usmaps_path"]) == (mod_path, usmaps_path)]
+        df = screen_staffing([s["staffing"] for s in candidates], mod_path,
+                             usmaps_path, keep=keep)
+        for row in df.itertuples():
+            scenario = candidates[row.candidate]
+            mark = "keep" if row.promising else "drop"
+            print(f"{mark} {scenario['scenario']}: estimated completion "
+                  f"{row.completion_time:.2f} h, bottleneck {row.bottleneck} "
+                  f"({row.max_utilization:.2f})")
+            if row.promising:
+                kept.add(scenario["scenario"])
+    return [s for s in scenarios if s["scenario"] in kept]
+
+
+def run_sweep(scenarios: List[Dict], n_reps: int, seed: int = None,
+              workers: int = 1, engine: str = 'simpy') -> pd.DataFrame:
+    """
+    Run every scenario x replication over a single worker pool.
+
+    Args:
+        scenarios: Scenario dictionaries from build_scenarios
+        n_reps: Replications per scenario
+        seed: Base seed (replication i shares its seed across scenarios)
+        workers: Number of worker processes
+        engine: Simulation engine ('simpy', 'fast' or 'batch'); the batch
+            engine runs each scenario's replications in lockstep
+
+    Returns:
+        DataFrame with one row per scenario x replication
+    """
+    seeds = replication_seeds(seed, n_reps)
+    tasks = []
+    task_scenarios = []
+    for scenario in scenarios:
+        for rep_idx, rep_seed in enumerate(seeds):
+            tasks.append((rep_idx, scenario["mod_path"], scenario["usmaps_path"],
+                          rep_seed, scenario["staffing"], engine))
+            task_scenarios.append(scenario)
+
+    print(f"Running {len(scenarios)} scenarios x {n_reps} replications "
+          f"on {workers} worker(s)")
+    if engine == BATCH_ENGINE:
+        from batch_engine import run_batched_replications
+        rows = []
+        for scenario in scenarios:
+            df = run_batched_replications(seeds, scenario["mod_path"],
+                                          scenario["usmaps_path"],
+                                          scenario["staffing"], workers=workers)
+            rows.extend(df.to_dict("records"))
+    else:
+        rows = run_tasks(tasks, workers)
+
+    for row, scenario in zip(rows, task_scenarios):
+        row["scenario"] = scenario["scenario"]
+        row["mod_path"] = scenario["mod_path"]
+        row["usmaps_path"] = scenario["usmaps_path"]
+        row["staffing"] = staffing_label(scenario["staffing"])
+
+    df = pd.DataFrame(rows)
+    lead = ["scenario", "mod_path", "usmaps_path", "staffing", "replication"]
+    return df[lead + [c for c in df.columns if c not in lead]]
+
+
+def summarize_sweep(df_sweep: pd.DataFrame, confidence: float = 0.95) -> pd.DataFrame:
+    """
+    Aggregate a sweep into means, quantiles and CIs per scenario and KPI.
+
+    Args:
+        df_sweep: Per scenario x replication results from run_sweep
+        confidence: Confidence level of the t-interval on the mean
+
+    Returns:
+        DataFrame indexed by (scenario, KPI)
+    """
+    summaries = {}
+    for scenario, df_scenario in df_sweep.groupby("scenario", sort=False):
+        kpis = df_scenario.drop(columns=["scenario", "mod_path",
+                                         "usmaps_path", "staffing"])
+        summaries[scenario] = summarize_replications(kpis, confidence)
+    return pd.concat(summaries, names=["scenario", "kpi"])
+
+
+def parse_arguments():
+    """
+    Parse command line arguments.
+
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description='R-Day Simulation - scenario sweep over usmaps x mod x staffing',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python sweep.py --usmaps rand front back --mod mod std --replications 200 --workers 8
+  python sweep.py --staff "CA 2 Barber Shop=13,15" --staff "TH 2 Finance=16,18"
+  python sweep.py --mod std --usmaps rand --staff "TH 2 Finance=8,10,12,14,16,18" --screen 2
+        """
+    )
+
+    parser.add_argument(
+        '--usmaps',
+        nargs='+',
+        choices=['rand', 'front', 'back'],
+        default=['rand', 'front', 'back'],
+        help='USMAPS cadet distribution strategies to sweep (default: all)'
+    )
+
+    parser.add_argument(
+        '--mod',
+        nargs='+',
+        choices=['mod', 'std'],
+        default=['mod', 'std'],
+        help='Modification paths to sweep (default: both)'
+    )
+
+    parser.add_argument(
+        '--staff',
+        action='append',
+        default=[],
+        metavar='"STATION=N[,N...]"',
+        help='server_ct levels to sweep for one station (repeatable)'
+    )
+
+    parser.add_argument(
+        '--replications',
+        type=int,
+        default=20,
+        help='Replications per scenario (default: 20)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Worker processes (default: number of CPUs)'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Base seed shared by all scenarios (default: fresh entropy)'
+    )
+
+    parser.add_argument(
+        '--engine',
+        choices=REPLICATION_ENGINES,
+        default='simpy',
+        help='Simulation engine (default: simpy)'
+    )
+
+    parser.add_argument(
+        '--screen',
+        type=int,
+        default=None,
+        metavar='K',
+        help='Simulate only the K staffing candidates with the best analytic '
+             'estimate per routing path and USMAPS strategy (default: all)'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    args = parse_arguments()
+
+    scenarios = build_scenarios(args.usmaps, args.mod,
+                                parse_staffing_grid(args.staff))
+    if args.screen is not None:
+        scenarios = screen_scenarios(scenarios, args.screen)
+    df_sweep = run_sweep(scenarios, args.replications, seed=args.seed,
+                         workers=args.workers, engine=args.engine)
+    df_summary = summarize_sweep(df_sweep)
+
+    output_dir = dir_setup()
+    results_file = os.path.join(output_dir, "sweep_results.csv")
+    summary_file = os.path.join(output_dir, "sweep_summary.csv")
+    df_sweep.to_csv(results_file, index=False)
+    df_summary.to_csv(summary_file)
+
+    print(df_summary.xs("completion_time", level="kpi")[
+        ["mean", "ci_low", "ci_high", "q95"]].to_string())
+    print(f"Sweep results saved to {results_file}")
+    print(f"Sweep summary saved to {summary_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+The lockstep batch engine against the event-heap engine.
+"""
+
+import pandas as pd
+import pytest
+
+from batch_engine import run_batched_replications
+from replications import replication_seeds, run_replications
+
+SCENARIOS = [("std", "rand"), ("mod", "front"), ("mod", "back")]
+SEED = 5
+N_REPS = 4
+
+
+@pytest.mark.parametrize("mod_path,usmaps_path", SCENARIOS)
+def test_batched_kpis_match_fast_engine(mod_path, usmaps_path):
+    """Replications advanced together reproduce the fast engine's KPI rows."""
+    fast = run_replications(N_REPS, mod_path, usmaps_path, seed=SEED, engine="fast")
+    batched = run_batched_replications(replication_seeds(SEED, N_REPS),
+                                       mod_path, usmaps_path, block_size=3)
+
+    assert list(batched.columns) == list(fast.columns)
+    pd.testing.assert_frame_equal(batched, fast, check_dtype=False, check_exact=True)
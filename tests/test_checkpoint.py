@@ -0,0 +1,61 @@
+"""
+Branching a paused fast-engine run from a checkpoint.
+"""
+
+import numpy as np
+import pytest
+
+from checkpoint import restore, snapshot
+from fast_engine import FastRDaySimulation
+
+SEED = 9
+# Mid-day, hours after the start: cadets are queued and in service
+UNTIL = 3.0
+
+
+def _sim(output_dir):
+    return FastRDaySimulation("std", "rand", output_dir=str(output_dir), seed=SEED)
+
+
+def _paused(output_dir):
+    sim = _sim(output_dir)
+    sim.run(verbose=False, until=UNTIL)
+    assert 0 < sim.completed_ct < len(sim.cadets.sex)
+    return sim
+
+
+def test_restored_run_matches_uninterrupted_run(tmp_path):
+    """Pausing, snapshotting and restoring with unchanged staffing is invisible."""
+    full = _sim(tmp_path)
+    full.run(verbose=False)
+
+    branch = restore(snapshot(_paused(tmp_path)))
+    branch.run(verbose=False)
+
+    assert len(branch.time_stamp) == len(full.time_stamp)
+    for name in full.time_stamp.columns:
+        np.testing.assert_array_equal(branch.time_stamp.column(name),
+                                      full.time_stamp.column(name), err_msg=name)
+    np.testing.assert_array_equal(branch.arc_ct, full.arc_ct)
+
+    got, ref = branch.summary(), full.summary()
+    assert got["completion_time"] == ref["completion_time"]
+    assert got["peak_queue"] == ref["peak_queue"]
+    np.testing.assert_allclose(got["utilization"], ref["utilization"], rtol=1e-12)
+    np.testing.assert_allclose(got["avg_queue"], ref["avg_queue"], rtol=1e-12)
+
+
+def test_restaffed_branch_keeps_morning_capacity(tmp_path):
+    """A staffing change applies from the checkpoint on, not to the morning."""
+    paused = _paused(tmp_path)
+    station = "CA 2 Barber Shop"
+    stn = paused.station_list.index(station)
+    morning = paused.stations.server_ct.copy()
+
+    branch = restore(snapshot(paused), staffing={station: int(morning[stn]) + 4})
+    branch.run(verbose=False)
+
+    stats = branch.queue_stats
+    before, after = stats.capacity_area(np.array([0.0, UNTIL, stats.end_time]))
+    np.testing.assert_allclose(before, morning * UNTIL)
+    assert after[stn] == pytest.approx((morning[stn] + 4) * (stats.end_time - UNTIL))
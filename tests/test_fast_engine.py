@@ -0,0 +1,33 @@
+"""
+The event-heap engine against the SimPy engine (see fast_engine.cross_check).
+"""
+
+import numpy as np
+import pytest
+
+from fast_engine import FastRDaySimulation
+from simulation import RDaySimulation
+
+SCENARIOS = [("std", "rand"), ("mod", "front"), ("mod", "back")]
+SEEDS = [3, 11]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("mod_path,usmaps_path", SCENARIOS)
+def test_fast_engine_logs_match_simpy(tmp_path, mod_path, usmaps_path, seed):
+    """Both engines log the same visits, column for column."""
+    sims = []
+    for engine in (RDaySimulation, FastRDaySimulation):
+        sim = engine(mod_path=mod_path, usmaps_path=usmaps_path,
+                     output_dir=str(tmp_path), seed=seed)
+        sim.run(verbose=False)
+        sims.append(sim)
+    ref, fast = sims
+
+    assert len(ref.time_stamp) == len(fast.time_stamp) > 0
+    assert ref.time_stamp.columns.keys() == fast.time_stamp.columns.keys()
+    for name in ref.time_stamp.columns:
+        np.testing.assert_array_equal(fast.time_stamp.column(name),
+                                      ref.time_stamp.column(name), err_msg=name)
+    np.testing.assert_array_equal(fast.arc_ct, ref.arc_ct)
+    assert fast.summary()["completion_time"] == ref.summary()["completion_time"]
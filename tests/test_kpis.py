@@ -0,0 +1,93 @@
+"""
+Wait and cycle-time KPIs of streamed event logs.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import kpis
+from cadets import Cohort
+from event_log import DEFAULT_CAPACITY, EventLog
+from fast_engine import FastRDaySimulation
+from simulation import RDaySimulation
+
+# Two days of the default cohort log more visits than one buffer holds, so
+# the streamed log flushes mid-run
+COHORT = Cohort(days=2)
+SEED = 7
+
+
+def _run(output_dir, stream_log):
+    sim = FastRDaySimulation("std", "rand", output_dir=str(output_dir), seed=SEED,
+                             cohort=COHORT, stream_log=stream_log)
+    sim.run(verbose=False)
+    return sim
+
+
+def test_streamed_run_never_materialises_full_log(tmp_path, monkeypatch):
+    """Saving a streamed run's KPIs never reads the whole log back."""
+    def refuse(*args, **kwargs):
+        raise AssertionError("the full event log was materialised")
+
+    monkeypatch.setattr(RDaySimulation, "event_frame", refuse)
+    monkeypatch.setattr(pd, "read_csv", refuse)
+
+    flushed = []
+    flush = EventLog.flush
+
+    def tracked_flush(log):
+        flushed.append(log.buffered_ct)
+        flush(log)
+
+    monkeypatch.setattr(EventLog, "flush", tracked_flush)
+
+    sim = _run(tmp_path, stream_log=True)
+    sim.save_results()
+
+    assert len(sim.time_stamp) > DEFAULT_CAPACITY
+    assert max(flushed) <= DEFAULT_CAPACITY
+    assert sim.time_stamp.columns["time"].size == DEFAULT_CAPACITY
+    assert (tmp_path / "station_waits.csv").is_file()
+    assert (tmp_path / "class_times.csv").is_file()
+
+
+def test_streamed_kpis_match_in_memory_kpis(tmp_path):
+    """Streamed totals agree with the in-memory reduction of the same run."""
+    streamed = kpis.sim_kpis(_run(tmp_path, stream_log=True))
+    in_memory = kpis.sim_kpis(_run(tmp_path / "memory", stream_log=False))
+
+    ref, got = in_memory["station_wait"], streamed["station_wait"]
+    np.testing.assert_array_equal(got["count"], ref["count"])
+    np.testing.assert_allclose(got["mean"], ref["mean"], rtol=1e-9)
+    np.testing.assert_allclose(got["max"], ref["max"], rtol=1e-12)
+    np.testing.assert_allclose(got["quantiles"], ref["quantiles"],
+                               atol=kpis.STREAM_WAIT_RESOLUTION)
+
+    for key in ("cycle_time", "cadet_wait"):
+        np.testing.assert_allclose(streamed[key], in_memory[key], rtol=1e-9)
+    for key in ("class_cycle", "class_wait"):
+        np.testing.assert_allclose(streamed[key]["quantiles"],
+                                   in_memory[key]["quantiles"], rtol=1e-9)
+
+
+def test_visit_routed_to_station_zero_is_not_a_completion():
+    """Only the negative exit sentinel marks a completion."""
+    class Cadets:
+        sex = np.array([1, 1, 1])
+        usmaps = np.array([0, 0, 0])
+
+    # Cadet 1 exits; cadet 2 is routed back to station 0 and never exits
+    columns = {
+        "entity": np.array([1, 2, 1, 2]),
+        "stn_idx": np.array([0, 0, 1, 1]),
+        "next_stn": np.array([1, 1, -99, 0]),
+        "request_time": np.array([0.0, 0.5, 1.0, 1.5]),
+        "start_time": np.array([0.5, 1.0, 1.25, 1.5]),
+        "time": np.array([1.0, 1.5, 3.0, 2.0]),
+    }
+    result = kpis.compute_kpis(columns, Cadets(), station_ct=2)
+    assert result["cycle_time"][1] == pytest.approx(3.0)
+    assert result["cadet_wait"][1] == pytest.approx(0.75)
+    assert np.isnan(result["cycle_time"][2])
+    assert result["class_cycle"]["count"][0] == 1
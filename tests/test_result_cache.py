@@ -0,0 +1,31 @@
+"""
+Keys of cached single runs.
+"""
+
+import sys
+
+import simulation
+from result_cache import ResultCache
+
+
+def _args(monkeypatch, *extra):
+    monkeypatch.setattr(sys, "argv", ["simulation.py", "--seed", "5", *extra])
+    return simulation.parse_arguments()
+
+
+def test_streamed_and_in_memory_runs_miss_each_other(tmp_path, monkeypatch):
+    """A streamed run never restores an in-memory run's output, or vice versa."""
+    cache = ResultCache(root=str(tmp_path / "cache"))
+    keys = {}
+    for stream_log in (False, True):
+        result = tmp_path / f"station_waits_{stream_log}.csv"
+        result.write_text(f"stream_log,{stream_log}\n")
+        args = _args(monkeypatch, *(["--stream-log"] if stream_log else []))
+        keys[stream_log] = simulation.run_cache_key(cache, args)
+        assert cache.lookup(keys[stream_log]) is None
+        cache.store(keys[stream_log], [str(result)])
+
+    assert keys[False] != keys[True]
+    for stream_log, key in keys.items():
+        entry = cache.lookup(key)
+        assert entry["files"] == [f"station_waits_{stream_log}.csv"]
@@ -0,0 +1,55 @@
+"""
+Round trips of the event log through every output format.
+"""
+
+import sys
+
+import pandas as pd
+import pytest
+
+from fast_engine import FastRDaySimulation
+from results_io import (
+    FORMATS, detect_format, read_time_stamp, time_stamp_path, write_time_stamp
+)
+
+# Formats that need the optional pyarrow package
+PYARROW_FORMATS = ("parquet", "feather")
+
+
+@pytest.fixture(scope="module")
+def event_log(tmp_path_factory):
+    sim = FastRDaySimulation("std", "rand", seed=1,
+                             output_dir=str(tmp_path_factory.mktemp("run")))
+    sim.run(verbose=False)
+    return sim.time_stamp.to_frame()
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip(event_log, tmp_path, fmt):
+    """Every format reads back the columns and values that were written."""
+    if fmt in PYARROW_FORMATS:
+        pytest.importorskip("pyarrow")
+
+    path = write_time_stamp(event_log, str(tmp_path), fmt)
+    assert path == time_stamp_path(str(tmp_path), fmt)
+    assert detect_format(path) == fmt
+
+    # Auto-detected from the output directory and read by explicit format
+    for df in (read_time_stamp(str(tmp_path)), read_time_stamp(path, fmt)):
+        if fmt == "csv":
+            # Text carries no dtypes and keeps floats to their repr
+            expected = event_log.astype({"stn_nm": str})
+            pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+        else:
+            pd.testing.assert_frame_equal(df, event_log)
+
+
+@pytest.mark.parametrize("fmt", PYARROW_FORMATS)
+def test_missing_pyarrow_is_reported(event_log, tmp_path, monkeypatch, fmt):
+    """Parquet and Feather name the package to install when pyarrow is absent."""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ImportError, match="requires pyarrow"):
+        write_time_stamp(event_log, str(tmp_path), fmt)
+    with pytest.raises(ImportError, match="requires pyarrow"):
+        read_time_stamp(time_stamp_path(str(tmp_path), fmt), fmt)
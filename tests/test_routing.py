@@ -0,0 +1,45 @@
+"""
+Validation of station dictionaries by compile_station_table.
+"""
+
+import copy
+
+import pytest
+
+from config import STATION_DIC
+from routing import BUS_STATION, compile_station_table
+
+
+def _station_dic(edit):
+    station_dic = copy.deepcopy(STATION_DIC)
+    edit(station_dic)
+    return station_dic
+
+
+def test_default_station_dic_compiles():
+    table = compile_station_table()
+    assert list(table.names) == list(STATION_DIC)
+
+
+@pytest.mark.parametrize("edit,message", [
+    (lambda d: d["TH 3 LRC Issue Point 1"].pop("next_fem_stn"),
+     "has no 'next_fem_stn'"),
+    (lambda d: d["R-Day complete"].update(next_stn=15), "Routing loop"),
+    (lambda d: d["TH 2 Finance"].update(next_stn=99), "is not a station index"),
+    (lambda d: d["TH 2 Finance"].update(next_USMAPS_stn=-1), "is not a station index"),
+    (lambda d: d["CA 2 Barber Shop"].update(service_time=[4, 3, 2]),
+     "service_time must satisfy"),
+    (lambda d: d["CA 2 Barber Shop"].update(service_time=[-1, 3, 4]),
+     "service_time must satisfy"),
+    (lambda d: d["CA 2 Barber Shop"].pop("server_ct"), "has no 'server_ct'"),
+    (lambda d: d["CA 2 Barber Shop"].update(server_ct=0), "at least one server"),
+    (lambda d: d.pop(BUS_STATION), f"no '{BUS_STATION}' station"),
+])
+def test_malformed_station_dic_raises(edit, message):
+    with pytest.raises(ValueError, match=message):
+        compile_station_table(_station_dic(edit))
+
+
+def test_unknown_staffing_station_raises():
+    with pytest.raises(ValueError, match="Unknown station"):
+        compile_station_table(staffing={"Nowhere": 3})
@@ -0,0 +1,28 @@
+"""
+Start-up time budget of headless runs (see check_startup.py).
+"""
+
+import check_startup
+
+# Attempts per measurement; the best is compared with the budget
+REPEAT = 3
+
+
+def test_engine_import_budget():
+    """Importing the engines is fast and leaves the heavy modules unloaded."""
+    imports = [check_startup.measure_import() for _ in range(REPEAT)]
+    loaded = sorted({m for r in imports for m in r["loaded"]})
+    assert not loaded, f"importing the engines loaded {', '.join(loaded)}"
+    best = min(r["wall"] for r in imports)
+    assert best <= check_startup.IMPORT_BUDGET, (
+        f"import took {best:.3f}s (budget {check_startup.IMPORT_BUDGET}s)")
+
+
+def test_headless_run_budget(tmp_path):
+    """A seeded headless run finishes within budget and writes only to its directory."""
+    best = min(check_startup.measure_headless_run(str(tmp_path))
+               for _ in range(REPEAT))
+    assert best <= check_startup.HEADLESS_RUN_BUDGET, (
+        f"headless run took {best:.3f}s (budget {check_startup.HEADLESS_RUN_BUDGET}s)")
+    assert (tmp_path / "df_time_stamp.csv").is_file()
+    assert (tmp_path / "recent_run.txt").is_file()